@@ -1,12 +1,35 @@
 # app/auth/dependencies.py
 
+import time
+from typing import Any, Dict, Optional
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from pydantic import ValidationError
+from app.auth.revocation import revocation_list
+from app.auth.user_cache import cache_user, get_cached_user, latest_user_version
+from app.config import settings
 from app.models.user import User
 from app.schemas.user import UserResponse
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+def user_from_claims(claims: Optional[Dict[str, Any]]) -> Optional[UserResponse]:
+    """Build the user from a self-contained token, or None if it must be revalidated."""
+    if not claims or not claims.get("usr"):
+        return None
+    issued_at = claims.get("iat")
+    if issued_at is None or time.time() - issued_at > settings.CLAIMS_REVALIDATE_SECONDS:
+        return None
+    try:
+        user = UserResponse.model_validate(claims["usr"])
+    except ValidationError:
+        return None
+    latest = latest_user_version(user.id)
+    if latest is not None and claims.get("ver", 0) < latest:
+        return None
+    return user
+
 def get_current_user(
     db,
     token: str = Depends(oauth2_scheme)
@@ -21,12 +44,27 @@ def get_current_user(
     user_id = User.verify_token(token)
     if user_id is None:
         raise credentials_exception
+
+    claims = User.decode_token(token)  # cached by verify_token
+    jti = claims.get("jti") if claims else None
+    if jti and revocation_list.is_revoked(db, jti):
+        raise credentials_exception
+
+    claims_user = user_from_claims(claims)
+    if claims_user is not None and claims_user.id == user_id:
+        return claims_user
     
+    cached = get_cached_user(user_id)
+    if cached is not None:
+        return cached
+
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
         raise credentials_exception
         
-    return UserResponse.model_validate(user)  # Updated from from_orm
+    user_response = UserResponse.model_validate(user)  # Updated from from_orm
+    cache_user(user_response)
+    return user_response
 
 def get_current_active_user(
     current_user: UserResponse = Depends(get_current_user)
@@ -0,0 +1,132 @@
+# app/auth/last_login.py
+
+"""
+Coalesced last_login writes.
+
+Instead of a write transaction per login, ``LastLoginRecorder`` keeps the latest
+login time per user in memory and a background thread writes them all in one
+``UPDATE users ... FROM (VALUES ...)`` every ``LAST_LOGIN_FLUSH_SECONDS``. A row
+is only moved forward in time, so out-of-order flushes from several workers
+cannot overwrite a newer login.
+"""
+
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import DateTime, column, or_, update, values
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LastLoginRecorder:
+    """Collects (user_id, timestamp) pairs and flushes them in batches."""
+
+    def __init__(self):
+        self._pending: Dict[UUID, datetime] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._session_factory = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the background flusher is active."""
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def pending(self) -> int:
+        """Number of users waiting to be flushed."""
+        return len(self._pending)
+
+    def record(self, user_id: UUID, timestamp: datetime) -> None:
+        """Remember a login, keeping only the latest timestamp per user."""
+        with self._lock:
+            current = self._pending.get(user_id)
+            if current is None or timestamp > current:
+                self._pending[user_id] = timestamp
+
+    def _merge_back(self, batch: Dict[UUID, datetime]) -> None:
+        for user_id, timestamp in batch.items():
+            self.record(user_id, timestamp)
+
+    def flush(self, db=None) -> int:
+        """
+        Write all pending logins in a single UPDATE and commit.
+
+        Args:
+            db (Session, optional): Session to write with; defaults to a new
+                session from the factory given to ``start``.
+
+        Returns:
+            int: The number of users written.
+        """
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+
+        # Imported here to avoid a circular import (app.models.user uses this module).
+        from app.models.user import User
+
+        logins = values(
+            column("user_id", PGUUID(as_uuid=True)),
+            column("login_at", DateTime),
+            name="logins",
+        ).data(list(batch.items()))
+        users = User.__table__
+        stmt = (
+            update(users)
+            .where(users.c.id == logins.c.user_id)
+            .where(or_(users.c.last_login.is_(None), users.c.last_login < logins.c.login_at))
+            .values(last_login=logins.c.login_at)
+        )
+
+        owns_session = db is None
+        if owns_session:
+            db = self._session_factory()
+        try:
+            db.execute(stmt)
+            db.commit()
+        except Exception:
+            db.rollback()
+            self._merge_back(batch)
+            raise
+        finally:
+            if owns_session:
+                db.close()
+        return len(batch)
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error("Failed to flush last_login updates: %s", e)
+
+    def start(self, session_factory, interval: float = settings.LAST_LOGIN_FLUSH_SECONDS) -> None:
+        """Start the background flusher."""
+        if self.running:
+            return
+        self._session_factory = session_factory
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,),
+                                        name="last-login-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background flusher and write anything still pending."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.flush()
+
+
+last_login_recorder = LastLoginRecorder()
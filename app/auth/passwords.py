@@ -0,0 +1,161 @@
+# app/auth/passwords.py
+
+"""
+Password hashing off the event loop.
+
+bcrypt is deliberately slow, so calling it from an ``async`` route blocks every
+other request on the worker. ``PasswordService`` runs hashing on a dedicated,
+size-limited thread pool (the bcrypt backend releases the GIL while hashing),
+sheds load with ``PasswordServiceBusy`` once too many hashes are pending, and
+can calibrate the bcrypt cost to a target latency at startup. Bulk jobs run on
+a separate pool so a large import never queues ahead of interactive logins.
+"""
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.config import settings
+from app.monitoring.timing import timed
+from app.monitoring.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Hashes below the minimum cost are upgraded on the next successful login.
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__min_rounds=settings.BCRYPT_MIN_ROUNDS)
+
+# bcrypt's own bounds on the cost factor.
+BCRYPT_MIN_COST = 4
+BCRYPT_MAX_COST = 31
+
+
+class PasswordServiceBusy(RuntimeError):
+    """Raised when the hashing queue is full and the request should be retried later."""
+
+
+class PasswordService:
+    """Runs password hashing on a bounded thread pool with admission control."""
+
+    def __init__(self, context: CryptContext = pwd_context,
+                 max_workers: int = settings.PASSWORD_HASH_WORKERS,
+                 max_pending: int = settings.PASSWORD_HASH_QUEUE_LIMIT,
+                 bulk_workers: int = settings.PASSWORD_BULK_HASH_WORKERS):
+        self.context = context
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.bulk_workers = bulk_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._bulk_executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """The hashing pool, created on first use."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="password-hash")
+            return self._executor
+
+    @property
+    def bulk_executor(self) -> ThreadPoolExecutor:
+        """The pool for bulk jobs, kept apart from the interactive one and created on first use."""
+        with self._lock:
+            if self._bulk_executor is None:
+                self._bulk_executor = ThreadPoolExecutor(max_workers=self.bulk_workers,
+                                                         thread_name_prefix="password-bulk-hash")
+            return self._bulk_executor
+
+    @property
+    def pending(self) -> int:
+        """Number of hashes queued or running."""
+        return self._pending
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise PasswordServiceBusy("Too many password operations in progress")
+            self._pending += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def _run(self, operation: str, func, *args):
+        self._admit()
+        try:
+            loop = asyncio.get_running_loop()
+            with timed("hash"), tracer.start_span(f"password.{operation}"):
+                return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self._release()
+
+    async def hash(self, password: str) -> str:
+        """Hash a password without blocking the event loop."""
+        return await self._run("hash", self.context.hash, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        """Verify a password without blocking the event loop."""
+        return await self._run("verify", self.context.verify, password, hashed)
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password and return a replacement hash if the stored one uses outdated settings."""
+        return await self._run("verify_and_update", self.context.verify_and_update, password, hashed)
+
+    def hash_many(self, passwords: Iterable[str]) -> List[str]:
+        """Hash many passwords on the bulk pool (blocking; logins keep the interactive pool)."""
+        return list(self.bulk_executor.map(self.context.hash, passwords))
+
+    def calibrate(self, target_ms: float,
+                  min_rounds: int = settings.BCRYPT_MIN_ROUNDS,
+                  max_rounds: int = settings.BCRYPT_MAX_ROUNDS) -> int:
+        """
+        Pick the highest bcrypt cost whose hash time stays under ``target_ms``.
+
+        Each extra round doubles the work, so one measurement at ``min_rounds``
+        is enough to extrapolate. The chosen cost is pinned as both the default
+        and the accepted range, so hashes made with any other cost are rehashed
+        on the next successful login.
+
+        Args:
+            target_ms (float): Desired time for a single hash, in milliseconds.
+            min_rounds (int): Lowest cost ever chosen.
+            max_rounds (int): Highest cost ever chosen.
+
+        Returns:
+            int: The chosen bcrypt cost.
+        """
+        min_rounds = max(min_rounds, BCRYPT_MIN_COST)
+        max_rounds = min(max_rounds, BCRYPT_MAX_COST)
+        handler = self.context.handler("bcrypt").using(rounds=min_rounds)
+
+        elapsed = math.inf
+        for _ in range(3):
+            start = time.perf_counter()
+            handler.hash("calibration-password")
+            elapsed = min(elapsed, (time.perf_counter() - start) * 1000)
+
+        extra = int(math.floor(math.log2(target_ms / elapsed))) if elapsed > 0 and target_ms > elapsed else 0
+        rounds = max(min_rounds, min(max_rounds, min_rounds + extra))
+        self.context.update(bcrypt__rounds=rounds, bcrypt__min_rounds=rounds, bcrypt__max_rounds=rounds)
+        logger.info("Calibrated bcrypt cost to %d rounds (%.1f ms at %d rounds)", rounds, elapsed, min_rounds)
+        return rounds
+
+    def shutdown(self) -> None:
+        """Stop both pools; they are recreated on next use."""
+        with self._lock:
+            executors = (self._executor, self._bulk_executor)
+            self._executor = self._bulk_executor = None
+        for executor in executors:
+            if executor is not None:
+                executor.shutdown(wait=True)
+
+
+password_service = PasswordService()
@@ -0,0 +1,212 @@
+# app/auth/rate_limit.py
+
+"""
+Login admission control.
+
+Every login attempt costs a full bcrypt verify, so a credential-stuffing burst
+can saturate every worker. ``LoginRateLimiter`` rejects over-limit attempts per
+username and per client IP *before* any hashing happens. Both buckets are
+checked before either is charged, so an attempt rejected by one limit does not
+use up the other's budget.
+
+The default backend keeps one float per key (the GCRA "theoretical arrival
+time", equivalent to a token bucket) in an LRU-ordered dict, with no explicit
+lock: each update is a single dict store, which is atomic under the GIL. Two
+threads racing on the same key can at worst both be admitted, which is fine
+for a limiter. Idle keys are evicted least-recently-used first.
+
+``SharedCounterBackend`` trades precision for consistency across worker
+processes: it counts attempts per fixed window in a shared store that offers an
+atomic increment (e.g. Redis via ``RedisCounterStore``). ``LocalCounterStore``
+is an in-process stand-in with the same interface, for tests and single-process
+deployments.
+"""
+
+from collections import OrderedDict
+import math
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from app.config import settings
+
+
+class RateLimitExceeded(Exception):
+    """Raised when an attempt is over the limit."""
+
+    def __init__(self, key: str, retry_after: float):
+        super().__init__(f"Too many login attempts; retry in {math.ceil(retry_after)} seconds")
+        self.key = key
+        self.retry_after = retry_after
+
+
+class InMemoryBackend:
+    """GCRA token buckets, one float per key, with LRU eviction of idle keys."""
+
+    def __init__(self, max_keys: int = settings.LOGIN_LIMITER_MAX_KEYS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._tat: "OrderedDict[str, float]" = OrderedDict()
+
+    def _next(self, key: str, rate: float, burst: int) -> Tuple[float, float]:
+        """The arrival time after one more token, and how far over the limit that is."""
+        now = self.clock()
+        interval = 1.0 / rate
+        new_tat = max(self._tat.get(key, now), now) + interval
+        return new_tat, new_tat - now - burst * interval
+
+    def peek(self, key: str, rate: float, burst: int) -> float:
+        """Like ``acquire``, but without taking the token."""
+        return max(self._next(key, rate, burst)[1], 0.0)
+
+    def acquire(self, key: str, rate: float, burst: int) -> float:
+        """
+        Take one token for ``key``.
+
+        Args:
+            key (str): Bucket key.
+            rate (float): Refill rate in tokens per second.
+            burst (int): Bucket capacity.
+
+        Returns:
+            float: 0 if admitted, otherwise seconds until a token is available.
+        """
+        new_tat, excess = self._next(key, rate, burst)
+        if excess > 0:
+            return excess
+        self._tat[key] = new_tat
+        try:
+            self._tat.move_to_end(key)
+        except KeyError:  # pragma: no cover - evicted by a concurrent thread
+            pass
+        while len(self._tat) > self.max_keys:
+            try:
+                self._tat.popitem(last=False)
+            except KeyError:  # pragma: no cover - emptied by a concurrent thread
+                break
+        return 0.0
+
+    def __len__(self) -> int:
+        return len(self._tat)
+
+    def reset(self) -> None:
+        self._tat.clear()
+
+
+class LocalCounterStore:
+    """In-process stand-in for a shared counter store such as Redis."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._counters: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, key: str, ttl: float) -> int:
+        """Atomically increment ``key``, creating it with a lifetime of ``ttl`` seconds."""
+        with self._lock:
+            now = self.clock()
+            count, expires_at = self._counters.get(key, (0, 0.0))
+            if expires_at <= now:
+                count, expires_at = 0, now + ttl
+            count += 1
+            self._counters[key] = (count, expires_at)
+            if len(self._counters) > 2 * settings.LOGIN_LIMITER_MAX_KEYS:
+                self._counters = {k: v for k, v in self._counters.items() if v[1] > now}
+            return count
+
+    def get(self, key: str) -> int:
+        """Current value of ``key``; 0 if it is missing or expired."""
+        with self._lock:
+            count, expires_at = self._counters.get(key, (0, 0.0))
+            return count if expires_at > self.clock() else 0
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+
+
+class RedisCounterStore:
+    """Counter store backed by a redis-py compatible client."""
+
+    def __init__(self, client, prefix: str = "login-limit:"):
+        self.client = client
+        self.prefix = prefix
+
+    def incr(self, key: str, ttl: float) -> int:
+        key = self.prefix + key
+        count = self.client.incr(key)
+        if count == 1:
+            self.client.expire(key, max(1, math.ceil(ttl)))
+        return count
+
+    def get(self, key: str) -> int:
+        return int(self.client.get(self.prefix + key) or 0)
+
+    def reset(self) -> None:  # pragma: no cover - keys expire on their own
+        pass
+
+
+class SharedCounterBackend:
+    """Fixed-window counters in a shared store, consistent across worker processes."""
+
+    def __init__(self, store, clock: Callable[[], float] = time.time):
+        self.store = store
+        self.clock = clock
+
+    def _window(self, rate: float, burst: int) -> Tuple[float, float, float]:
+        window = burst / rate
+        now = self.clock()
+        return now, math.floor(now / window) * window, window
+
+    def peek(self, key: str, rate: float, burst: int) -> float:
+        """Like ``acquire``, but without counting the attempt."""
+        now, window_start, window = self._window(rate, burst)
+        if self.store.get(f"{key}:{int(window_start)}") >= burst:
+            return window_start + window - now
+        return 0.0
+
+    def acquire(self, key: str, rate: float, burst: int) -> float:
+        now, window_start, window = self._window(rate, burst)
+        count = self.store.incr(f"{key}:{int(window_start)}", window)
+        if count > burst:
+            return window_start + window - now
+        return 0.0
+
+    def reset(self) -> None:
+        self.store.reset()
+
+
+class LoginRateLimiter:
+    """Per-username and per-IP login limits over a pluggable backend."""
+
+    def __init__(self, backend=None,
+                 username_per_minute: int = settings.LOGIN_ATTEMPTS_PER_MINUTE_PER_USERNAME,
+                 ip_per_minute: int = settings.LOGIN_ATTEMPTS_PER_MINUTE_PER_IP):
+        self.backend = backend if backend is not None else InMemoryBackend()
+        self.username_per_minute = username_per_minute
+        self.ip_per_minute = ip_per_minute
+
+    def check(self, username: str, client_ip: Optional[str] = None) -> None:
+        """Admit one login attempt or raise RateLimitExceeded."""
+        checks = [(f"user:{username.lower()}", self.username_per_minute)]
+        if client_ip:
+            checks.append((f"ip:{client_ip}", self.ip_per_minute))
+        checks = [(key, per_minute) for key, per_minute in checks if per_minute > 0]
+        # Check every bucket before charging any, so one limit rejecting the
+        # attempt does not spend the other's budget.
+        for key, per_minute in checks:
+            retry_after = self.backend.peek(key, per_minute / 60.0, per_minute)
+            if retry_after > 0:
+                raise RateLimitExceeded(key, retry_after)
+        for key, per_minute in checks:
+            retry_after = self.backend.acquire(key, per_minute / 60.0, per_minute)
+            if retry_after > 0:  # another attempt took the last token since the peek
+                raise RateLimitExceeded(key, retry_after)
+
+    def reset(self) -> None:
+        """Forget all buckets."""
+        self.backend.reset()
+
+
+login_limiter = LoginRateLimiter()
@@ -0,0 +1,202 @@
+# app/auth/revocation.py
+
+"""
+Access-token revocation without a database query per request.
+
+Revoked ``jti`` claims are stored in the ``revoked_tokens`` table. Each worker
+mirrors them into an in-memory Bloom filter, so the common case - a token that
+was never revoked - is answered from memory. Only filter hits (revoked tokens
+and rare false positives) go to the table.
+
+Workers pick up revocations made elsewhere by polling the table at most every
+``REVOCATION_REFRESH_SECONDS``; that interval bounds how long another worker
+may keep accepting a freshly revoked token. Polls read rows by ``revoked_at``
+starting ``REVOCATION_OVERLAP_SECONDS`` before the newest revocation already
+seen: a transaction can commit after a later-stamped one, so a strict "newer
+than the last seen" watermark would skip it for good. Rows inside the overlap
+are remembered so they are not added twice, and every
+``REVOCATION_RESYNC_SECONDS`` the filter is rebuilt from the whole table as a
+backstop for transactions that stayed open longer than the overlap.
+"""
+
+from datetime import datetime, timedelta
+import hashlib
+import math
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import exists, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.config import settings
+from app.models.revoked_token import RevokedToken
+
+
+class BloomFilter:
+    """A fixed-size Bloom filter over strings using double hashing."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> None:
+        """Add an item to the filter."""
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList:
+    """Bloom-filter front for the revoked_tokens table."""
+
+    def __init__(self, capacity: int = settings.REVOCATION_BLOOM_CAPACITY,
+                 error_rate: float = settings.REVOCATION_BLOOM_ERROR_RATE,
+                 refresh_interval: float = settings.REVOCATION_REFRESH_SECONDS,
+                 overlap: float = settings.REVOCATION_OVERLAP_SECONDS,
+                 resync_interval: float = settings.REVOCATION_RESYNC_SECONDS):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self.overlap = timedelta(seconds=overlap)
+        self.resync_interval = resync_interval
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget everything; the next check reloads from the table."""
+        with self._lock:
+            self.bloom = BloomFilter(self.capacity, self.error_rate)
+            self.watermark: Optional[datetime] = None
+            self._recent: Dict[str, datetime] = {}
+            self.last_refresh: Optional[float] = None
+            self.last_rebuild: Optional[float] = None
+
+    def _remember(self, jti: str, revoked_at: datetime) -> None:
+        """Track a row inside the overlap window and advance the watermark. Caller holds the lock."""
+        self._recent[jti] = revoked_at
+        if self.watermark is None or revoked_at > self.watermark:
+            self.watermark = revoked_at
+
+    def _forget_old(self) -> None:
+        """Drop remembered rows that fell out of the overlap window. Caller holds the lock."""
+        if self.watermark is None:
+            return
+        horizon = self.watermark - self.overlap
+        self._recent = {jti: revoked_at for jti, revoked_at in self._recent.items() if revoked_at >= horizon}
+
+    def refresh(self, db) -> int:
+        """
+        Add revocations in or after the overlap window to the filter.
+
+        The filter is rebuilt from the table instead when a resync is due, or
+        once it holds more entries than it was sized for, which keeps the
+        false-positive rate bounded.
+
+        Returns:
+            int: The number of new revocations loaded.
+        """
+        if self.last_rebuild is None or time.monotonic() - self.last_rebuild >= self.resync_interval:
+            return self.rebuild(db)
+        with self._lock:
+            query = db.query(RevokedToken.jti, RevokedToken.revoked_at)
+            if self.watermark is not None:
+                query = query.filter(RevokedToken.revoked_at >= self.watermark - self.overlap)
+            loaded = 0
+            for jti, revoked_at in query:
+                if jti in self._recent:
+                    continue
+                self.bloom.add(jti)
+                self._remember(jti, revoked_at)
+                loaded += 1
+            self._forget_old()
+            self.last_refresh = time.monotonic()
+            overfull = self.bloom.count > self.capacity
+        if overfull:
+            self.rebuild(db)
+        return loaded
+
+    def rebuild(self, db) -> int:
+        """
+        Rebuild the filter from unexpired revocations.
+
+        Returns:
+            int: The number of revocations loaded.
+        """
+        bloom = BloomFilter(self.capacity, self.error_rate)
+        rows = db.query(RevokedToken.jti, RevokedToken.revoked_at).filter(
+            RevokedToken.expires_at > datetime.utcnow()
+        ).all()
+        with self._lock:
+            self.bloom = bloom
+            self.watermark = db.query(func.max(RevokedToken.revoked_at)).scalar()
+            self._recent = {}
+            for jti, revoked_at in rows:
+                bloom.add(jti)
+                self._recent[jti] = revoked_at
+            self._forget_old()
+            self.last_refresh = self.last_rebuild = time.monotonic()
+        return len(rows)
+
+    def _refresh_due(self) -> bool:
+        return self.last_refresh is None or time.monotonic() - self.last_refresh >= self.refresh_interval
+
+    def is_revoked(self, db, jti: str) -> bool:
+        """Return whether a token id is revoked, querying the table only on a filter hit."""
+        if self._refresh_due():
+            self.refresh(db)
+        if jti not in self.bloom:
+            return False
+        return db.query(exists().where(RevokedToken.jti == jti)).scalar()
+
+    def revoke(self, db, jti: str, expires_at: datetime) -> None:
+        """Record a revocation; visible in this worker immediately. The caller commits."""
+        db.execute(
+            pg_insert(RevokedToken)
+            .values(jti=jti, expires_at=expires_at, revoked_at=func.timezone("UTC", func.now()))
+            .on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+        )
+        with self._lock:
+            self.bloom.add(jti)
+            self._recent[jti] = datetime.utcnow()
+
+    def purge_expired(self, db) -> int:
+        """Delete revocations for tokens that have expired anyway. The caller commits."""
+        return db.query(RevokedToken).filter(RevokedToken.expires_at <= datetime.utcnow()).delete()
+
+
+revocation_list = RevocationList()
+
+
+def revoke_token(db, token: str) -> bool:
+    """
+    Revoke an access token until it expires.
+
+    Returns:
+        bool: False if the token is invalid or carries no ``jti``.
+    """
+    from app.models.user import User  # avoid a circular import
+
+    claims = User.decode_token(token)
+    if not claims or not claims.get("jti"):
+        return False
+    revocation_list.revoke(db, claims["jti"], datetime.utcfromtimestamp(claims["exp"]))
+    return True
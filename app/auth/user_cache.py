@@ -0,0 +1,78 @@
+# app/auth/user_cache.py
+
+"""
+Per-process cache of validated current users.
+
+``get_current_user`` would otherwise run a primary-key SELECT and a
+``UserResponse.model_validate`` on every authenticated request. Entries live
+for ``USER_CACHE_TTL_SECONDS`` at most and are invalidated explicitly whenever
+a ``User`` row is updated or deleted through the ORM: once at flush time and
+again after the transaction commits, so a concurrent request cannot re-cache
+the pre-commit row for the rest of the TTL.
+
+It also remembers the latest row version seen for each updated user, so
+self-contained (claims) tokens issued before an update made in this process are
+not trusted. Updates made in other processes are bounded by
+``CLAIMS_REVALIDATE_SECONDS`` instead.
+
+Bulk ``query(...).update()`` statements bypass ORM events; the TTL bounds
+staleness for those.
+"""
+
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.cache import TTLCache
+from app.config import settings
+from app.models.user import User
+from app.schemas.user import UserResponse
+
+user_cache = TTLCache(max_size=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+user_versions = TTLCache(max_size=settings.USER_CACHE_SIZE, ttl=settings.CLAIMS_REVALIDATE_SECONDS)
+
+_PENDING_KEY = "user_cache_invalidations"
+
+
+def get_cached_user(user_id: UUID) -> Optional[UserResponse]:
+    """Return the cached UserResponse for a user id, if any."""
+    return user_cache.get(user_id)
+
+
+def cache_user(user: UserResponse) -> None:
+    """Store a validated UserResponse."""
+    user_cache.set(user.id, user)
+
+
+def invalidate_user(user_id: UUID) -> None:
+    """Drop a user from the cache."""
+    user_cache.invalidate(user_id)
+
+
+def latest_user_version(user_id: UUID) -> Optional[int]:
+    """Return the newest row version this process has written for a user, if recent."""
+    return user_versions.get(user_id)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_change(mapper, connection, target) -> None:
+    invalidate_user(target.id)
+    if target.version is not None:
+        user_versions.set(target.id, target.version)
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session) -> None:
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session) -> None:
+    session.info.pop(_PENDING_KEY, None)
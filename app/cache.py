@@ -0,0 +1,97 @@
+# app/cache.py
+
+"""
+Small in-process caches.
+
+``TTLCache`` is a thread-safe LRU cache whose entries also expire, either after
+a fixed time-to-live or at an explicit deadline. It keeps hit/miss/eviction
+counters so callers can expose them as metrics.
+"""
+
+from collections import OrderedDict
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """A bounded LRU cache with per-entry expiry."""
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            max_size (int): Maximum number of entries before the least recently used is evicted.
+            ttl (float, optional): Default lifetime of an entry in seconds; None means no default expiry.
+            clock (callable): Time source; deadlines passed to ``set`` use the same units.
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value, or ``default`` if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > self.clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None,
+            expires_at: Optional[float] = None) -> None:
+        """
+        Store a value.
+
+        Args:
+            key: The cache key.
+            value: The value to store.
+            ttl (float, optional): Lifetime in seconds, overriding the cache default.
+            expires_at (float, optional): Absolute deadline in ``clock`` units; takes precedence over ``ttl``.
+        """
+        if expires_at is None:
+            lifetime = ttl if ttl is not None else self.ttl
+            expires_at = self.clock() + lifetime if lifetime is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Remove an entry; return whether it was present."""
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self) -> None:
+        """Remove all entries and reset the counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss/eviction counters and the current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._data),
+                "max_size": self.max_size,
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
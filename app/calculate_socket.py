@@ -0,0 +1,139 @@
+# app/calculate_socket.py
+
+"""
+Pipelined calculations over a WebSocket.
+
+Clients send operation messages without waiting for replies; each reply carries
+the ``id`` of the message it answers::
+
+    -> {"id": 7, "operation": "add", "a": 1, "b": 2}
+    <- {"id": 7, "result": 3.0}
+    -> {"id": 8, "operation": "divide", "a": 1, "b": 0}
+    <- {"id": 8, "error": "Cannot divide by zero!"}
+
+A frame may also hold a JSON array of messages, answered by one array frame in
+the same order. Binary frames are decoded and answered as MessagePack.
+
+Messages are validated by the same Pydantic model as the HTTP routes and
+computed inline with the ``app.operations`` kernels. Replies go out through a
+bounded send queue drained by a separate task: when the client reads slower
+than it writes, the queue fills, the receive loop stops reading, and TCP flow
+control pushes back on the client instead of replies piling up in memory.
+"""
+
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Tuple, Type
+
+import msgpack
+import orjson
+from pydantic import BaseModel, ValidationError
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from app.config import settings
+from app.monitoring.metrics import record_operation, record_operation_error
+from app.negotiation import packb, unpackb
+
+logger = logging.getLogger(__name__)
+
+Frame = Tuple[bool, Any]  # (binary, payload)
+
+
+def _encode(frame: Frame) -> Dict[str, Any]:
+    binary, payload = frame
+    if binary:
+        return {"type": "websocket.send", "bytes": packb(payload)}
+    return {"type": "websocket.send", "text": orjson.dumps(payload).decode()}
+
+
+class CalculateSocket:
+    """Serves pipelined operation messages on one WebSocket connection at a time."""
+
+    def __init__(self, request_model: Type[BaseModel], operations: Dict[str, Callable[[float, float], float]],
+                 send_queue_size: int = settings.WS_SEND_QUEUE_SIZE, max_batch: int = settings.WS_MAX_BATCH):
+        """
+        Args:
+            request_model (Type[BaseModel]): Model validating ``a`` and ``b``.
+            operations (dict): Operation name to kernel.
+            send_queue_size (int): Reply frames buffered per connection before reading pauses.
+            max_batch (int): Most messages accepted in one array frame.
+        """
+        self.request_model = request_model
+        self.operations = operations
+        self.send_queue_size = send_queue_size
+        self.max_batch = max_batch
+
+    def calculate(self, message: Any) -> Dict[str, Any]:
+        """Answer one operation message; failures become an ``error`` reply."""
+        if not isinstance(message, dict):
+            return {"id": None, "error": "Message must be an object"}
+        request_id = message.get("id")
+        name = message.get("operation")
+        operation = self.operations.get(name)
+        if operation is None:
+            return {"id": request_id, "error": f"Unknown operation: {name}"}
+        try:
+            operands = self.request_model.model_validate(message)
+        except ValidationError as e:
+            return {"id": request_id, "error": "; ".join(f"{err['loc'][-1]}: {err['msg']}" for err in e.errors())}
+        record_operation(name, 2)
+        try:
+            result = operation(operands.a, operands.b)
+        except ValueError as e:
+            record_operation_error(name, e)
+            return {"id": request_id, "error": str(e)}
+        return {"id": request_id, "result": result}
+
+    def reply(self, message: Dict[str, Any]) -> Frame:
+        """Decode an ASGI receive message and compute the reply frame."""
+        binary = message.get("bytes") is not None
+        try:
+            data = unpackb(message["bytes"]) if binary else orjson.loads(message.get("text") or "")
+        except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError):
+            return binary, {"id": None, "error": "Invalid MessagePack" if binary else "Invalid JSON"}
+
+        if isinstance(data, list):
+            if len(data) > self.max_batch:
+                return binary, {"id": None, "error": f"Batch larger than {self.max_batch} messages"}
+            return binary, [self.calculate(item) for item in data]
+        return binary, self.calculate(data)
+
+    async def _send_loop(self, websocket: WebSocket, outbox: "asyncio.Queue[Frame]") -> None:
+        while True:
+            await websocket.send(_encode(await outbox.get()))
+
+    async def _enqueue(self, outbox: "asyncio.Queue[Frame]", frame: Frame, sender: asyncio.Task) -> bool:
+        """Queue a reply, waiting while the queue is full; False once the sender has stopped."""
+        if sender.done():
+            return False
+        try:
+            outbox.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            pass
+        put = asyncio.ensure_future(outbox.put(frame))
+        await asyncio.wait({put, sender}, return_when=asyncio.FIRST_COMPLETED)
+        if not put.done():
+            put.cancel()
+            return False
+        return True
+
+    async def serve(self, websocket: WebSocket) -> None:
+        """Accept the connection and answer messages until the client disconnects."""
+        await websocket.accept()
+        outbox: "asyncio.Queue[Frame]" = asyncio.Queue(maxsize=self.send_queue_size)
+        sender = asyncio.create_task(self._send_loop(websocket, outbox))
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+                if not await self._enqueue(outbox, self.reply(message), sender):
+                    sender.result()  # the sender failed: surface why
+                    return
+        except WebSocketDisconnect:
+            pass
+        except Exception:
+            logger.exception("WebSocket calculation stream failed")
+        finally:
+            sender.cancel()
@@ -0,0 +1,275 @@
+# app/columnar.py
+
+"""
+Columnar export and import of the calculations table.
+
+Rows are written as Arrow record batches, one Parquet row group (or one Arrow
+IPC batch) per batch, so readers can scan ``inputs`` as a ``list<float64>``
+column instead of parsing ``input_data`` JSON row by row.
+
+Chunked calculations are exported with their full inputs, streamed from
+``calculation_chunks``, and their ``chunk_size``; importing such a row stores
+its inputs as chunks again. ``result`` is the stored result column, so export
+runs no per-row result queries.
+
+Exports can be split by ``created_at`` time range with ``split_time_range`` and
+run in parallel with ``export_calculations_parallel``; each worker uses its own
+session and writes its own file.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+import uuid
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+from sqlalchemy import insert
+
+from app.models.calculation import Calculation
+from app.models.calculation_chunk import iter_chunk_values, store_chunks
+
+DEFAULT_BATCH_SIZE = 10_000
+
+CALCULATION_SCHEMA = pa.schema([
+    pa.field("id", pa.string(), nullable=False),
+    pa.field("user_id", pa.string(), nullable=False),
+    pa.field("type", pa.string(), nullable=False),
+    pa.field("inputs", pa.list_(pa.float64()), nullable=False),
+    pa.field("result", pa.float64(), nullable=True),
+    pa.field("created_at", pa.timestamp("us"), nullable=False),
+    pa.field("updated_at", pa.timestamp("us"), nullable=False),
+    # Null for calculations stored inline in input_data
+    pa.field("chunk_size", pa.int32(), nullable=True),
+])
+
+FORMATS = ("parquet", "arrow")
+
+
+def _inputs(db, calculation: Calculation) -> List[float]:
+    """A calculation's inputs, streamed from its chunks when it is chunked."""
+    if calculation.is_chunked:
+        inputs: List[float] = []
+        for values in iter_chunk_values(db, calculation.id):
+            inputs.extend(values)
+        return inputs
+    return [float(x) for x in calculation.inputs] if isinstance(calculation.inputs, list) else []
+
+
+def _to_batch(db, calculations: List[Calculation]) -> pa.RecordBatch:
+    """Convert a list of Calculation rows into an Arrow record batch."""
+    return pa.RecordBatch.from_pydict(
+        {
+            "id": [str(c.id) for c in calculations],
+            "user_id": [str(c.user_id) for c in calculations],
+            "type": [c.calculation_type for c in calculations],
+            "inputs": [_inputs(db, c) for c in calculations],
+            "result": [c.result for c in calculations],
+            "created_at": [c.created_at for c in calculations],
+            "updated_at": [c.updated_at for c in calculations],
+            "chunk_size": [c.input_data['chunked']['chunk_size'] if c.is_chunked else None for c in calculations],
+        },
+        schema=CALCULATION_SCHEMA,
+    )
+
+
+def iter_calculation_batches(
+    db,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Iterator[pa.RecordBatch]:
+    """
+    Stream calculations as Arrow record batches.
+
+    Args:
+        db (Session): The database session to read from.
+        batch_size (int): Number of rows per batch.
+        start (datetime, optional): Inclusive lower bound on ``created_at``.
+        end (datetime, optional): Exclusive upper bound on ``created_at``.
+
+    Yields:
+        RecordBatch: Batches of at most ``batch_size`` rows.
+    """
+    query = db.query(Calculation)
+    if start is not None:
+        query = query.filter(Calculation.created_at >= start)
+    if end is not None:
+        query = query.filter(Calculation.created_at < end)
+    query = query.order_by(Calculation.created_at, Calculation.id).yield_per(batch_size)
+
+    pending: List[Calculation] = []
+    for calculation in query:
+        pending.append(calculation)
+        if len(pending) >= batch_size:
+            yield _to_batch(db, pending)
+            pending = []
+    if pending:
+        yield _to_batch(db, pending)
+
+
+def export_calculations(
+    db,
+    path: str,
+    format: str = "parquet",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> int:
+    """
+    Export calculations to a Parquet or Arrow IPC file.
+
+    Each batch becomes one Parquet row group or one IPC record batch.
+
+    Args:
+        db (Session): The database session to read from.
+        path (str): Destination file path.
+        format (str): Either ``"parquet"`` or ``"arrow"``.
+        batch_size (int): Number of rows per batch / row group.
+        start (datetime, optional): Inclusive lower bound on ``created_at``.
+        end (datetime, optional): Exclusive upper bound on ``created_at``.
+
+    Returns:
+        int: The number of rows written.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unsupported export format: {format}")
+
+    rows = 0
+    batches = iter_calculation_batches(db, batch_size=batch_size, start=start, end=end)
+    if format == "parquet":
+        with pq.ParquetWriter(path, CALCULATION_SCHEMA) as writer:
+            for batch in batches:
+                writer.write_batch(batch, row_group_size=batch_size)
+                rows += batch.num_rows
+    else:
+        with pa.OSFile(path, "wb") as sink, ipc.new_file(sink, CALCULATION_SCHEMA) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+                rows += batch.num_rows
+    return rows
+
+
+def split_time_range(start: datetime, end: datetime, parts: int) -> List[Tuple[datetime, datetime]]:
+    """Split ``[start, end)`` into ``parts`` contiguous, equally sized ranges."""
+    if parts < 1:
+        raise ValueError("parts must be at least 1")
+    if end <= start:
+        raise ValueError("end must be after start")
+    step = (end - start) / parts
+    bounds = [start + step * i for i in range(parts)] + [end]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def export_calculations_parallel(
+    session_factory,
+    path_template: str,
+    start: datetime,
+    end: datetime,
+    parts: int,
+    format: str = "parquet",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_workers: Optional[int] = None,
+) -> List[Tuple[str, int]]:
+    """
+    Export calculations in parallel, one file per time range.
+
+    Args:
+        session_factory (sessionmaker): Factory used to open one session per worker.
+        path_template (str): Destination path containing ``{part}``, e.g. ``"calcs-{part}.parquet"``.
+        start (datetime): Inclusive lower bound on ``created_at``.
+        end (datetime): Exclusive upper bound on ``created_at``.
+        parts (int): Number of time ranges (and files) to produce.
+        format (str): Either ``"parquet"`` or ``"arrow"``.
+        batch_size (int): Number of rows per batch / row group.
+        max_workers (int, optional): Thread pool size; defaults to ``parts``.
+
+    Returns:
+        list: ``(path, rows)`` for each part, in time order.
+    """
+    def export_part(part: int, bounds: Tuple[datetime, datetime]) -> Tuple[str, int]:
+        path = path_template.format(part=part)
+        db = session_factory()
+        try:
+            rows = export_calculations(db, path, format=format, batch_size=batch_size,
+                                       start=bounds[0], end=bounds[1])
+        finally:
+            db.close()
+        return path, rows
+
+    ranges = split_time_range(start, end, parts)
+    with ThreadPoolExecutor(max_workers=max_workers or parts) as executor:
+        futures = [executor.submit(export_part, i, bounds) for i, bounds in enumerate(ranges)]
+        return [future.result() for future in futures]
+
+
+def _iter_file_batches(path: str, format: str) -> Iterator[pa.RecordBatch]:
+    """Read record batches back from a Parquet or Arrow IPC file."""
+    if format == "parquet":
+        yield from pq.ParquetFile(path).iter_batches()
+    else:
+        with pa.memory_map(path, "r") as source:
+            reader = ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i)
+
+
+def _import_chunked(db, columns: dict, i: int, user_id: uuid.UUID, chunk_size: int) -> None:
+    """Insert one exported chunked calculation, storing its inputs as chunks again."""
+    calculation = Calculation.create(columns["type"][i], user_id, [])
+    calculation.id = uuid.UUID(columns["id"][i])
+    calculation.created_at = columns["created_at"][i]
+    db.add(calculation)
+    store_chunks(db, calculation, columns["inputs"][i], chunk_size=chunk_size)
+    calculation.result = calculation.result_or_none()
+    calculation.updated_at = columns["updated_at"][i]  # store_chunks' flush bumped it
+    db.flush()
+
+
+def import_calculations(db, path: str, format: str = "parquet") -> int:
+    """
+    Bulk-import calculations from a file written by ``export_calculations``.
+
+    Inline rows are inserted with one multi-row INSERT per batch; rows with a
+    ``chunk_size`` are inserted one by one and their inputs stored as chunks.
+    The ``result`` column of the file is ignored: each row's stored result is
+    recomputed from its inputs. The caller is responsible for committing.
+
+    Args:
+        db (Session): The database session to write to.
+        path (str): Source file path.
+        format (str): Either ``"parquet"`` or ``"arrow"``.
+
+    Returns:
+        int: The number of rows inserted.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unsupported import format: {format}")
+
+    table = Calculation.__table__
+    rows = 0
+    for batch in _iter_file_batches(path, format):
+        columns = batch.to_pydict()
+        chunk_sizes = columns.get("chunk_size") or [None] * batch.num_rows  # absent in older files
+        values = []
+        for i in range(batch.num_rows):
+            user_id = uuid.UUID(columns["user_id"][i])
+            if chunk_sizes[i] is not None:
+                _import_chunked(db, columns, i, user_id, chunk_sizes[i])
+                rows += 1
+                continue
+            calculation = Calculation.create(columns["type"][i], user_id, columns["inputs"][i])
+            values.append({
+                "id": uuid.UUID(columns["id"][i]),
+                "user_id": user_id,
+                "calculation_type": calculation.calculation_type,
+                "input_data": calculation.input_data,
+                "result": calculation.result,
+                "created_at": columns["created_at"][i],
+                "updated_at": columns["updated_at"][i],
+            })
+        if values:
+            db.execute(insert(table), values)
+            rows += len(values)
+    return rows
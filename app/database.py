@@ -5,6 +5,7 @@ from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.exc import SQLAlchemyError
 
 from .config import settings
+from .monitoring.sql import instrument_engine
 
 def get_engine(database_url: str = settings.DATABASE_URL):
     """
@@ -17,9 +18,10 @@ def get_engine(database_url: str = settings.DATABASE_URL):
         Engine: A new SQLAlchemy Engine instance.
     """
     try:
-        # Create an engine instance with echo=True to log SQL queries (useful for learning)
-        engine = create_engine(database_url, echo=True)
-        return engine
+        # Set SQL_ECHO to log every SQL query (useful for learning)
+        engine = create_engine(database_url, echo=settings.SQL_ECHO)
+        # Time every statement for request timing and other monitoring
+        return instrument_engine(engine)
     except SQLAlchemyError as e:
         print(f"Error creating engine: {e}")
         raise
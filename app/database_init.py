@@ -1,11 +1,42 @@
+from sqlalchemy import text
+
 from app.database import engine
 from app.models.user import Base
 
+# create_all only creates missing tables; these bring tables created by an
+# earlier release up to date. Each statement is idempotent and runs on every init_db.
+UPGRADE_STATEMENTS = [
+    "CREATE INDEX IF NOT EXISTS ix_revoked_tokens_revoked_at ON revoked_tokens (revoked_at)",
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1",
+    # Existing product partials are plain floats, i.e. exponent 0.
+    "ALTER TABLE calculation_chunks ADD COLUMN IF NOT EXISTS partial_exp INTEGER NOT NULL DEFAULT 0",
+    # calculations.result, backfilled once with calculation_result() (created by create_all).
+    # Chunked rows stay NULL here; Calculation.refresh_result() fills them in.
+    """
+    DO $$ BEGIN
+        IF NOT EXISTS (SELECT 1 FROM information_schema.columns
+                       WHERE table_schema = current_schema() AND table_name = 'calculations'
+                         AND column_name = 'result') THEN
+            ALTER TABLE calculations ADD COLUMN result double precision;
+            UPDATE calculations SET result = calculation_result(calculation_type, input_data);
+        END IF;
+    END $$
+    """,
+]
+
+def upgrade_db(connection=None):
+    if connection is None:
+        with engine.begin() as connection:
+            return upgrade_db(connection)
+    for statement in UPGRADE_STATEMENTS:
+        connection.execute(text(statement))
+
 def init_db():
     Base.metadata.create_all(bind=engine)
+    upgrade_db()
 
 def drop_db():
     Base.metadata.drop_all(bind=engine)
 
 if __name__ == "__main__":
-    init_db() # pragma: no cover
\ No newline at end of file
+    init_db() # pragma: no cover
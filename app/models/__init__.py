@@ -3,5 +3,8 @@
 from app.database import Base
 from app.models.user import User
 from app.models.calculation import Calculation, Addition, Subtraction, Multiplication, Division
+from app.models.calculation_chunk import CalculationChunk
+from app.models.revoked_token import RevokedToken
 
-__all__ = ['Base', 'User', 'Calculation', 'Addition', 'Subtraction', 'Multiplication', 'Division']
\ No newline at end of file
+__all__ = ['Base', 'User', 'Calculation', 'Addition', 'Subtraction', 'Multiplication', 'Division', 'CalculationChunk',
+           'RevokedToken']
\ No newline at end of file
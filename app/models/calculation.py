@@ -2,15 +2,86 @@
 
 from abc import ABC, abstractmethod
 from datetime import datetime
+from typing import Optional
 import uuid
 
-from sqlalchemy import Column, String, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, DDL, Float, case, event, func
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
-from sqlalchemy.orm import relationship, declarative_mixin, declared_attr
+from sqlalchemy.orm import relationship, declarative_mixin, declared_attr, object_session
+from sqlalchemy.orm.attributes import flag_modified
 from sqlalchemy.orm import DeclarativeMeta
 from abc import ABCMeta
 
 from app.database import Base  # Import the EXISTING Base
+from app.schemas.calculation import CalculationUpdate
+from app.models.calculation_chunk import DEFAULT_CHUNK_SIZE, chunked_result, store_chunks
+from app.monitoring.metrics import record_operation, record_operation_error
+from app.monitoring.tracing import tracer
+from app.operations import DivisionByZeroError
+
+# SQL-side evaluation of a calculation, mirroring the get_result() implementations
+# below so results can be computed (and aggregated) inside Postgres. Missing inputs
+# count as an empty list, as in Calculation.inputs. Returns NULL wherever get_result()
+# would raise (bad inputs, too few inputs, division by zero). Chunked calculations
+# are excluded (NULL) because their inputs are not in input_data;
+# Calculation.result_expression() uses their stored result instead.
+CALCULATION_RESULT_FUNCTION = DDL("""
+CREATE OR REPLACE FUNCTION calculation_result(calc_type text, data json)
+RETURNS double precision
+LANGUAGE plpgsql IMMUTABLE PARALLEL SAFE AS $$
+DECLARE
+    inputs json := coalesce(data -> 'inputs', '[]'::json);
+    item json;
+    value double precision;
+    acc double precision;
+    n integer := 0;
+BEGIN
+    IF data -> 'chunked' IS NOT NULL OR json_typeof(inputs) <> 'array' THEN
+        RETURN NULL;
+    END IF;
+    FOR item IN SELECT json_array_elements(inputs) LOOP
+        IF json_typeof(item) <> 'number' THEN
+            RETURN NULL;
+        END IF;
+        value := item::text::double precision;
+        n := n + 1;
+        IF n = 1 AND calc_type IN ('subtraction', 'division') THEN
+            acc := value;
+        ELSIF calc_type = 'addition' THEN
+            acc := coalesce(acc, 0) + value;
+        ELSIF calc_type = 'multiplication' THEN
+            acc := coalesce(acc, 1) * value;
+        ELSIF calc_type = 'subtraction' THEN
+            acc := acc - value;
+        ELSIF calc_type = 'division' THEN
+            IF value = 0 THEN
+                RETURN NULL;
+            END IF;
+            acc := acc / value;
+        ELSE
+            RETURN NULL;
+        END IF;
+    END LOOP;
+    IF calc_type = 'addition' THEN
+        RETURN coalesce(acc, 0);
+    ELSIF calc_type = 'multiplication' THEN
+        RETURN coalesce(acc, 1);
+    ELSIF n < 2 THEN
+        RETURN NULL;
+    END IF;
+    RETURN acc;
+END;
+$$
+""")
+
+# Hooked on the metadata (not the table) so the function is (re)created on every
+# create_all(), including against databases where the table already exists.
+event.listen(Base.metadata, "after_create", CALCULATION_RESULT_FUNCTION.execute_if(dialect="postgresql"))
+event.listen(
+    Base.metadata,
+    "after_drop",
+    DDL("DROP FUNCTION IF EXISTS calculation_result(text, json)").execute_if(dialect="postgresql"),
+)
 
 # Create a combined metaclass
 class CombinedMeta(DeclarativeMeta, ABCMeta):
@@ -24,8 +95,17 @@ class Calculation(Base, metaclass=CombinedMeta):
     input_data = Column(JSON, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    # Set on create() and kept current by apply_update(); None when the inputs cannot be evaluated.
+    result = Column(Float, nullable=True)
 
     user = relationship("User", back_populates="calculations")
+    chunks = relationship(
+        "CalculationChunk",
+        lazy="dynamic",
+        order_by="CalculationChunk.seq",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
     
     __mapper_args__ = { 
         'polymorphic_on': calculation_type,
@@ -46,13 +126,137 @@ class Calculation(Base, metaclass=CombinedMeta):
         
         if not calculation_class:
             raise ValueError(f"Unsupported calculation type: {calculation_type}")
-        return calculation_class(user_id=user_id, input_data={'inputs': inputs})
+        # Copied so apply_update() can extend the stored list in place without touching the caller's
+        calculation = calculation_class(user_id=user_id, input_data={'inputs': list(inputs)})
+        calculation.result = calculation.result_or_none()
+        return calculation
     
+    @classmethod
+    def create_chunked(cls, db, calculation_type: str, user_id: uuid.UUID, inputs,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE) -> 'Calculation':
+        """Create and flush a calculation whose inputs are stored as packed chunks."""
+        calculation = cls.create(calculation_type, user_id, [])
+        db.add(calculation)
+        store_chunks(db, calculation, inputs, chunk_size=chunk_size)
+        calculation.result = calculation.result_or_none()
+        return calculation
+
+    @classmethod
+    def result_expression(cls):
+        """
+        SQL expression evaluating the calculation inside the database (NULL if invalid).
+
+        Chunked calculations keep their inputs in calculation_chunks, out of reach
+        of calculation_result(), so their stored ``result`` is used instead.
+        """
+        return case(
+            (cls.input_data['chunked'].is_not(None), cls.result),
+            else_=func.calculation_result(cls.calculation_type, cls.input_data, type_=Float),
+        )
+
+    @classmethod
+    def query_results(cls, db, *criteria) -> list[tuple[uuid.UUID, Optional[float]]]:
+        """Return ``(id, result)`` for every calculation matching ``criteria`` in one statement."""
+        return db.query(cls.id, cls.result_expression()).filter(*criteria).all()
+
+    @classmethod
+    def daily_result_totals(cls, db, *criteria) -> list[tuple[uuid.UUID, datetime, float]]:
+        """Return ``(user_id, day, sum of results)`` aggregated inside the database."""
+        day = func.date_trunc('day', cls.created_at).label('day')
+        return (
+            db.query(cls.user_id, day, func.sum(cls.result_expression()))
+            .filter(*criteria)
+            .group_by(cls.user_id, day)
+            .order_by(cls.user_id, day)
+            .all()
+        )
+
     @abstractmethod
     def get_result(self) -> float:
         """Abstract method to compute the result of the calculation."""
         raise NotImplementedError
     
+    @abstractmethod
+    def accumulate(self, result: float, values: list[float]) -> float:
+        """Fold ``values`` into a previous result, as if they had been appended to the inputs."""
+        raise NotImplementedError
+
+    def result_or_none(self) -> Optional[float]:
+        """Compute the result, or None when the inputs cannot be evaluated."""
+        try:
+            return self.get_result()
+        except (ValueError, TypeError):
+            return None
+
+    def refresh_result(self) -> Optional[float]:
+        """Recompute the result from all inputs and store it (None if it cannot be computed)."""
+        record_operation(self.calculation_type, self.input_count)
+        try:
+            self.result = self.get_result()
+        except ValueError as e:
+            record_operation_error(self.calculation_type, e)
+            self.result = None
+        return self.result
+
+    def apply_update(self, update: CalculationUpdate) -> Optional[float]:
+        """
+        Apply a CalculationUpdate and keep the stored result current.
+
+        Appends extend the stored input list in place and fold only the new
+        values into the stored result, so the Python-side work is O(len(append));
+        the UPDATE still writes the whole ``input_data`` JSON. Replacing or
+        patching inputs recomputes the result from scratch.
+        """
+        if self.is_chunked:
+            raise ValueError("Chunked calculations must be updated with replace_chunk().")
+        if not isinstance(self.inputs, list):
+            raise ValueError("Inputs must be a list of numbers.")
+
+        if update.append is not None:
+            previous = self.result
+            self.input_data.setdefault('inputs', []).extend(update.append)
+            flag_modified(self, 'input_data')
+            if previous is None:
+                return self.refresh_result()
+            record_operation(self.calculation_type, self.input_count)
+            try:
+                self.result = self.accumulate(previous, update.append)
+            except ValueError as e:
+                record_operation_error(self.calculation_type, e)
+                self.result = None
+            return self.result
+
+        if update.patch is not None:
+            inputs = list(self.inputs)
+            for index, value in update.patch.items():
+                if not 0 <= index < len(inputs):
+                    raise ValueError(f"Patch index {index} is out of range.")
+                inputs[index] = value
+            self.input_data = {**self.input_data, 'inputs': inputs}
+            return self.refresh_result()
+
+        if update.inputs is not None:
+            self.input_data = {**self.input_data, 'inputs': list(update.inputs)}
+            return self.refresh_result()
+
+        return self.result
+
+    @property
+    def is_chunked(self) -> bool:
+        """Whether the inputs are stored in calculation_chunks instead of input_data."""
+        return bool(self.input_data) and 'chunked' in self.input_data
+
+    def chunked_result(self) -> float:
+        """Compute the result of a chunked calculation from its stored chunks."""
+        return chunked_result(object_session(self), self)
+
+    @property
+    def input_count(self) -> int:
+        """Number of inputs, including those stored in chunks."""
+        if self.is_chunked:
+            return self.input_data['chunked']['count']
+        return len(self.inputs) if isinstance(self.inputs, list) else 0
+
     @property
     def inputs(self):
         """Get inputs from input_data JSON."""
@@ -65,16 +269,25 @@ class Calculation(Base, metaclass=CombinedMeta):
 class Addition(Calculation):
     __mapper_args__ = {'polymorphic_identity': 'addition'}
     
+    @tracer.traced()
     def get_result(self) -> float:
+        if self.is_chunked:
+            return self.chunked_result()
         if not isinstance(self.inputs, list):
             raise ValueError("Inputs must be a list of numbers.")
         return sum(self.inputs)
 
+    def accumulate(self, result: float, values: list[float]) -> float:
+        return sum(values, result)
+
 
 class Subtraction(Calculation):
     __mapper_args__ = {'polymorphic_identity': 'subtraction'}
     
+    @tracer.traced()
     def get_result(self) -> float:
+        if self.is_chunked:
+            return self.chunked_result()
         if not isinstance(self.inputs, list) or len(self.inputs) < 2:
             raise ValueError("Inputs must be a list of at least two numbers.")
         result = self.inputs[0]
@@ -82,11 +295,19 @@ class Subtraction(Calculation):
             result -= num
         return result
 
+    def accumulate(self, result: float, values: list[float]) -> float:
+        for num in values:
+            result -= num
+        return result
+
 
 class Multiplication(Calculation):
     __mapper_args__ = {'polymorphic_identity': 'multiplication'}
     
+    @tracer.traced()
     def get_result(self) -> float:
+        if self.is_chunked:
+            return self.chunked_result()
         if not isinstance(self.inputs, list):
             raise ValueError("Multiplication inputs must be a list of numbers.")
         result = 1
@@ -94,16 +315,31 @@ class Multiplication(Calculation):
             result *= num
         return result
 
+    def accumulate(self, result: float, values: list[float]) -> float:
+        for num in values:
+            result *= num
+        return result
+
 
 class Division(Calculation):
     __mapper_args__ = {'polymorphic_identity': 'division'}
     
+    @tracer.traced()
     def get_result(self) -> float:
+        if self.is_chunked:
+            return self.chunked_result()
         if not isinstance(self.inputs, list) or len(self.inputs) < 2:
             raise ValueError("Division inputs must be a list of at least two numbers.")
         result = self.inputs[0]
         for num in self.inputs[1:]:
             if num == 0:
-                raise ValueError("Division by zero is not allowed.")
+                raise DivisionByZeroError("Division by zero is not allowed.")
             result /= num
-        return result
\ No newline at end of file
+        return result
+
+    def accumulate(self, result: float, values: list[float]) -> float:
+        for num in values:
+            if num == 0:
+                raise DivisionByZeroError("Division by zero is not allowed.")
+            result /= num
+        return result
@@ -0,0 +1,302 @@
+# app/models/calculation_chunk.py
+
+"""
+Chunked storage for calculations with very large input vectors.
+
+Instead of a single ``input_data`` JSON list, the inputs of a chunked calculation
+live in ``calculation_chunks`` as fixed-size blocks of packed little-endian
+float64 values. Each chunk also stores a ``partial`` reduction of its values
+(sum for addition/subtraction, product for multiplication/division), so a
+result can be computed by streaming one float per chunk, and editing one chunk
+only requires recomputing that chunk's partial. Products are kept as a
+``math.frexp`` mantissa (``partial``) and binary exponent (``partial_exp``) so
+that long runs of very small or very large factors cannot underflow to 0 or
+overflow to inf before the final result is formed. Functions that change
+partials also refresh the calculation's stored ``result``.
+
+For subtraction and division the first input is the starting value rather than
+an operand; it is kept in ``input_data['chunked']['head']`` and excluded from
+chunk 0's partial.
+"""
+
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+import math
+import sys
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Column, Integer, Float, Boolean, LargeBinary, ForeignKey, insert
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.orm.attributes import flag_modified, set_committed_value
+
+from app.database import Base
+from app.operations import DivisionByZeroError
+
+DEFAULT_CHUNK_SIZE = 65_536
+
+# Calculation types whose first input is the starting value instead of an operand.
+HEAD_TYPES = ('subtraction', 'division')
+
+
+class CalculationChunk(Base):
+    __tablename__ = 'calculation_chunks'
+
+    calculation_id = Column(PGUUID(as_uuid=True), ForeignKey('calculations.id', ondelete='CASCADE'), primary_key=True)
+    seq = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    partial = Column(Float, nullable=False)
+    partial_exp = Column(Integer, default=0, server_default="0", nullable=False)  # products: partial * 2**partial_exp
+    has_zero = Column(Boolean, default=False, nullable=False)
+
+    @staticmethod
+    def pack(values: Iterable[float]) -> bytes:
+        """Pack values as little-endian float64."""
+        packed = array('d', values)
+        if sys.byteorder != 'little':
+            packed.byteswap()  # pragma: no cover
+        return packed.tobytes()
+
+    @staticmethod
+    def unpack(data: bytes) -> array:
+        """Unpack little-endian float64 values."""
+        values = array('d')
+        values.frombytes(data)
+        if sys.byteorder != 'little':
+            values.byteswap()  # pragma: no cover
+        return values
+
+    @property
+    def values(self) -> array:
+        """The chunk's inputs."""
+        return self.unpack(self.data)
+
+    def __repr__(self):
+        return f"<CalculationChunk(calculation_id={self.calculation_id}, seq={self.seq}, count={self.count})>"
+
+
+def _product(factors: Iterable[Tuple[float, int]]) -> Tuple[float, int]:
+    """Multiply ``(mantissa, exponent)`` factors, renormalizing after each step."""
+    mantissa, exponent = 1.0, 0
+    for factor, factor_exp in factors:
+        mantissa, shift = math.frexp(mantissa * factor)
+        exponent += shift + factor_exp
+    return mantissa, exponent
+
+
+def _ldexp(mantissa: float, exponent: int) -> float:
+    """``mantissa * 2**exponent``, saturating to inf like float arithmetic does."""
+    try:
+        return math.ldexp(mantissa, exponent)
+    except OverflowError:
+        return math.copysign(math.inf, mantissa)
+
+
+def _partial(calculation_type: str, operands) -> Tuple[float, int, bool]:
+    """Reduce one chunk's operands with the type's combining operation."""
+    if calculation_type in ('addition', 'subtraction'):
+        return float(sum(operands)), 0, False
+    if calculation_type in ('multiplication', 'division'):
+        mantissa, exponent = _product((value, 0) for value in operands)
+        return mantissa, exponent, 0.0 in operands
+    raise ValueError(f"Unsupported calculation type: {calculation_type}")
+
+
+def _chunk_row(calculation, seq: int, values: array) -> dict:
+    """Build the row for one chunk, excluding the head value from chunk 0's partial."""
+    operands = values[1:] if seq == 0 and calculation.calculation_type in HEAD_TYPES else values
+    partial, partial_exp, has_zero = _partial(calculation.calculation_type, operands)
+    return {
+        'calculation_id': calculation.id,
+        'seq': seq,
+        'count': len(values),
+        'data': CalculationChunk.pack(values),
+        'partial': partial,
+        'partial_exp': partial_exp,
+        'has_zero': has_zero,
+    }
+
+
+def store_chunks(db, calculation, inputs: Iterable[float], chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+    """
+    Store ``inputs`` for a calculation as packed chunks.
+
+    ``inputs`` is consumed lazily, so at most one chunk is held in memory at a
+    time. The calculation is flushed first so its id exists.
+
+    Args:
+        db (Session): The database session to write with.
+        calculation (Calculation): The calculation that owns the chunks.
+        inputs (Iterable[float]): The input values, in order.
+        chunk_size (int): Number of values per chunk.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    db.flush()
+
+    iterator = iter(inputs)
+    table = CalculationChunk.__table__
+    head: Optional[float] = None
+    count = 0
+    seq = 0
+    while True:
+        values = array('d', islice(iterator, chunk_size))
+        if not values:
+            break
+        if seq == 0:
+            head = values[0]
+        db.execute(insert(table), [_chunk_row(calculation, seq, values)])
+        count += len(values)
+        seq += 1
+
+    calculation.input_data = {
+        'inputs': [],
+        'chunked': {'count': count, 'chunks': seq, 'chunk_size': chunk_size, 'head': head},
+    }
+    db.flush()
+
+
+def iter_chunk_values(db, calculation_id) -> Iterator[array]:
+    """Stream a chunked calculation's inputs one chunk at a time."""
+    query = (
+        db.query(CalculationChunk.data)
+        .filter(CalculationChunk.calculation_id == calculation_id)
+        .order_by(CalculationChunk.seq)
+        .yield_per(1)
+    )
+    for (data,) in query:
+        yield CalculationChunk.unpack(data)
+
+
+def chunked_result(db, calculation) -> float:
+    """
+    Compute a chunked calculation's result from the per-chunk partials.
+
+    Only one ``(partial, partial_exp, has_zero)`` row per chunk is read, so
+    memory use is independent of the number of inputs. Products are combined
+    as mantissa and exponent, so division by a product of tiny divisors gives
+    inf, as the inline calculation does, instead of dividing by an underflowed 0.
+    """
+    meta = calculation.input_data['chunked']
+    calculation_type = calculation.calculation_type
+    count = meta['count']
+
+    if calculation_type in HEAD_TYPES and count < 2:
+        raise ValueError(f"{calculation_type.capitalize()} inputs must be a list of at least two numbers.")
+
+    query = (
+        db.query(CalculationChunk.partial, CalculationChunk.partial_exp, CalculationChunk.has_zero)
+        .filter(CalculationChunk.calculation_id == calculation.id)
+        .order_by(CalculationChunk.seq)
+    )
+    if calculation_type == 'addition':
+        return sum(partial for partial, _, _ in query)
+    if calculation_type == 'multiplication':
+        return _ldexp(*_product((partial, partial_exp) for partial, partial_exp, _ in query))
+    if calculation_type == 'subtraction':
+        return meta['head'] - sum(partial for partial, _, _ in query)
+    if calculation_type == 'division':
+        factors = []
+        for partial, partial_exp, has_zero in query:
+            if has_zero:
+                raise DivisionByZeroError("Division by zero is not allowed.")
+            factors.append((partial, partial_exp))
+        divisor, divisor_exp = _product(factors)
+        head, head_exp = math.frexp(meta['head'])
+        try:
+            return _ldexp(head / divisor, head_exp - divisor_exp)
+        except ZeroDivisionError:  # only reachable through corrupted partials
+            raise DivisionByZeroError("Division by zero is not allowed.")
+    raise ValueError(f"Unsupported calculation type: {calculation_type}")
+
+
+def replace_chunk(db, calculation, seq: int, values: List[float]) -> None:
+    """
+    Replace the values of one chunk, recompute only that chunk's partial and
+    refresh the calculation's stored result.
+
+    Args:
+        db (Session): The database session to write with.
+        calculation (Calculation): The chunked calculation.
+        seq (int): The chunk to replace.
+        values (List[float]): The new values for the chunk; must not be empty.
+    """
+    if not values:
+        raise ValueError("A chunk must contain at least one value")
+    chunk = db.get(CalculationChunk, (calculation.id, seq))
+    if chunk is None:
+        raise ValueError(f"Chunk {seq} does not exist")
+
+    row = _chunk_row(calculation, seq, array('d', values))
+    meta = dict(calculation.input_data['chunked'])
+    meta['count'] += row['count'] - chunk.count
+    if seq == 0:
+        meta['head'] = values[0]
+    for key in ('count', 'data', 'partial', 'partial_exp', 'has_zero'):
+        setattr(chunk, key, row[key])
+
+    calculation.input_data = {**calculation.input_data, 'chunked': meta}
+    flag_modified(calculation, 'input_data')
+    db.flush()
+    calculation.result = calculation.result_or_none()
+    db.flush()
+
+
+def recompute_partials(session_factory, calculation, max_workers: int = 4) -> int:
+    """
+    Recompute every chunk's partial from its stored data, in parallel.
+
+    The chunk range is split across ``max_workers`` threads, each reading and
+    updating its own slice through its own session, so database reads overlap.
+    The calculation's stored result is then recomputed and committed through
+    one more session. Useful after loading chunk data by other means or to
+    repair partials.
+
+    Args:
+        session_factory (sessionmaker): Factory used to open one session per worker.
+        calculation (Calculation): The chunked calculation.
+        max_workers (int): Number of parallel workers.
+
+    Returns:
+        int: The number of chunks recomputed.
+    """
+    chunks = calculation.input_data['chunked']['chunks']
+    step = max(1, math.ceil(chunks / max_workers))
+    ranges = [(start, min(start + step, chunks)) for start in range(0, chunks, step)]
+
+    def recompute(bounds: Tuple[int, int]) -> int:
+        db = session_factory()
+        try:
+            rows = (
+                db.query(CalculationChunk)
+                .filter(
+                    CalculationChunk.calculation_id == calculation.id,
+                    CalculationChunk.seq >= bounds[0],
+                    CalculationChunk.seq < bounds[1],
+                )
+                .all()
+            )
+            for chunk in rows:
+                row = _chunk_row(calculation, chunk.seq, chunk.values)
+                chunk.partial = row['partial']
+                chunk.partial_exp = row['partial_exp']
+                chunk.has_zero = row['has_zero']
+            db.commit()
+            return len(rows)
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        recomputed = sum(executor.map(recompute, ranges))
+
+    db = session_factory()
+    try:
+        stored = db.get(type(calculation), calculation.id)
+        result = stored.result = stored.result_or_none()
+        db.commit()
+    finally:
+        db.close()
+    set_committed_value(calculation, 'result', result)
+    return recomputed
+
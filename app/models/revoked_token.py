@@ -0,0 +1,25 @@
+# app/models/revoked_token.py
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, String
+
+from app.database import Base
+
+
+class RevokedToken(Base):
+    """
+    Authoritative list of revoked access tokens, keyed by their ``jti`` claim.
+
+    Workers follow new revocations by ``revoked_at``, which is stamped with the
+    database clock so every worker compares against the same time source.
+    """
+    __tablename__ = 'revoked_tokens'
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    jti = Column(String(64), unique=True, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<RevokedToken(jti={self.jti}, expires_at={self.expires_at})>"
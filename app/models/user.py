@@ -1,30 +1,46 @@
 # app/models/user.py
 from datetime import datetime, timedelta
+import hashlib
+import time
 import uuid
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
-from sqlalchemy import Column, String, DateTime, Boolean
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, Boolean, Integer, event, inspect
+from sqlalchemy.dialects.postgresql import UUID, insert as pg_insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import relationship
-from passlib.context import CryptContext
+from sqlalchemy.orm.attributes import set_committed_value
 from jose import JWTError, jwt
 from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
 
+from app.auth.last_login import last_login_recorder
+from app.auth.passwords import pwd_context, password_service
+from app.auth.rate_limit import login_limiter
+from app.cache import TTLCache
+from app.config import settings
 from app.database import Base  # ✅ IMPORT Base instead of creating it
+from app.monitoring.metrics import register_cache
 from app.schemas.base import UserCreate
 from app.schemas.user import UserResponse, Token
 
 # REMOVE THIS LINE:
 # Base = declarative_base()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # Move to config
 SECRET_KEY = "your-secret-key"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# User fields embedded in claims tokens; changing one makes older claims stale.
+CLAIM_FIELDS = ("username", "email", "first_name", "last_name", "is_active", "is_verified")
+
+# Decoded claims keyed by the SHA-256 of the token (never the raw token), each entry
+# expiring at the token's own "exp" so a cached token is never accepted for longer
+# than jwt.decode would accept it.
+token_cache = TTLCache(max_size=settings.TOKEN_CACHE_SIZE, clock=time.time)
+register_cache("token", token_cache)
+
 class User(Base):
     __tablename__ = 'users'
 
@@ -39,6 +55,8 @@ class User(Base):
     last_login = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    # Incremented when a field embedded in self-contained tokens changes (see CLAIM_FIELDS)
+    version = Column(Integer, default=1, server_default="1", nullable=False)
     
     calculations = relationship("Calculation", back_populates="user", lazy="dynamic")
 
@@ -56,83 +74,203 @@ class User(Base):
         return pwd_context.verify(plain_password, self.password)
 
     @staticmethod
-    def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-        """Create a JWT access token."""
+    def create_access_token(data: dict, expires_delta: Optional[timedelta] = None,
+                            embed_user: Optional["User"] = None) -> str:
+        """
+        Create a JWT access token.
+
+        With ``embed_user``, the token also carries the user's UserResponse fields
+        ("usr") and row version ("ver"), so get_current_user can build the user
+        from the claims alone until CLAIMS_REVALIDATE_SECONDS have passed.
+        """
         to_encode = data.copy()
-        expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-        to_encode.update({"exp": expire})
+        now = datetime.utcnow()
+        expire = now + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+        to_encode.update({"exp": expire, "iat": now})
+        if embed_user is not None:
+            to_encode["usr"] = UserResponse.model_validate(embed_user).model_dump(mode="json")
+            to_encode["ver"] = embed_user.version
+        to_encode.setdefault("jti", uuid.uuid4().hex)  # lets the token be revoked
         return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+    @staticmethod
+    def decode_token(token: str) -> Optional[Dict[str, Any]]:
+        """Verify and decode a JWT token, returning its claims (cached; treat as read-only)."""
+        key = hashlib.sha256(token.encode()).digest()
+        claims = token_cache.get(key)
+        if claims is not None:
+            return claims
+        try:
+            claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            return None
+        if claims.get("exp") is not None:
+            token_cache.set(key, claims, expires_at=claims["exp"])
+        return claims
+
     @staticmethod
     def verify_token(token: str) -> Optional[UUID]:
         """Verify and decode a JWT token."""
+        claims = User.decode_token(token)
+        if claims is None:
+            return None
         try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            user_id = payload.get("sub")
+            user_id = claims.get("sub")
             return uuid.UUID(user_id) if user_id else None
-        except (JWTError, ValueError):
+        except (TypeError, ValueError):
             return None
 
     @classmethod
-    def register(cls, db, user_data: Dict[str, Any]) -> "User":
-        """Register a new user with validation."""
+    def _insert_ignoring_conflicts(cls):
+        """INSERT ... ON CONFLICT DO NOTHING RETURNING the new rows as User objects."""
+        return pg_insert(cls).on_conflict_do_nothing().returning(cls)
+
+    @staticmethod
+    def _row_from(user_create: UserCreate, hashed_password: str) -> Dict[str, Any]:
+        return {
+            "first_name": user_create.first_name,
+            "last_name": user_create.last_name,
+            "email": user_create.email,
+            "username": user_create.username,
+            "password": hashed_password,
+            "is_active": True,
+            "is_verified": False,
+        }
+
+    @classmethod
+    def _validated_registration(cls, user_data: Dict[str, Any]) -> UserCreate:
         try:
             # Validate password length first
             password = user_data.get('password', '')
             if len(password) < 6:  # Strictly less than 6 characters
                 raise ValueError("Password must be at least 6 characters long")
-            
-            # Check if email/username exists
-            existing_user = db.query(cls).filter(
-                (cls.email == user_data.get('email')) |
-                (cls.username == user_data.get('username'))
-            ).first()
-            
-            if existing_user:
-                raise ValueError("Username or email already exists")
 
             # Validate using Pydantic schema
-            user_create = UserCreate.model_validate(user_data)
-            
-            # Create new user instance
-            new_user = cls(
-                first_name=user_create.first_name,
-                last_name=user_create.last_name,
-                email=user_create.email,
-                username=user_create.username,
-                password=cls.hash_password(user_create.password),
-                is_active=True,
-                is_verified=False
-            )
-            
-            db.add(new_user)
-            db.flush()
-            return new_user
-            
+            return UserCreate.model_validate(user_data)
+
         except ValidationError as e:
             raise ValueError(str(e)) # pragma: no cover
-        except ValueError as e:
-            raise e
 
     @classmethod
-    def authenticate(cls, db, username: str, password: str) -> Optional[Dict[str, Any]]:
-        """Authenticate user and return token with user data."""
-        user = db.query(cls).filter(
+    def _insert_user(cls, db, row: Dict[str, Any]) -> "User":
+        # One round trip: the unique constraints on email/username decide
+        # conflicts atomically, so concurrent registrations cannot race.
+        new_user = db.scalars(cls._insert_ignoring_conflicts(), [row]).first()
+        if new_user is None:
+            raise ValueError("Username or email already exists")
+        return new_user
+
+    @classmethod
+    def register(cls, db, user_data: Dict[str, Any]) -> "User":
+        """Register a new user with validation."""
+        user_create = cls._validated_registration(user_data)
+        return cls._insert_user(db, cls._row_from(user_create, cls.hash_password(user_create.password)))
+
+    @classmethod
+    async def register_async(cls, db, user_data: Dict[str, Any]) -> "User":
+        """Like ``register``, hashing on the password service pool and inserting in a worker thread."""
+        user_create = cls._validated_registration(user_data)
+        hashed_password = await password_service.hash(user_create.password)
+        return await run_in_threadpool(cls._insert_user, db, cls._row_from(user_create, hashed_password))
+
+    @classmethod
+    def bulk_register(cls, db, users_data: List[Dict[str, Any]]) -> List["User"]:
+        """
+        Register many users at once.
+
+        Every record is validated up front, passwords are hashed in parallel on
+        the password service pool, and all rows go out in one multi-row
+        INSERT ... ON CONFLICT DO NOTHING. Records whose email or username is
+        already taken are skipped.
+
+        Returns:
+            List[User]: The users that were created.
+        """
+        validated = []
+        for index, user_data in enumerate(users_data):
+            try:
+                validated.append(UserCreate.model_validate(user_data))
+            except ValidationError as e:
+                raise ValueError(f"Invalid user at index {index}: {e}")
+
+        if not validated:
+            return []
+        hashes = password_service.hash_many(user_create.password for user_create in validated)
+        rows = [cls._row_from(user_create, hashed) for user_create, hashed in zip(validated, hashes)]
+        return list(db.scalars(cls._insert_ignoring_conflicts(), rows))
+
+    @classmethod
+    def _find_login(cls, db, username: str) -> Optional["User"]:
+        return db.query(cls).filter(
             (cls.username == username) | (cls.email == username)
         ).first()
 
-        if not user or not user.verify_password(password):
-            return None # pragma: no cover
+    @classmethod
+    def _complete_login(cls, db, user: "User", new_hash: Optional[str]) -> Dict[str, Any]:
+        """Save a rehash and the login time, and build the token response."""
+        if new_hash:
+            # The bcrypt cost changed since this hash was made; upgrade it on login
+            user.password = new_hash
 
-        user.last_login = datetime.utcnow()
-        db.commit()
+        now = datetime.utcnow()
+        if last_login_recorder.running:
+            # Batched write; keep the login itself read-only unless a rehash must be saved
+            last_login_recorder.record(user.id, now)
+            set_committed_value(user, 'last_login', now)
+            if new_hash:
+                db.commit()
+        else:
+            user.last_login = now
+            db.commit()
 
         # Create token response using Pydantic models
         user_response = UserResponse.model_validate(user)
         token_response = Token(
-            access_token=cls.create_access_token({"sub": str(user.id)}),
+            access_token=cls.create_access_token(
+                {"sub": str(user.id)},
+                embed_user=user if settings.CLAIMS_TOKENS else None,
+            ),
             token_type="bearer",
             user=user_response
         )
 
-        return token_response.model_dump()
\ No newline at end of file
+        return token_response.model_dump()
+
+    @classmethod
+    def authenticate(cls, db, username: str, password: str,
+                     client_ip: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Authenticate user and return token with user data."""
+        # Raises RateLimitExceeded before any query or bcrypt work
+        login_limiter.check(username, client_ip)
+
+        user = cls._find_login(db, username)
+        if not user:
+            return None # pragma: no cover
+
+        verified, new_hash = pwd_context.verify_and_update(password, user.password)
+        if not verified:
+            return None # pragma: no cover
+        return cls._complete_login(db, user, new_hash)
+
+    @classmethod
+    async def authenticate_async(cls, db, username: str, password: str,
+                                 client_ip: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Like ``authenticate``, verifying on the password service pool and querying in worker threads."""
+        login_limiter.check(username, client_ip)
+
+        user = await run_in_threadpool(cls._find_login, db, username)
+        if not user:
+            return None
+
+        verified, new_hash = await password_service.verify_and_update(password, user.password)
+        if not verified:
+            return None
+        return await run_in_threadpool(cls._complete_login, db, user, new_hash)
+
+
+@event.listens_for(User, "before_update")
+def _bump_version_on_claim_change(mapper, connection, target) -> None:
+    """Bump the row version only when claims built from the old row would be stale."""
+    attrs = inspect(target).attrs
+    if any(attrs[field].history.has_changes() for field in CLAIM_FIELDS):
+        target.version = (target.version or 0) + 1
@@ -0,0 +1 @@
+# app/monitoring/__init__.py
@@ -0,0 +1,159 @@
+# app/monitoring/admin.py
+
+"""
+Admin-only diagnostics endpoints.
+
+Every route on ``router`` requires the ``X-Admin-Token`` header to match
+``ADMIN_TOKEN``. When no token is configured the endpoints do not exist as far
+as clients can tell (404).
+"""
+
+import asyncio
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.monitoring.memory import memory_tracker
+from app.monitoring.profiler import ProfilerBusy, StackSampler, recent_profiles
+from app.monitoring.slow_queries import slow_query_log
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Whether ``token`` matches the configured admin token."""
+    return bool(settings.ADMIN_TOKEN) and token is not None and hmac.compare_digest(token, settings.ADMIN_TOKEN)
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    """Dependency that rejects requests without the admin token."""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def folded_response(stacks: str, filename: str) -> PlainTextResponse:
+    """Return collapsed stacks as a downloadable, flamegraph-ready file."""
+    return PlainTextResponse(stacks, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)],
+                   include_in_schema=False)
+
+
+@router.get("/slow-queries")
+async def slow_queries():
+    """
+    List recent slow statements with their plans, newest first.
+    """
+    return {
+        "threshold_ms": slow_query_log.threshold_ms,
+        "queries": slow_query_log.snapshot(),
+    }
+
+
+@router.delete("/slow-queries", status_code=204)
+async def clear_slow_queries():
+    """
+    Empty the slow-query log.
+    """
+    slow_query_log.clear()
+
+
+@router.get("/profile")
+async def profile(seconds: float = Query(5.0, gt=0, le=settings.PROFILE_MAX_SECONDS),
+                  interval_ms: float = Query(settings.PROFILE_INTERVAL_MS, ge=1, le=1000)):
+    """
+    Sample every thread of this worker for ``seconds`` and return collapsed stacks.
+    """
+    try:
+        sampler = StackSampler(interval=interval_ms / 1000).start()
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        sampler.stop()
+    return folded_response(sampler.collapsed(), "profile.folded")
+
+
+@router.get("/profiles/{profile_id}")
+async def request_profile(profile_id: str):
+    """
+    Return the collapsed stacks of a request profiled with the X-Profile header.
+    """
+    stacks = recent_profiles.get(profile_id)
+    if stacks is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return folded_response(stacks, f"{profile_id}.folded")
+
+
+@router.get("/memory")
+async def memory_status():
+    """
+    Report whether tracemalloc is on, traced memory, and the stored snapshots.
+    """
+    return memory_tracker.status()
+
+
+@router.post("/memory/start")
+async def start_memory_tracing(frames: int = Query(settings.MEMORY_TRACE_FRAMES, ge=1, le=64)):
+    """
+    Start tracemalloc with ``frames`` frames per allocation.
+    """
+    memory_tracker.start(frames)
+    return memory_tracker.status()
+
+
+@router.post("/memory/stop")
+async def stop_memory_tracing():
+    """
+    Stop tracemalloc and drop all snapshots.
+    """
+    memory_tracker.stop()
+    return memory_tracker.status()
+
+
+@router.post("/memory/snapshots", status_code=201)
+async def take_memory_snapshot():
+    """
+    Take a tracemalloc snapshot.
+    """
+    try:
+        snapshot_id = await run_in_threadpool(memory_tracker.take_snapshot)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"id": snapshot_id, **memory_tracker.status()}
+
+
+@router.get("/memory/snapshots/{snapshot_id}")
+async def memory_snapshot_top(snapshot_id: str, limit: int = Query(20, ge=1, le=500),
+                              group_by: str = "lineno", app_only: bool = True):
+    """
+    List the top allocation sites of a snapshot.
+    """
+    try:
+        sites = await run_in_threadpool(memory_tracker.top, snapshot_id, limit, group_by, app_only)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"id": snapshot_id, "sites": sites}
+
+
+@router.get("/memory/diff")
+async def memory_snapshot_diff(base: str, current: str, limit: int = Query(20, ge=1, le=500),
+                               group_by: str = "lineno", app_only: bool = True):
+    """
+    List the allocation sites that grew the most between two snapshots.
+    """
+    try:
+        sites = await run_in_threadpool(memory_tracker.diff, base, current, limit, group_by, app_only)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"base": base, "current": current, "sites": sites}
@@ -0,0 +1,140 @@
+# app/monitoring/health.py
+
+"""
+Liveness, readiness and start-up warm-up.
+
+``/health`` only says the process is serving requests. ``/ready`` also
+requires the warm-up to have finished and the database to answer through the
+connection pool; the database probe runs in the threadpool and its result is
+cached for ``READINESS_CACHE_SECONDS`` so frequent probes cost at most one
+query per interval.
+
+The warm-up runs in the background right after start-up and pays first-request
+costs before traffic is routed to the worker: it fills the connection pool to
+``DB_POOL_MIN_CONNECTIONS``, loads the bcrypt backend and starts the hashing
+threads, signs and decodes a JWT, runs every request-body validator once and
+builds the OpenAPI schema.
+"""
+
+import asyncio
+from datetime import timedelta
+import logging
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi.routing import APIRoute
+from passlib.hash import bcrypt
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+from app.auth.passwords import password_service
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# A cheap hash to verify against: it loads the bcrypt backend without paying the configured cost.
+_WARM_UP_HASH = bcrypt.using(rounds=4).hash("warm-up")
+
+
+def _probe_database(engine) -> Dict[str, Any]:
+    start = time.perf_counter()
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+    return {"ok": True, "latency_ms": round((time.perf_counter() - start) * 1000, 3), "pool": engine.pool.status()}
+
+
+def _open_pool_connections(engine, count: int) -> int:
+    connections = []
+    try:
+        for _ in range(count):
+            connections.append(engine.connect())
+    finally:
+        for conn in connections:
+            conn.close()
+    return len(connections)
+
+
+class HealthState:
+    """Warm-up progress and a cached database readiness probe."""
+
+    def __init__(self, cache_seconds: float = settings.READINESS_CACHE_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.cache_seconds = cache_seconds
+        self.clock = clock
+        self.reset()
+
+    def reset(self) -> None:
+        self.warmed = False
+        self.warm_up_error: Optional[str] = None
+        self.warm_up_ms: Dict[str, float] = {}
+        self._database: Optional[Dict[str, Any]] = None
+        self._checked_at: Optional[float] = None
+
+    async def check_database(self, engine) -> Dict[str, Any]:
+        """Probe the database through the pool, reusing a recent result."""
+        now = self.clock()
+        if self._database is None or now - self._checked_at >= self.cache_seconds:
+            self._database = await run_in_threadpool(_probe_database, engine)
+            self._checked_at = now
+        return self._database
+
+    async def readiness(self, engine) -> Tuple[bool, Dict[str, Any]]:
+        """Whether the worker should receive traffic, with the details behind the answer."""
+        database = await self.check_database(engine)
+        ready = self.warmed and database["ok"]
+        report = {
+            "status": "ready" if ready else "not ready",
+            "warmed_up": self.warmed,
+            "database": database,
+        }
+        if self.warm_up_error:
+            report["warm_up_error"] = self.warm_up_error
+        return ready, report
+
+    async def _step(self, name: str, func, *args) -> None:
+        start = time.perf_counter()
+        result = func(*args)
+        if asyncio.iscoroutine(result):
+            await result
+        self.warm_up_ms[name] = round((time.perf_counter() - start) * 1000, 3)
+
+    async def warm_up(self, app, engine, min_connections: int = settings.DB_POOL_MIN_CONNECTIONS) -> None:
+        """
+        Pay first-request costs, then mark the worker warmed up.
+
+        Args:
+            app (FastAPI): The application whose validators and OpenAPI schema are primed.
+            engine (Engine): The engine whose pool is filled.
+            min_connections (int): Connections to open (and return to the pool) up front.
+        """
+        from app.models.user import User  # imported late: models import the auth services
+
+        try:
+            await self._step("database_pool", run_in_threadpool, _open_pool_connections, engine, min_connections)
+            await self._step("password_hashing", password_service.verify, "warm-up", _WARM_UP_HASH)
+
+            def jwt_round_trip():
+                User.decode_token(User.create_access_token({"sub": "warm-up"}, timedelta(seconds=1)))
+            await self._step("jwt", jwt_round_trip)
+
+            def run_validators():
+                for route in app.routes:
+                    if isinstance(route, APIRoute) and route.body_field is not None:
+                        try:
+                            route.body_field.validate({}, {}, loc=("body",))
+                        except Exception:
+                            pass  # only building the validator matters, not the outcome
+            await self._step("validators", run_validators)
+            await self._step("openapi", app.openapi)
+        except Exception as e:
+            self.warm_up_error = str(e)
+            logger.exception("Warm-up failed")
+            return
+        self.warmed = True
+        logger.info("Warm-up finished", extra={"warm_up_ms": self.warm_up_ms})
+
+
+health = HealthState()
@@ -0,0 +1,215 @@
+# app/monitoring/log_pipeline.py
+
+"""
+Non-blocking, structured logging.
+
+``LogPipeline`` replaces the root logger's handlers with a ``QueueHandler``
+and moves the real sinks behind a ``QueueListener`` thread, so a slow sink
+never blocks a request and every record is written exactly once:
+
+- Records are enqueued as-is; message interpolation, exception formatting and
+  JSON encoding all happen on the listener thread (lazy formatting). Use
+  ``%``-style arguments, not f-strings, so this work is deferred.
+- The queue is bounded; when it is full, records are dropped and counted
+  rather than waiting.
+- ``SamplingFilter`` lets through at most ``LOG_SAMPLE_BURST`` warnings or
+  errors per call site (logger, level and message template) per window and
+  drops the rest, so an error storm such as a flood of validation failures
+  cannot saturate the pipeline. The next record let through reports how many
+  were suppressed.
+- ``JsonFormatter`` writes one JSON object per record, including any
+  ``extra`` fields.
+"""
+
+import atexit
+from datetime import datetime, timezone
+import logging
+from logging.handlers import QueueHandler, QueueListener
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import orjson
+
+from app.config import settings
+
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as a single-line JSON object."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            payload["stack"] = self.formatStack(record.stack_info)
+        return orjson.dumps(payload, default=str).decode()
+
+
+class SamplingFilter(logging.Filter):
+    """Caps repetitive warnings and errors per call site per time window."""
+
+    def __init__(self, burst: int = settings.LOG_SAMPLE_BURST,
+                 window: float = settings.LOG_SAMPLE_WINDOW_SECONDS,
+                 min_level: int = logging.WARNING,
+                 clock: Callable[[], float] = time.monotonic,
+                 max_keys: int = 10_000):
+        """
+        Args:
+            burst (int): Records let through per call site per window; 0 disables sampling.
+            window (float): Window length in seconds.
+            min_level (int): Records below this level are never sampled.
+            clock (callable): Time source.
+            max_keys (int): Call sites tracked before the table is reset.
+        """
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.min_level = min_level
+        self.clock = clock
+        self.max_keys = max_keys
+        self.suppressed = 0
+        # key -> [window start, records passed, records suppressed]
+        self._windows: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.burst <= 0 or record.levelno < self.min_level:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        with self._lock:
+            now = self.clock()
+            state = self._windows.get(key)
+            if state is None or now - state[0] >= self.window:
+                if state is not None and state[2]:
+                    record.suppressed = state[2]
+                if len(self._windows) >= self.max_keys:
+                    self._windows = {}
+                state = self._windows[key] = [now, 0, 0]
+            if state[1] < self.burst:
+                state[1] += 1
+                return True
+            state[2] += 1
+            self.suppressed += 1
+            return False
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that defers formatting to the listener and drops records when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Records stay in-process, so nothing needs to be formatted or pickled here.
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # Wait for room so shutdown still drains a full queue.
+        self.queue.put(self._sentinel)
+
+
+class LogPipeline:
+    """Owns the root logger's queue handler and the listener thread feeding the sinks."""
+
+    def __init__(self):
+        self.handler: Optional[NonBlockingQueueHandler] = None
+        self.sampler: Optional[SamplingFilter] = None
+        self.listener: Optional[QueueListener] = None
+        self._replaced: List[logging.Handler] = []
+        self._atexit_registered = False
+
+    def start(self, level: str = settings.LOG_LEVEL, json_format: bool = settings.LOG_JSON,
+              handlers: Optional[List[logging.Handler]] = None,
+              queue_size: int = settings.LOG_QUEUE_SIZE,
+              sampler: Optional[SamplingFilter] = None) -> None:
+        """
+        Route the root logger through the queue; restarts the pipeline if already running.
+
+        The root logger's existing handlers are detached (and restored by
+        ``stop``) so records are not written once by them and again by the sinks.
+
+        Args:
+            level (str): Root logger level.
+            json_format (bool): Format records as JSON (otherwise plain text) on sinks without a formatter.
+            handlers (List[Handler], optional): Sinks run by the listener; defaults to stderr.
+            queue_size (int): Records buffered before new ones are dropped.
+            sampler (SamplingFilter, optional): Sampling policy; defaults to the configured one.
+        """
+        self.stop()
+        sinks = handlers if handlers is not None else [logging.StreamHandler()]
+        for sink in sinks:
+            if sink.formatter is None:
+                sink.setFormatter(JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT))
+
+        log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.sampler = sampler if sampler is not None else SamplingFilter()
+        self.handler = NonBlockingQueueHandler(log_queue)
+        self.handler.addFilter(self.sampler)
+        self.listener = _Listener(log_queue, *sinks, respect_handler_level=True)
+        self.listener.start()
+
+        root = logging.getLogger()
+        self._replaced = list(root.handlers)
+        for handler in self._replaced:
+            root.removeHandler(handler)
+        root.addHandler(self.handler)
+        root.setLevel(level)
+        if not self._atexit_registered:
+            atexit.register(self.stop)
+            self._atexit_registered = True
+
+    def stop(self) -> None:
+        """Detach from the root logger, restore its previous handlers and flush every queued record to the sinks."""
+        root = logging.getLogger()
+        if self.handler is not None:
+            root.removeHandler(self.handler)
+            for handler in self._replaced:
+                root.addHandler(handler)
+            self._replaced = []
+        if self.listener is not None:
+            self.listener.stop()
+        self.handler = None
+        self.sampler = None
+        self.listener = None
+
+    def stats(self) -> Dict[str, int]:
+        """Records waiting, dropped because the queue was full, and suppressed by sampling."""
+        if self.handler is None:
+            return {"queued": 0, "dropped": 0, "suppressed": 0}
+        return {
+            "queued": self.handler.queue.qsize(),
+            "dropped": self.handler.dropped,
+            "suppressed": self.sampler.suppressed,
+        }
+
+
+log_pipeline = LogPipeline()
+
+
+def setup_logging(**kwargs) -> LogPipeline:
+    """Start the process-wide logging pipeline; see ``LogPipeline.start``."""
+    log_pipeline.start(**kwargs)
+    return log_pipeline
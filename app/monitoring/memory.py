@@ -0,0 +1,187 @@
+# app/monitoring/memory.py
+
+"""
+Memory allocation tracking with ``tracemalloc``.
+
+``MemoryTracker`` starts and stops tracing, keeps a few named snapshots and
+reports the top allocation sites of a snapshot, or the difference between
+two, grouped by file and line. By default only allocations made from code
+under ``app/`` are reported, which is where large calculation inputs and ORM
+identity maps are built. Each allocation is attributed to the innermost
+``app/`` frame on its traceback, so memory allocated inside a library call
+(``gzip.compress``, a driver, the ORM) is reported at the app line that made
+the call. Tracing slows allocation down noticeably, so it is
+off until started.
+"""
+
+from collections import OrderedDict
+import os
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, Hashable, List, Tuple
+
+from app.config import settings
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR = os.path.dirname(APP_DIR)
+
+GROUP_BY = ("lineno", "filename", "traceback")
+
+
+def _relative(filename: str) -> str:
+    return os.path.relpath(filename, ROOT_DIR) if filename.startswith(ROOT_DIR) else filename
+
+
+def _site_frame(traceback: tracemalloc.Traceback, app_only: bool) -> tracemalloc.Frame:
+    """The innermost app/ frame when ``app_only``, else the frame that allocated."""
+    if app_only:
+        for frame in reversed(traceback):  # oldest first, so walk back from the allocation
+            if frame.filename.startswith(APP_DIR + os.sep):
+                return frame
+    return traceback[-1]
+
+
+def _group(snapshot: tracemalloc.Snapshot, group_by: str, app_only: bool) -> Dict[Hashable, List[int]]:
+    """
+    Sum size and block count per site.
+
+    Keys start with the site's (filename, lineno); "filename" uses line 0, and
+    "traceback" adds the full traceback so each call path stays separate.
+    """
+    groups: Dict[Hashable, List[int]] = {}
+    for trace in snapshot.traces:
+        frame = _site_frame(trace.traceback, app_only)
+        if group_by == "lineno":
+            key: Tuple = (frame.filename, frame.lineno)
+        elif group_by == "filename":
+            key = (frame.filename, 0)
+        else:
+            key = (frame.filename, frame.lineno, trace.traceback)
+        totals = groups.setdefault(key, [0, 0])
+        totals[0] += trace.size
+        totals[1] += 1
+    return groups
+
+
+def _site(key: Tuple) -> Dict[str, Any]:
+    return {"file": _relative(key[0]), "line": key[1]}
+
+
+class MemoryTracker:
+    """Start/stop tracemalloc and compare named snapshots."""
+
+    def __init__(self, max_snapshots: int = settings.MEMORY_SNAPSHOTS):
+        self.max_snapshots = max_snapshots
+        self._snapshots: "OrderedDict[str, tracemalloc.Snapshot]" = OrderedDict()
+        self._taken_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._counter = 0
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = settings.MEMORY_TRACE_FRAMES) -> None:
+        """Start tracing, keeping ``frames`` frames per allocation."""
+        if not self.tracing:
+            tracemalloc.start(frames)
+
+    def stop(self) -> None:
+        """Stop tracing and drop all snapshots."""
+        tracemalloc.stop()
+        with self._lock:
+            self._snapshots.clear()
+            self._taken_at.clear()
+
+    def status(self) -> Dict[str, Any]:
+        """Whether tracing is on, traced memory now and at peak, and the stored snapshot ids."""
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "tracing": self.tracing,
+            "traceback_limit": tracemalloc.get_traceback_limit(),
+            "traced_kb": round(current / 1024, 1),
+            "peak_kb": round(peak / 1024, 1),
+            "snapshots": list(self._snapshots),
+        }
+
+    def take_snapshot(self) -> str:
+        """Take a snapshot and return its id; the oldest is dropped beyond ``max_snapshots``."""
+        if not self.tracing:
+            raise ValueError("Memory tracing is not started.")
+        snapshot = tracemalloc.take_snapshot()
+        with self._lock:
+            self._counter += 1
+            snapshot_id = str(self._counter)
+            self._snapshots[snapshot_id] = snapshot
+            self._taken_at[snapshot_id] = time.time()
+            while len(self._snapshots) > self.max_snapshots:
+                old_id, _ = self._snapshots.popitem(last=False)
+                self._taken_at.pop(old_id, None)
+        return snapshot_id
+
+    def _get(self, snapshot_id: str, app_only: bool) -> tracemalloc.Snapshot:
+        with self._lock:
+            snapshot = self._snapshots.get(snapshot_id)
+        if snapshot is None:
+            raise KeyError(f"Snapshot {snapshot_id} does not exist")
+        if app_only:
+            # Match any frame, so allocations made in library code called from app/ still count.
+            snapshot = snapshot.filter_traces([tracemalloc.Filter(True, os.path.join(APP_DIR, "*"), all_frames=True)])
+        return snapshot
+
+    def top(self, snapshot_id: str, limit: int = 20, group_by: str = "lineno",
+            app_only: bool = True) -> List[Dict[str, Any]]:
+        """
+        The largest allocation sites in a snapshot.
+
+        Args:
+            snapshot_id (str): The snapshot to report on.
+            limit (int): Maximum number of sites.
+            group_by (str): "lineno", "filename" or "traceback".
+            app_only (bool): Only count allocations made from code under app/.
+
+        Returns:
+            List[dict]: file, line, size_kb and count for each site, largest first.
+        """
+        if group_by not in GROUP_BY:
+            raise ValueError(f"group_by must be one of {', '.join(GROUP_BY)}")
+        groups = _group(self._get(snapshot_id, app_only), group_by, app_only)
+        largest = sorted(groups.items(), key=lambda item: (item[1][0], item[1][1]), reverse=True)
+        return [
+            {**_site(key), "size_kb": round(size / 1024, 3), "count": count}
+            for key, (size, count) in largest[:limit]
+        ]
+
+    def diff(self, base_id: str, current_id: str, limit: int = 20, group_by: str = "lineno",
+             app_only: bool = True) -> List[Dict[str, Any]]:
+        """
+        Allocation growth between two snapshots, largest change first.
+
+        Returns:
+            List[dict]: file, line, size_kb, size_diff_kb, count and count_diff for each site.
+        """
+        if group_by not in GROUP_BY:
+            raise ValueError(f"group_by must be one of {', '.join(GROUP_BY)}")
+        base = _group(self._get(base_id, app_only), group_by, app_only)
+        current = _group(self._get(current_id, app_only), group_by, app_only)
+        changes = []
+        for key in current.keys() | base.keys():
+            size, count = current.get(key, (0, 0))
+            base_size, base_count = base.get(key, (0, 0))
+            changes.append((key, size, size - base_size, count, count - base_count))
+        # Same order as Snapshot.compare_to: biggest absolute change first.
+        changes.sort(key=lambda change: (abs(change[2]), change[1], abs(change[4]), change[3]), reverse=True)
+        return [
+            {
+                **_site(key),
+                "size_kb": round(size / 1024, 3),
+                "size_diff_kb": round(size_diff / 1024, 3),
+                "count": count,
+                "count_diff": count_diff,
+            }
+            for key, size, size_diff, count, count_diff in changes[:limit]
+        ]
+
+
+memory_tracker = MemoryTracker()
@@ -0,0 +1,328 @@
+# app/monitoring/metrics.py
+
+"""
+Prometheus metrics without a client library.
+
+Collectors aggregate per thread: each thread updates its own shard (a plain
+dict it alone writes to), so the hot path takes no lock. Shards are only
+combined when ``/metrics`` is scraped. A scrape racing an update may see a
+histogram's count and sum from slightly different moments, which is fine for
+monitoring.
+
+``MetricsMiddleware`` records per-route request counts, latency histograms,
+status codes and in-flight requests. ``record_operation`` and
+``record_operation_error`` count calculator work by operation and input size;
+stored calculation types ("addition") are reported under the route operation
+names ("add") so both paths share one label set. Caches passed to
+``register_cache`` report hits, misses, evictions and size, read from
+``TTLCache.stats()`` on each scrape.
+"""
+
+from bisect import bisect_left
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.operations import DivisionByZeroError
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+INPUT_SIZE_BUCKETS = (1, 2, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class holding one shard per thread."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional["MetricsRegistry"] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._shards_lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+            return shard
+
+    def _snapshots(self) -> List[dict]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        return [shard.copy() for shard in shards]
+
+    def reset(self) -> None:
+        """Zero the metric in every thread."""
+        with self._shards_lock:
+            for shard in self._shards:
+                shard.clear()
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """A monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        shard = self._shard()
+        shard[labelvalues] = shard.get(labelvalues, 0.0) + amount
+
+    def collect(self) -> Dict[Labels, float]:
+        """Sum the per-thread shards."""
+        totals: Dict[Labels, float] = {}
+        for shard in self._snapshots():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0.0) + value
+        return totals
+
+    def value(self, *labelvalues: str) -> float:
+        return self.collect().get(labelvalues, 0.0)
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self.collect().items())
+        ]
+
+
+class Gauge(Counter):
+    """A value that can go up and down; per-thread deltas are summed on collection."""
+
+    kind = "gauge"
+
+    def dec(self, *labelvalues: str, amount: float = 1.0) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+
+class Histogram(_Metric):
+    """Observations counted into fixed buckets, with a running sum and count."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS,
+                 registry: Optional["MetricsRegistry"] = None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        shard = self._shard()
+        row = shard.get(labelvalues)
+        if row is None:
+            # Non-cumulative bucket counts (last slot is +Inf), then sum.
+            row = shard[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+        row[bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    def collect(self) -> Dict[Labels, Tuple[List[int], float, int]]:
+        """Return cumulative bucket counts, sum and count per label set."""
+        merged: Dict[Labels, list] = {}
+        for shard in self._snapshots():
+            for labels, row in shard.items():
+                row = list(row)
+                total = merged.get(labels)
+                merged[labels] = row if total is None else [a + b for a, b in zip(total, row)]
+        result = {}
+        for labels, row in merged.items():
+            cumulative, running = [], 0
+            for count in row[:-1]:
+                running += count
+                cumulative.append(running)
+            result[labels] = (cumulative, row[-1], running)
+        return result
+
+    def render(self) -> List[str]:
+        lines = []
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        names = self.labelnames + ("le",)
+        for labels, (cumulative, total, count) in sorted(self.collect().items()):
+            for bound, value in zip(bounds, cumulative):
+                lines.append(f"{self.name}_bucket{_format_labels(names, labels + (bound,))} {value}")
+            suffix = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{suffix} {_format_value(total)}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """A counter or gauge whose values are read from ``callback`` at scrape time."""
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], Dict[Labels, float]],
+                 labelnames: Sequence[str] = (), kind: str = "gauge",
+                 registry: Optional["MetricsRegistry"] = None):
+        self.callback = callback
+        self.kind = kind
+        super().__init__(name, documentation, labelnames, registry)
+
+    def collect(self) -> Dict[Labels, float]:
+        return self.callback()
+
+    def value(self, *labelvalues: str) -> float:
+        return self.collect().get(labelvalues, 0.0)
+
+    def render(self) -> List[str]:
+        return Counter.render(self)
+
+
+class MetricsRegistry:
+    """A set of metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        for metric in self._metrics.values():
+            metric.reset()
+
+
+registry = MetricsRegistry()
+
+http_requests = Counter(
+    "http_requests_total", "HTTP requests by method, route and status code.",
+    ("method", "route", "status"), registry=registry,
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by method and route.",
+    ("method", "route"), registry=registry,
+)
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled.", registry=registry,
+)
+operations = Counter(
+    "calculator_operations_total", "Calculations performed by operation.",
+    ("operation",), registry=registry,
+)
+operation_inputs = Histogram(
+    "calculator_operation_inputs", "Number of inputs per calculation.",
+    ("operation",), buckets=INPUT_SIZE_BUCKETS, registry=registry,
+)
+operation_errors = Counter(
+    "calculator_operation_errors_total", "Calculations that failed, by operation and error kind.",
+    ("operation", "error"), registry=registry,
+)
+
+
+_caches: Dict[str, Any] = {}
+
+
+def register_cache(name: str, cache: Any) -> None:
+    """Report ``cache`` (anything with ``TTLCache.stats()``) under ``cache="<name>"``."""
+    _caches[name] = cache
+
+
+def _cache_stat(key: str) -> Callable[[], Dict[Labels, float]]:
+    def collect() -> Dict[Labels, float]:
+        return {(name,): float(cache.stats()[key]) for name, cache in sorted(_caches.items())}
+    return collect
+
+
+cache_hits = CallbackMetric(
+    "cache_hits_total", "Cache lookups that found a live entry, by cache.",
+    _cache_stat("hits"), ("cache",), kind="counter", registry=registry,
+)
+cache_misses = CallbackMetric(
+    "cache_misses_total", "Cache lookups that found no live entry, by cache.",
+    _cache_stat("misses"), ("cache",), kind="counter", registry=registry,
+)
+cache_evictions = CallbackMetric(
+    "cache_evictions_total", "Entries evicted to stay within the size bound, by cache.",
+    _cache_stat("evictions"), ("cache",), kind="counter", registry=registry,
+)
+cache_size = CallbackMetric(
+    "cache_entries", "Entries currently held, by cache.", _cache_stat("size"), ("cache",), registry=registry,
+)
+
+
+# Calculation types, as stored on calculations, mapped to the operation names used by the routes.
+OPERATION_LABELS = {"addition": "add", "subtraction": "subtract", "multiplication": "multiply", "division": "divide"}
+
+
+def record_operation(operation: str, input_count: int) -> None:
+    """Count one calculation and the size of its input."""
+    operation = OPERATION_LABELS.get(operation, operation)
+    operations.inc(operation)
+    operation_inputs.observe(input_count, operation)
+
+
+def record_operation_error(operation: str, exc: Exception) -> None:
+    """Count a failed calculation, classifying division by zero separately."""
+    kind = "division_by_zero" if isinstance(exc, (DivisionByZeroError, ZeroDivisionError)) else "invalid_input"
+    operation_errors.inc(OPERATION_LABELS.get(operation, operation), kind)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts, latency and in-flight requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            # The route template, not the raw path, keeps label cardinality bounded.
+            route = getattr(scope.get("route"), "path", "<unmatched>")
+            method = scope["method"]
+            http_requests.inc(method, route, status)
+            http_request_duration.observe(elapsed, method, route)
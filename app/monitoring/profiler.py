@@ -0,0 +1,140 @@
+# app/monitoring/profiler.py
+
+"""
+On-demand statistical profiler.
+
+``StackSampler`` runs a background thread that snapshots every other thread's
+Python stack with ``sys._current_frames()`` at a fixed interval and counts
+identical stacks. Nothing is hooked into the profiled code, so overhead is a
+few microseconds per sample and it is safe to switch on in a production
+worker. Results are rendered as collapsed ("folded") stacks, one
+``root;...;leaf count`` line per stack, which flamegraph.pl, speedscope and
+similar tools read directly.
+
+Only one profile runs per process at a time. ``ProfileRequestMiddleware``
+profiles single requests that carry an ``X-Profile`` header (admins only) and
+keeps the result for retrieval by the id returned in ``X-Profile-Id``; since
+threads are shared, stacks from concurrent requests can appear too.
+"""
+
+from collections import Counter
+import sys
+import threading
+from typing import Callable, Optional
+import uuid
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.cache import TTLCache
+from app.config import settings
+
+_profile_lock = threading.Lock()
+
+# Per-request profiles by id, for /admin/profiles/{id}.
+recent_profiles = TTLCache(max_size=settings.PROFILE_HISTORY, ttl=3600)
+
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a profile is requested while another one is running."""
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class StackSampler:
+    """Samples the stacks of all other threads on a background thread."""
+
+    def __init__(self, interval: float = settings.PROFILE_INTERVAL_MS / 1000, max_depth: int = 128):
+        """
+        Args:
+            interval (float): Seconds between samples.
+            max_depth (int): Frames kept per stack, counted from the innermost.
+        """
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "StackSampler":
+        """Start sampling; raises ProfilerBusy if another sampler is running."""
+        if not _profile_lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running")
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        """Stop sampling and return the stack counts."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            _profile_lock.release()
+        return self.stacks
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            if frames.keys() - names.keys():
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """The samples as collapsed stacks, most frequent first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileRequestMiddleware:
+    """ASGI middleware that profiles requests sent with an ``X-Profile`` header by an admin."""
+
+    def __init__(self, app, authorize: Callable[[Optional[str]], bool]):
+        """
+        Args:
+            app: The ASGI app to wrap.
+            authorize (callable): Given the ``X-Admin-Token`` header value, whether profiling is allowed.
+        """
+        self.app = app
+        self.authorize = authorize
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if "x-profile" not in headers or not self.authorize(headers.get("x-admin-token")):
+            await self.app(scope, receive, send)
+            return
+        try:
+            sampler = StackSampler().start()
+        except ProfilerBusy:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Profile-Id", profile_id)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            recent_profiles.set(profile_id, sampler.collapsed())
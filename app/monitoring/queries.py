@@ -0,0 +1,196 @@
+# app/monitoring/queries.py
+
+"""
+Query counting, N+1 detection and query budgets.
+
+Statements are collected through the engine observers in
+``app.monitoring.sql``. Each statement is reduced to a *shape* (literals and
+expanded ``IN`` lists collapsed), so the same query issued once per row, the
+classic N+1 pattern such as iterating ``User.calculations`` through its
+dynamic loader, shows up as one shape with a high count.
+
+- ``inspect_queries`` counts statements in a block.
+- ``assert_queries`` fails the block when it exceeds a ``QueryBudget``.
+- ``query_budget`` declares a budget on a route function; ``QueryBudgetRoute``
+  checks it (and, with ``QUERY_INSPECTION`` on, a default budget for every
+  route) per request, logging or raising depending on ``QUERY_BUDGET_ENFORCE``.
+
+Counting is bound to the current context (request or test) by default;
+``all_threads=True`` also captures statements from other threads, e.g. the
+server thread behind a ``TestClient``.
+"""
+
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+import re
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from fastapi.routing import APIRoute
+
+from app.config import settings
+from app.monitoring.sql import add_observer
+
+logger = logging.getLogger(__name__)
+
+_active: ContextVar[Tuple["QueryCounter", ...]] = ContextVar("query_counters", default=())
+_global: List["QueryCounter"] = []
+_global_lock = threading.Lock()
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN \((?:[^()]|\([^()]*\))*\)", re.IGNORECASE)
+
+
+def statement_shape(statement: str) -> str:
+    """Reduce a statement to its shape by collapsing literals and IN lists."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _STRING.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    return _IN_LIST.sub("IN (?)", shape)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block or request runs more queries than its budget allows."""
+
+
+class QueryCounter:
+    """Statements executed in a block, with their total time."""
+
+    def __init__(self):
+        self.statements: List[str] = []
+        self.elapsed = 0.0
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.statements.append(statement)
+        self.elapsed += elapsed
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def shapes(self) -> Counter:
+        """How many times each statement shape ran."""
+        return Counter(statement_shape(statement) for statement in self.statements)
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """Shapes that ran at least ``threshold`` times, most frequent first."""
+        return {shape: count for shape, count in self.shapes().most_common() if count >= threshold}
+
+
+class QueryBudget:
+    """Limits on total statements and on repeats of a single statement shape."""
+
+    def __init__(self, max_queries: Optional[int] = None,
+                 max_repeats: Optional[int] = settings.QUERY_REPEAT_THRESHOLD):
+        """
+        Args:
+            max_queries (int, optional): Maximum number of statements; None means unlimited.
+            max_repeats (int, optional): Maximum runs of one statement shape; None disables N+1 detection.
+        """
+        self.max_queries = max_queries
+        self.max_repeats = max_repeats
+
+    def violations(self, counter: QueryCounter) -> List[str]:
+        """Describe every way ``counter`` exceeds the budget."""
+        problems = []
+        if self.max_queries is not None and counter.count > self.max_queries:
+            problems.append(f"{counter.count} queries executed, budget is {self.max_queries}")
+        if self.max_repeats is not None:
+            for shape, count in counter.repeated(self.max_repeats + 1).items():
+                problems.append(f"possible N+1: {count} executions of {shape}")
+        return problems
+
+    def check(self, counter: QueryCounter, label: str = "block", strict: bool = True) -> List[str]:
+        """
+        Compare ``counter`` against the budget.
+
+        Args:
+            counter (QueryCounter): The statements to check.
+            label (str): What ran them, for the message.
+            strict (bool): Raise QueryBudgetExceeded instead of logging a warning.
+
+        Returns:
+            List[str]: The violations found.
+        """
+        problems = self.violations(counter)
+        if problems:
+            message = f"Query budget exceeded in {label}: " + "; ".join(problems)
+            if strict:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return problems
+
+
+@add_observer
+def _record(conn, statement, parameters, elapsed: float) -> None:
+    for counter in _active.get():
+        counter.record(statement, elapsed)
+    if _global:
+        with _global_lock:
+            counters = list(_global)
+        for counter in counters:
+            counter.record(statement, elapsed)
+
+
+@contextmanager
+def inspect_queries(all_threads: bool = False) -> Iterator[QueryCounter]:
+    """Count the statements executed in the enclosed block."""
+    counter = QueryCounter()
+    if all_threads:
+        with _global_lock:
+            _global.append(counter)
+        try:
+            yield counter
+        finally:
+            with _global_lock:
+                _global.remove(counter)
+        return
+    token = _active.set(_active.get() + (counter,))
+    try:
+        yield counter
+    finally:
+        _active.reset(token)
+
+
+@contextmanager
+def assert_queries(max_queries: Optional[int] = None,
+                   max_repeats: Optional[int] = settings.QUERY_REPEAT_THRESHOLD,
+                   all_threads: bool = False) -> Iterator[QueryCounter]:
+    """Count statements in the enclosed block and raise QueryBudgetExceeded if over budget."""
+    with inspect_queries(all_threads=all_threads) as counter:
+        yield counter
+    QueryBudget(max_queries, max_repeats).check(counter)
+
+
+def query_budget(max_queries: Optional[int] = None,
+                 max_repeats: Optional[int] = settings.QUERY_REPEAT_THRESHOLD):
+    """Declare a query budget on a route function; checked by QueryBudgetRoute."""
+    def decorator(func):
+        func.query_budget = QueryBudget(max_queries, max_repeats)
+        return func
+    return decorator
+
+
+class QueryBudgetRoute(APIRoute):
+    """APIRoute that checks declared (or, in inspection mode, default) query budgets per request."""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        budget = getattr(self.endpoint, "query_budget", None)
+        if budget is None:
+            if not settings.QUERY_INSPECTION:
+                return handler
+            budget = QueryBudget(settings.DEFAULT_QUERY_BUDGET)
+        label = f"{','.join(sorted(self.methods))} {self.path}"
+
+        async def budgeted_handler(request):
+            with inspect_queries() as counter:
+                response = await handler(request)
+            budget.check(counter, label, strict=settings.QUERY_BUDGET_ENFORCE)
+            return response
+
+        return budgeted_handler
@@ -0,0 +1,146 @@
+# app/monitoring/slow_queries.py
+
+"""
+Slow-query log with automatic EXPLAIN capture.
+
+Statements slower than ``SLOW_QUERY_MS`` are logged and kept in a bounded ring
+buffer, together with the *shape* of their parameters (types only, never
+values) and, rate-limited, the query plan. Plans are captured on a single
+background thread so the request that ran the slow statement is not delayed
+further: plain SELECTs get ``EXPLAIN (ANALYZE, BUFFERS)``; everything else,
+including ``WITH`` queries (which may hold data-modifying CTEs) and locking
+``SELECT ... FOR UPDATE``, gets a plain ``EXPLAIN`` so it is not executed a
+second time.
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.auth.rate_limit import InMemoryBackend
+from app.config import settings
+from app.monitoring.queries import statement_shape
+from app.monitoring.sql import add_observer
+
+logger = logging.getLogger(__name__)
+
+# Statements EXPLAIN ANALYZE may safely run again: a SELECT that takes no row
+# locks and creates nothing (SELECT ... INTO makes a table).
+_READ_ONLY_SELECT = re.compile(r"\s*SELECT\b", re.IGNORECASE)
+_SIDE_EFFECTS = re.compile(r"\bFOR\s+(NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b|\bINTO\b", re.IGNORECASE)
+
+
+def is_read_only_select(statement: str) -> bool:
+    """Whether ``statement`` is a plain SELECT that can be executed again for EXPLAIN ANALYZE."""
+    return bool(_READ_ONLY_SELECT.match(statement)) and not _SIDE_EFFECTS.search(statement)
+
+
+def parameter_shape(parameters: Any) -> Any:
+    """Describe statement parameters by type only, so values never reach the log."""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return {"rows": len(parameters), "row": parameter_shape(parameters[0])}
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__ if parameters is not None else None
+
+
+class SlowQueryLog:
+    """Records slow statements in a ring buffer and captures their plans in the background."""
+
+    def __init__(self, threshold_ms: Optional[float] = settings.SLOW_QUERY_MS,
+                 max_records: int = settings.SLOW_QUERY_LOG_SIZE,
+                 explain: bool = settings.SLOW_QUERY_EXPLAIN,
+                 explains_per_minute: int = settings.SLOW_QUERY_EXPLAINS_PER_MINUTE):
+        """
+        Args:
+            threshold_ms (float, optional): Statements at least this slow are recorded; None disables the log.
+            max_records (int): Size of the ring buffer.
+            explain (bool): Whether to capture query plans.
+            explains_per_minute (int): Maximum plans captured per minute.
+        """
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self.explains_per_minute = explains_per_minute
+        self.records: deque = deque(maxlen=max_records)
+        self._limiter = InMemoryBackend(max_keys=1)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+            return self._executor
+
+    def observe(self, conn, statement: str, parameters: Any, elapsed: float) -> None:
+        """Engine observer: record ``statement`` if it was slow."""
+        if self.threshold_ms is None or elapsed * 1000 < self.threshold_ms:
+            return
+        if statement.lstrip()[:7].upper() == "EXPLAIN":
+            return
+
+        record: Dict[str, Any] = {
+            "timestamp": time.time(),
+            "duration_ms": round(elapsed * 1000, 3),
+            "statement": statement,
+            "shape": statement_shape(statement),
+            "parameters": parameter_shape(parameters),
+            "plan": None,
+        }
+        self.records.append(record)
+        logger.warning("Slow query (%.1f ms): %s", record["duration_ms"], record["shape"])
+
+        explainable = not (isinstance(parameters, (list, tuple)) and parameters
+                           and isinstance(parameters[0], (dict, list, tuple)))
+        if self.explain and explainable and self._admit_explain():
+            self.executor.submit(self._capture_plan, conn.engine, record, statement, parameters)
+
+    def _admit_explain(self) -> bool:
+        if self.explains_per_minute <= 0:
+            return False
+        rate = self.explains_per_minute / 60.0
+        return self._limiter.acquire("explain", rate, self.explains_per_minute) == 0
+
+    @staticmethod
+    def _capture_plan(engine, record: Dict[str, Any], statement: str, parameters: Any) -> None:
+        options = "ANALYZE, BUFFERS, FORMAT JSON" if is_read_only_select(statement) else "FORMAT JSON"
+        try:
+            with engine.connect() as conn:
+                try:
+                    plan = conn.exec_driver_sql(f"EXPLAIN ({options}) {statement}", parameters or None).scalar()
+                finally:
+                    conn.rollback()
+            record["plan"] = plan
+        except Exception as e:
+            record["plan_error"] = str(e)
+            logger.info("Could not explain slow query: %s", e)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Recorded slow statements, newest first."""
+        return [dict(record) for record in reversed(self.records)]
+
+    def wait(self) -> None:
+        """Block until every queued plan capture has finished."""
+        self.executor.submit(lambda: None).result()
+
+    def clear(self) -> None:
+        self.records.clear()
+        self._limiter.reset()
+
+    def shutdown(self) -> None:
+        """Stop the capture thread; it is recreated on next use."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+slow_query_log = SlowQueryLog()
+add_observer(slow_query_log.observe)
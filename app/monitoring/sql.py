@@ -0,0 +1,64 @@
+# app/monitoring/sql.py
+
+"""
+SQL statement instrumentation.
+
+``instrument_engine`` times every cursor execution on an engine and hands the
+statement and its duration to each registered observer. Monitoring features
+(request timing, query budgets, slow-query capture, tracing) register
+observers here instead of each adding their own engine listeners.
+"""
+
+import time
+from typing import Any, Callable, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# observer(conn, statement, parameters, elapsed_seconds)
+Observer = Callable[[Any, str, Any, float], None]
+
+_observers: List[Observer] = []
+
+_START_KEY = "monitoring.query_start"
+
+
+def add_observer(observer: Observer) -> Observer:
+    """Register an observer for every executed statement; usable as a decorator."""
+    if observer not in _observers:
+        _observers.append(observer)
+    return observer
+
+
+def remove_observer(observer: Observer) -> None:
+    """Unregister an observer; a no-op if it is not registered."""
+    if observer in _observers:
+        _observers.remove(observer)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get(_START_KEY)
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    for observer in list(_observers):
+        observer(conn, statement, parameters, elapsed)
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get(_START_KEY):
+        conn.info[_START_KEY].pop()
+
+
+def instrument_engine(engine: Engine) -> Engine:
+    """Attach the timing listeners to ``engine`` (idempotent) and return it."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+    return engine
@@ -0,0 +1,188 @@
+# app/monitoring/timing.py
+
+"""
+Per-request time breakdown.
+
+``ServerTimingMiddleware`` opens a ``RequestTimings`` for each request in a
+context variable. Work done on behalf of the request adds to named phases:
+
+- ``db``: SQL statements, via the engine observers in ``app.monitoring.sql``
+- ``hash``: password hashing in ``PasswordService``
+- ``validation``: body parsing, Pydantic validation and dependency resolution
+- ``compute``: the route function itself
+
+The breakdown is returned in a ``Server-Timing`` header and logged as a
+structured record, so a slow request can be attributed to the database,
+bcrypt or computation at a glance. Phases may overlap (``compute`` includes
+any ``db`` time spent inside the route).
+"""
+
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+import functools
+import logging
+import time
+from typing import Dict, Iterator, List, Optional
+
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+
+from app.config import settings
+from app.monitoring.sql import add_observer
+
+logger = logging.getLogger(__name__)
+
+_current: ContextVar[Optional["RequestTimings"]] = ContextVar("request_timings", default=None)
+
+_DESCRIPTIONS = {
+    "db": "database",
+    "hash": "password hashing",
+    "validation": "parse, validate and resolve dependencies",
+    "compute": "route function",
+}
+
+
+class RequestTimings:
+    """Accumulated time and event count per phase for one request."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.handler_start: Optional[float] = None
+        self.phases: Dict[str, List[float]] = {}
+
+    def add(self, phase: str, seconds: float, count: int = 1) -> None:
+        entry = self.phases.get(phase)
+        if entry is None:
+            self.phases[phase] = [seconds, count]
+        else:
+            entry[0] += seconds
+            entry[1] += count
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        """Phase durations in milliseconds with their counts, plus the total."""
+        breakdown = {
+            phase: {"ms": round(seconds * 1000, 3), "count": int(count)}
+            for phase, (seconds, count) in self.phases.items()
+        }
+        breakdown["total"] = {"ms": round(self.elapsed() * 1000, 3), "count": 1}
+        return breakdown
+
+    def header(self) -> str:
+        """Render the breakdown as a Server-Timing header value."""
+        parts = []
+        for phase, (seconds, count) in self.phases.items():
+            desc = _DESCRIPTIONS.get(phase, phase)
+            if phase == "db":
+                desc = f"{int(count)} {'query' if count == 1 else 'queries'}"
+            parts.append(f'{phase};dur={seconds * 1000:.3f};desc="{desc}"')
+        parts.append(f"total;dur={self.elapsed() * 1000:.3f}")
+        return ", ".join(parts)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    """The timings of the request being handled, if any."""
+    return _current.get()
+
+
+@contextmanager
+def request_timings() -> Iterator[RequestTimings]:
+    """Collect timings for the enclosed block."""
+    timings = RequestTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """Add the time spent in the enclosed block to ``phase`` of the current request."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - start)
+
+
+@add_observer
+def _record_query(conn, statement, parameters, elapsed: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.add("db", elapsed)
+
+
+def _enter_endpoint() -> None:
+    timings = _current.get()
+    if timings is not None and timings.handler_start is not None:
+        timings.add("validation", time.perf_counter() - timings.handler_start)
+
+
+class TimedRoute(APIRoute):
+    """APIRoute that splits handler time into validation and compute phases."""
+
+    def get_route_handler(self):
+        call = self.dependant.call
+        if asyncio.iscoroutinefunction(call):
+            @functools.wraps(call)
+            async def endpoint(*args, **kwargs):
+                _enter_endpoint()
+                with timed("compute"):
+                    return await call(*args, **kwargs)
+        else:
+            @functools.wraps(call)
+            def endpoint(*args, **kwargs):
+                _enter_endpoint()
+                with timed("compute"):
+                    return call(*args, **kwargs)
+        self.dependant.call = endpoint
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            timings = _current.get()
+            if timings is not None:
+                timings.handler_start = time.perf_counter()
+            return await handler(request)
+
+        return timed_handler
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware that collects request timings and reports them."""
+
+    def __init__(self, app, header: bool = settings.SERVER_TIMING_HEADER):
+        self.app = app
+        self.header = header
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        with request_timings() as timings:
+            async def send_wrapper(message):
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    if self.header:
+                        MutableHeaders(scope=message).append("Server-Timing", timings.header())
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info(
+                        "%s %s %s %.1fms", scope["method"], scope["path"], status, timings.elapsed() * 1000,
+                        extra={"timing": timings.as_dict(), "method": scope["method"],
+                               "path": scope["path"], "status": status},
+                    )
@@ -0,0 +1,367 @@
+# app/monitoring/tracing.py
+
+"""
+Lightweight, OpenTelemetry-style tracing.
+
+A ``Tracer`` creates nested spans (trace id, span id, parent id, start/end in
+nanoseconds, attributes, status) tracked in a context variable, so spans
+started in a request, or in threadpool work done for it, join the request's
+trace. An incoming W3C ``traceparent`` header continues the caller's trace
+and its sampled flag is honoured; new traces are sampled at
+``TRACE_SAMPLE_RATIO``.
+
+Spans cover request handling (``TracingMiddleware``), request validation and
+the route function (``TracedRoute``), password hashing, calculation results
+and every SQL statement. Finished spans go to exporters: ``InMemoryExporter``
+for tests and ``JsonLinesExporter`` (enabled by ``TRACE_FILE``), which needs no
+collector. With no exporter registered, tracing is a no-op.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio
+import functools
+import logging
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+import orjson
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.config import settings
+from app.monitoring.queries import statement_shape
+from app.monitoring.sql import add_observer
+
+logger = logging.getLogger(__name__)
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class SpanContext(NamedTuple):
+    trace_id: str
+    span_id: str
+    sampled: bool
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    """Parse a W3C traceparent header; None if missing or malformed."""
+    if not value:
+        return None
+    match = _TRACEPARENT.match(value.strip().lower())
+    if match is None:
+        return None
+    trace_id, span_id, flags = match.groups()
+    if trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return SpanContext(trace_id, span_id, bool(int(flags, 16) & 1))
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "status")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str] = None,
+                 attributes: Optional[Dict[str, Any]] = None, start_ns: Optional[int] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.start_ns = start_ns if start_ns is not None else time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = dict(attributes or {})
+        self.status = "ok"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self, end_ns: Optional[int] = None) -> None:
+        self.end_ns = end_ns if end_ns is not None else time.time_ns()
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        return None if self.end_ns is None else (self.end_ns - self.start_ns) / 1e6
+
+    def traceparent(self) -> str:
+        """This span as a W3C traceparent header value."""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+# Marks a context whose trace was not sampled, so child spans are skipped too.
+_UNSAMPLED = object()
+
+_current_span: ContextVar[Any] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    """The innermost active span, if the current trace is sampled."""
+    span = _current_span.get()
+    return span if isinstance(span, Span) else None
+
+
+class InMemoryExporter:
+    """Keeps finished spans in a list, for tests."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def find(self, name: str) -> List[Span]:
+        return [span for span in self.spans if span.name == name]
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+    def shutdown(self) -> None:
+        pass
+
+
+class JsonLinesExporter:
+    """Appends finished spans to a file, one JSON object per line, in batches."""
+
+    def __init__(self, path: str, batch_size: int = 64):
+        self.path = path
+        self.batch_size = batch_size
+        self._buffer: List[bytes] = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = orjson.dumps(span.to_dict())
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) < self.batch_size:
+                return
+            lines, self._buffer = self._buffer, []
+        self._write(lines)
+
+    def flush(self) -> None:
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+        if lines:
+            self._write(lines)
+
+    def _write(self, lines: List[bytes]) -> None:
+        with self._write_lock, open(self.path, "ab") as f:
+            f.write(b"\n".join(lines) + b"\n")
+
+    def shutdown(self) -> None:
+        self.flush()
+
+
+class Tracer:
+    """Creates spans and hands finished ones to the registered exporters."""
+
+    def __init__(self, sample_ratio: float = settings.TRACE_SAMPLE_RATIO):
+        self.sample_ratio = sample_ratio
+        self.exporters: list = []
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters)
+
+    def add_exporter(self, exporter) -> None:
+        self.exporters.append(exporter)
+
+    def remove_exporter(self, exporter) -> None:
+        if exporter in self.exporters:
+            self.exporters.remove(exporter)
+
+    def _export(self, span: Span) -> None:
+        for exporter in list(self.exporters):
+            try:
+                exporter.export(span)
+            except Exception:
+                logger.exception("Span exporter %r failed", exporter)
+
+    def _new_span(self, name: str, attributes: Optional[Dict[str, Any]],
+                  parent: Optional[SpanContext], start_ns: Optional[int] = None) -> Any:
+        """Create a span under ``parent`` or the current span; _UNSAMPLED if the trace is not sampled."""
+        current = _current_span.get()
+        if parent is not None:
+            if not parent.sampled:
+                return _UNSAMPLED
+            return Span(name, parent.trace_id, parent.span_id, attributes, start_ns)
+        if current is _UNSAMPLED:
+            return _UNSAMPLED
+        if current is not None:
+            return Span(name, current.trace_id, current.span_id, attributes, start_ns)
+        if random.random() >= self.sample_ratio:
+            return _UNSAMPLED
+        return Span(name, f"{random.getrandbits(128):032x}", None, attributes, start_ns)
+
+    @contextmanager
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None,
+                   parent: Optional[SpanContext] = None) -> Iterator[Optional[Span]]:
+        """
+        Run the enclosed block in a new span, made current for nested spans.
+
+        Args:
+            name (str): The span name.
+            attributes (dict, optional): Initial attributes.
+            parent (SpanContext, optional): Remote parent, e.g. from a traceparent header;
+                defaults to the current span.
+
+        Yields:
+            Span or None: The span, or None when tracing is off or the trace is not sampled.
+        """
+        if not self.exporters:
+            yield None
+            return
+        span = self._new_span(name, attributes, parent)
+        token = _current_span.set(span)
+        try:
+            yield span if span is not _UNSAMPLED else None
+        except BaseException as e:
+            if span is not _UNSAMPLED:
+                span.status = "error"
+                span.set_attribute("error", repr(e))
+            raise
+        finally:
+            _current_span.reset(token)
+            if span is not _UNSAMPLED:
+                span.end()
+                self._export(span)
+
+    def record_span(self, name: str, start_ns: int, end_ns: int,
+                    attributes: Optional[Dict[str, Any]] = None) -> Optional[Span]:
+        """Record an already finished operation as a child of the current span."""
+        if not self.exporters or _current_span.get() is None:
+            return None
+        span = self._new_span(name, attributes, None, start_ns)
+        if span is _UNSAMPLED:
+            return None
+        span.end(end_ns)
+        self._export(span)
+        return span
+
+    def traced(self, name: Optional[str] = None):
+        """Decorator running a function (sync or async) in a span named after it."""
+        def decorator(func):
+            span_name = name or func.__qualname__
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.start_span(span_name):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.start_span(span_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def shutdown(self) -> None:
+        """Flush every exporter."""
+        for exporter in list(self.exporters):
+            exporter.shutdown()
+
+
+tracer = Tracer()
+if settings.TRACE_FILE:
+    tracer.add_exporter(JsonLinesExporter(settings.TRACE_FILE))
+
+
+@add_observer
+def _record_query(conn, statement, parameters, elapsed: float) -> None:
+    if tracer.enabled and _current_span.get() is not None:
+        end_ns = time.time_ns()
+        tracer.record_span("db.query", end_ns - int(elapsed * 1e9), end_ns, {
+            "db.system": conn.dialect.name,
+            "db.statement": statement_shape(statement),
+        })
+
+
+_handler_start_ns: ContextVar[Optional[int]] = ContextVar("handler_start_ns", default=None)
+
+
+class TracedRoute(APIRoute):
+    """APIRoute that adds spans for request validation and the route function."""
+
+    def get_route_handler(self):
+        call = self.dependant.call
+        span_name = f"route {self.endpoint.__name__}"
+
+        def record_validation() -> None:
+            start_ns = _handler_start_ns.get()
+            if start_ns is not None:
+                tracer.record_span("validate request", start_ns, time.time_ns())
+
+        if asyncio.iscoroutinefunction(call):
+            @functools.wraps(call)
+            async def endpoint(*args, **kwargs):
+                record_validation()
+                with tracer.start_span(span_name):
+                    return await call(*args, **kwargs)
+        else:
+            @functools.wraps(call)
+            def endpoint(*args, **kwargs):
+                record_validation()
+                with tracer.start_span(span_name):
+                    return call(*args, **kwargs)
+        self.dependant.call = endpoint
+        handler = super().get_route_handler()
+
+        async def traced_handler(request):
+            token = _handler_start_ns.set(time.time_ns())
+            try:
+                return await handler(request)
+            finally:
+                _handler_start_ns.reset(token)
+
+        return traced_handler
+
+
+class TracingMiddleware:
+    """ASGI middleware that wraps each request in a server span, continuing incoming traces."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        parent = parse_traceparent(Headers(scope=scope).get("traceparent"))
+        attributes = {"http.method": method, "http.target": scope["path"]}
+        with tracer.start_span(f"HTTP {method}", attributes, parent=parent) as span:
+            if span is None:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    MutableHeaders(scope=message).append("traceresponse", span.traceparent())
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                if route is not None:
+                    span.name = f"{method} {route.path}"
+                    span.set_attribute("http.route", route.path)
@@ -0,0 +1,163 @@
+# app/negotiation.py
+
+"""
+MessagePack content negotiation for API routes.
+
+``NegotiatedRoute`` lets any route accept ``application/msgpack`` request bodies
+and return ``application/msgpack`` responses when ``Accept`` prefers them over
+JSON (media ranges and q-values are honoured, so ``application/msgpack;q=0``
+opts out). Decoded bodies are handed to FastAPI exactly as if they had arrived
+as JSON, so the same Pydantic request models validate them. Responses are
+packed straight from the route's serialized return value, never by decoding
+rendered JSON; routes that build their own ``Response`` use ``msgpack_wanted``
+and ``to_msgpack``. Every JSON or MessagePack response from a negotiated route
+carries ``Vary: Accept``. Error responses produced by exception handlers stay JSON.
+"""
+
+from contextvars import ContextVar
+from typing import Any, Callable, Coroutine, Dict, Optional
+
+import msgpack
+from fastapi import HTTPException, Request, Response
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+MSGPACK = MSGPACK_MEDIA_TYPES[0]
+# Ranges in Accept that JSON, the default representation, satisfies.
+JSON_RANGES = ("application/json", "application/*", "*/*")
+# Responses whose representation was chosen from Accept.
+NEGOTIATED_MEDIA_TYPES = ("application/json", MSGPACK)
+
+_msgpack_wanted: ContextVar[bool] = ContextVar("msgpack_wanted", default=False)
+
+
+def is_msgpack(media_type: str) -> bool:
+    """Whether a Content-Type header names MessagePack."""
+    return media_type.partition(";")[0].strip().lower() in MSGPACK_MEDIA_TYPES
+
+
+def _media_ranges(accept: str) -> Dict[str, float]:
+    """Parse Accept into {media range: q}, keeping the highest q per range."""
+    ranges: Dict[str, float] = {}
+    for part in accept.split(","):
+        media_range, *params = part.split(";")
+        media_range = media_range.strip().lower()
+        if not media_range:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = min(max(float(value), 0.0), 1.0)
+                except ValueError:
+                    q = 0.0
+        ranges[media_range] = max(q, ranges.get(media_range, 0.0))
+    return ranges
+
+
+def accepts_msgpack(accept: str) -> bool:
+    """
+    Whether an Accept header prefers MessagePack to JSON.
+
+    MessagePack must be named explicitly with a non-zero q (wildcards mean
+    JSON) and rank at least as high as the best range JSON satisfies.
+    """
+    ranges = _media_ranges(accept)
+    msgpack_q = max((ranges.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES), default=0.0)
+    json_q = max((ranges.get(media_range, 0.0) for media_range in JSON_RANGES), default=0.0)
+    return msgpack_q > 0 and msgpack_q >= json_q
+
+
+def msgpack_wanted() -> bool:
+    """Whether the request being handled by a NegotiatedRoute asked for MessagePack."""
+    return _msgpack_wanted.get()
+
+
+def packb(data: Any) -> bytes:
+    """Encode data as MessagePack."""
+    return msgpack.packb(data, use_bin_type=True)
+
+
+def unpackb(data: bytes) -> Any:
+    """Decode MessagePack data."""
+    return msgpack.unpackb(data, raw=False)
+
+
+class MsgPackResponse(Response):
+    """A response whose content is packed as MessagePack."""
+
+    media_type = MSGPACK
+
+    def render(self, content: Any) -> bytes:
+        return packb(content)
+
+
+class MsgPackRequest(Request):
+    """A request whose MessagePack body is presented to FastAPI as already-parsed JSON."""
+
+    @classmethod
+    async def from_request(cls, request: Request) -> "MsgPackRequest":
+        body = await request.body()
+        try:
+            decoded = unpackb(body) if body else None
+        except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError):
+            raise HTTPException(status_code=400, detail="Invalid MessagePack body")
+
+        headers = [(k, v) for k, v in request.scope["headers"] if k != b"content-type"]
+        headers.append((b"content-type", b"application/json"))
+        negotiated = cls({**request.scope, "headers": headers}, request.receive)
+        negotiated._body = body
+        negotiated._json = decoded
+        return negotiated
+
+
+class NegotiatedRoute(APIRoute):
+    """APIRoute that speaks MessagePack as well as JSON."""
+
+    def _msgpack_route_handler(self) -> Optional[Callable[[Request], Coroutine[Any, Any, Response]]]:
+        """The route handler again, serializing into MsgPackResponse; None for non-JSON routes."""
+        response_class = self.response_class
+        actual = response_class.value if isinstance(response_class, DefaultPlaceholder) else response_class
+        if not issubclass(actual, JSONResponse):
+            return None
+        self.response_class = MsgPackResponse
+        try:
+            return super().get_route_handler()
+        finally:
+            self.response_class = response_class
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+        msgpack_handler = self._msgpack_route_handler()
+
+        async def negotiated_handler(request: Request) -> Response:
+            if is_msgpack(request.headers.get("content-type", "")):
+                request = await MsgPackRequest.from_request(request)
+            wanted = accepts_msgpack(request.headers.get("accept", ""))
+            token = _msgpack_wanted.set(wanted)
+            try:
+                response = await (msgpack_handler if wanted and msgpack_handler else handler)(request)
+            finally:
+                _msgpack_wanted.reset(token)
+            # JSON or MessagePack depends on Accept either way, so shared caches must key on it
+            if response.headers.get("content-type", "").startswith(NEGOTIATED_MEDIA_TYPES):
+                _add_vary(response, "Accept")
+            return response
+
+        return negotiated_handler
+
+
+def _add_vary(response: Response, header: str) -> None:
+    """Add ``header`` to the response's Vary, keeping any it already names."""
+    existing = [value.strip() for value in response.headers.get("vary", "").split(",") if value.strip()]
+    if header.lower() not in (value.lower() for value in existing):
+        response.headers["vary"] = ", ".join(existing + [header])
+
+
+def to_msgpack(model: BaseModel, status_code: int = 200) -> Response:
+    """Pack a model's ``model_dump()`` as a MessagePack response."""
+    return MsgPackResponse(model.model_dump(mode="json"), status_code=status_code, headers={"vary": "Accept"})
@@ -11,7 +11,10 @@ Functions:
 - add(a: Union[int, float], b: Union[int, float]) -> Union[int, float]: Returns the sum of a and b.
 - subtract(a: Union[int, float], b: Union[int, float]) -> Union[int, float]: Returns the difference when b is subtracted from a.
 - multiply(a: Union[int, float], b: Union[int, float]) -> Union[int, float]: Returns the product of a and b.
-- divide(a: Union[int, float], b: Union[int, float]) -> float: Returns the quotient when a is divided by b. Raises ValueError if b is zero.
+- divide(a: Union[int, float], b: Union[int, float]) -> float: Returns the quotient when a is divided by b. Raises DivisionByZeroError if b is zero.
+
+Exceptions:
+- DivisionByZeroError: A ValueError raised for a zero divisor, so callers can tell it from other invalid input.
 
 Usage:
 These functions can be imported and used in other modules or integrated into APIs
@@ -23,6 +26,9 @@ from typing import Union  # Import Union for type hinting multiple possible type
 # Define a type alias for numbers that can be either int or float
 Number = Union[int, float]
 
+class DivisionByZeroError(ValueError):
+    """Raised when a divisor is zero."""
+
 def add(a: Number, b: Number) -> Number:
     """
     Add two numbers and return the result.
@@ -98,22 +104,22 @@ def divide(a: Number, b: Number) -> float:
     - float: The quotient of a divided by b.
 
     Raises:
-    - ValueError: If b is zero, as division by zero is undefined.
+    - DivisionByZeroError: If b is zero, as division by zero is undefined.
 
     Example:
     >>> divide(6, 3)
     2.0
     >>> divide(5.5, 2)
     2.75
-    >>> divide(5, 0)
+    >>> divide(5, 0)  # doctest: +IGNORE_EXCEPTION_DETAIL
     Traceback (most recent call last):
         ...
-    ValueError: Cannot divide by zero!
+    app.operations.DivisionByZeroError: Cannot divide by zero!
     """
     # Check if the divisor is zero to prevent division by zero
     if b == 0:
-        # Raise a ValueError with a descriptive message
-        raise ValueError("Cannot divide by zero!")
+        # Raise a DivisionByZeroError (a ValueError) with a descriptive message
+        raise DivisionByZeroError("Cannot divide by zero!")
     
     # Perform division of a by b and return the result as a float
     result = a / b
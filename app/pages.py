@@ -0,0 +1,153 @@
+# app/pages.py
+
+"""
+Prerendered static pages.
+
+``PrerenderedPage`` renders a template once, minifies it, and keeps identity,
+gzip and brotli encodings in memory. Each request is answered by picking an
+encoding from ``Accept-Encoding`` and copying bytes out, with a strong ETag per
+encoding and ``Cache-Control``, and with an empty 304 when ``If-None-Match``
+already names the variant that would be sent. With ``reload`` on
+(development), the page is re-rendered whenever the template file changes.
+"""
+
+import gzip
+import hashlib
+import re
+from typing import Any, Dict, Optional
+
+import brotli
+from fastapi import Request, Response
+from jinja2 import Environment
+
+from app.config import settings
+
+_COMMENT = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+_BLOCK_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+_SCRIPT_OR_STYLE = re.compile(r"(<(script|style)\b[^>]*>)(.*?)(</\2>)", re.DOTALL | re.IGNORECASE)
+_PRESERVED = re.compile(r"<(pre|textarea)\b.*?</\1>", re.DOTALL | re.IGNORECASE)
+
+# Preferred first; identity is always available.
+ENCODINGS = ("br", "gzip")
+
+
+def _minify_code(match: "re.Match") -> str:
+    open_tag, _, body, close_tag = match.groups()
+    body = _BLOCK_COMMENT.sub("", body)
+    # Only whole-line // comments are dropped, so "//" inside strings and URLs is safe.
+    lines = [line.strip() for line in body.splitlines()]
+    body = "\n".join(line for line in lines if line and not line.startswith("//"))
+    return f"{open_tag}{body}{close_tag}"
+
+
+def minify_html(html: str) -> str:
+    """
+    Remove HTML, CSS and whole-line JS comments and indentation.
+
+    Line breaks are kept (one per non-empty line), so inline whitespace between
+    elements and JavaScript automatic semicolon insertion behave as before.
+    ``<pre>`` and ``<textarea>`` content is left untouched.
+    """
+    preserved = []
+
+    def stash(match: "re.Match") -> str:
+        preserved.append(match.group(0))
+        return f"\x00{len(preserved) - 1}\x00"
+
+    html = _PRESERVED.sub(stash, html)
+    html = _COMMENT.sub("", html)
+    html = _SCRIPT_OR_STYLE.sub(_minify_code, html)
+    html = "\n".join(line.strip() for line in html.splitlines() if line.strip())
+    return re.sub(r"\x00(\d+)\x00", lambda m: preserved[int(m.group(1))], html)
+
+
+def _accepted(accept_encoding: str) -> Dict[str, float]:
+    """Parse Accept-Encoding into {coding: q}."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+class PrerenderedPage:
+    """A template rendered once and served from memory in every encoding."""
+
+    def __init__(self, env: Environment, template_name: str, context: Optional[Dict[str, Any]] = None,
+                 reload: bool = settings.TEMPLATE_AUTO_RELOAD,
+                 cache_control: str = settings.PAGE_CACHE_CONTROL):
+        """
+        Args:
+            env (Environment): Jinja environment that loads the template.
+            template_name (str): Template to render.
+            context (dict, optional): Variables for the template.
+            reload (bool): Re-render when the template file changes (development).
+            cache_control (str): Cache-Control header sent with the page.
+        """
+        self.env = env
+        self.template_name = template_name
+        self.context = context or {}
+        self.reload = reload
+        self.cache_control = cache_control
+        self.render()
+
+    def render(self) -> None:
+        """Render, minify and compress the page."""
+        _, _, uptodate = self.env.loader.get_source(self.env, self.template_name)
+        html = minify_html(self.env.get_template(self.template_name).render(**self.context))
+        body = html.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.bodies = {
+            "identity": body,
+            "gzip": gzip.compress(body, compresslevel=9, mtime=0),
+            "br": brotli.compress(body, quality=11),
+        }
+        self.etags = {
+            coding: f'"{digest}"' if coding == "identity" else f'"{digest}-{coding}"'
+            for coding in self.bodies
+        }
+        self._uptodate = uptodate
+
+    def _choose_encoding(self, accept_encoding: str) -> str:
+        accepted = _accepted(accept_encoding)
+        wildcard = accepted.get("*", 0.0)
+        best, best_q = "identity", 0.0
+        for coding in ENCODINGS:
+            q = accepted.get(coding, wildcard)
+            if q > best_q:
+                best, best_q = coding, q
+        return best
+
+    def _not_modified(self, if_none_match: str, encoding: str) -> bool:
+        """Whether If-None-Match names the variant that would be sent, so its ETag fits the 304."""
+        if if_none_match.strip() == "*":
+            return True
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return self.etags[encoding] in candidates
+
+    def response(self, request: Request) -> Response:
+        """Serve the page for ``request``: 304, or the best encoding with validators."""
+        if self.reload and self._uptodate is not None and not self._uptodate():
+            self.render()
+
+        encoding = self._choose_encoding(request.headers.get("accept-encoding", ""))
+        headers = {
+            "ETag": self.etags[encoding],
+            "Cache-Control": self.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and self._not_modified(if_none_match, encoding):
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=self.bodies[encoding], media_type="text/html", headers=headers)
@@ -1,7 +1,7 @@
 # app/schemas/calculation.py
 
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional
+from pydantic import BaseModel, Field, ConfigDict, model_validator
+from typing import Dict, List, Optional
 from uuid import UUID
 from datetime import datetime
 
@@ -38,8 +38,18 @@ class CalculationUpdate(BaseModel):
     
     """
     inputs: Optional[List[float]] = Field(None, description="Updated list of input numbers for the calculation", example=[4.0, 5.0])
+    append: Optional[List[float]] = Field(None, description="Numbers to append to the existing inputs", example=[6.0])
+    patch: Optional[Dict[int, float]] = Field(None, description="Replacement values keyed by input index", example={0: 2.0})
     
     model_config = ConfigDict(from_attributes=True)
+
+    @model_validator(mode="after")
+    def validate_single_mode(self) -> "CalculationUpdate":
+        """Only one of inputs, append or patch may be given."""
+        given = [name for name in ("inputs", "append", "patch") if getattr(self, name) is not None]
+        if len(given) > 1:
+            raise ValueError(f"Only one of inputs, append or patch may be given, got: {', '.join(given)}")
+        return self
     
 class CalculationResponse(CalculationBase):
     """
@@ -50,6 +60,7 @@ class CalculationResponse(CalculationBase):
     user_id: UUID = Field(..., description="ID of the user who created the calculation", example="123e4567-e89b-12d3-a456-426614174000")
     created_at: datetime = Field(..., description="Timestamp when the calculation was created", example="2023-10-01T12:00:00Z")
     updated_at: datetime = Field(..., description="Timestamp when the calculation was last updated", example="2023-10-01T12:30:00Z")
+    result: Optional[float] = Field(None, description="Stored result of the calculation, if computed", example=6.0)
     
     model_config = ConfigDict(from_attributes=True)
     
\ No newline at end of file
@@ -0,0 +1,97 @@
+# benchmarks/bench_operation_response.py
+
+"""
+Per-request overhead of the operation routes, before and after the fast
+response path.
+
+"before" is a route built the way main.py used to build them: it returns an
+OperationResponse model with response_model set, so FastAPI validates and
+serializes the result a second time through jsonable_encoder + JSONResponse.
+"after" is the /add route from main.py. The "before" route is mounted on the
+same app, so both requests pass through the same middleware and route class
+and the difference is only the response path.
+
+Usage:
+    python benchmarks/bench_operation_response.py [requests]
+"""
+
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from main import app, OperationRequest, OperationResponse, operation_response  # noqa: E402
+from app.monitoring.metrics import record_operation  # noqa: E402
+from app.operations import add  # noqa: E402
+
+LEGACY_PATH = "/bench/legacy-add"
+
+
+@app.post(LEGACY_PATH, response_model=OperationResponse, include_in_schema=False)
+async def legacy_add_route(operation: OperationRequest):
+    record_operation("add", 2)
+    return OperationResponse(result=add(operation.a, operation.b))
+
+
+def time_requests(client: TestClient, paths: tuple, requests: int) -> list:
+    """
+    Return the median per-request time in microseconds for each path.
+
+    Rounds alternate between the paths, so drift (warm caches, a busier
+    machine) affects both equally.
+    """
+    payload = {"a": 10.5, "b": 5.25}
+    for path in paths:
+        for _ in range(100):
+            client.post(path, json=payload)
+    rounds = {path: [] for path in paths}
+    for _ in range(5):
+        for path in paths:
+            start = time.perf_counter()
+            for _ in range(requests):
+                client.post(path, json=payload)
+            rounds[path].append((time.perf_counter() - start) / requests * 1e6)
+    return [statistics.median(rounds[path]) for path in paths]
+
+
+def time_serialization(iterations: int = 100_000) -> tuple:
+    """Return (framework path, precompiled path) serialization cost in microseconds."""
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        model = OperationResponse.model_validate(OperationResponse(result=15.75))
+        JSONResponse(jsonable_encoder(model))
+    framework = (time.perf_counter() - start) / iterations * 1e6
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        operation_response(15.75)
+    precompiled = (time.perf_counter() - start) / iterations * 1e6
+    return framework, precompiled
+
+
+def main() -> None:
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # one INFO record per request otherwise
+    with TestClient(app) as client:
+        before, after = time_requests(client, (LEGACY_PATH, "/add"), requests)
+    framework, precompiled = time_serialization()
+
+    print(f"POST /add, {requests} requests x 5 rounds (median per request)")
+    print(f"  before (response_model re-validation): {before:8.1f} us")
+    print(f"  after  (precompiled, no re-validation): {after:8.1f} us")
+    print(f"  saved: {before - after:8.1f} us ({(before - after) / before:.0%})")
+    print("Response serialization only")
+    print(f"  framework path:   {framework:6.2f} us")
+    print(f"  precompiled path: {precompiled:6.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,79 @@
 # main.py
 
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
+import asyncio
+from contextlib import asynccontextmanager
+import os
+
+from fastapi import Depends, FastAPI, HTTPException, Request, WebSocket
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.templating import Jinja2Templates
-from pydantic import BaseModel, Field, field_validator  # Use @validator for Pydantic 1.x
+from pydantic import BaseModel, Field, TypeAdapter, field_validator  # Use @validator for Pydantic 1.x
 from fastapi.exceptions import RequestValidationError
+from starlette.concurrency import run_in_threadpool
+from app.auth.last_login import last_login_recorder
+from app.auth.passwords import password_service, PasswordServiceBusy
+from app.auth.rate_limit import RateLimitExceeded
+from app.calculate_socket import CalculateSocket
+from app.config import settings
+from app.database import SessionLocal, engine, get_db
+from app.monitoring.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, record_operation, record_operation_error,
+    registry as metrics_registry,
+)
+from app.monitoring.admin import is_admin_token, router as admin_router
+from app.monitoring.health import health
+from app.monitoring.log_pipeline import setup_logging
+from app.monitoring.profiler import ProfileRequestMiddleware
+from app.monitoring.queries import QueryBudgetRoute
+from app.monitoring.slow_queries import slow_query_log
+from app.monitoring.timing import ServerTimingMiddleware, TimedRoute
+from app.monitoring.tracing import TracedRoute, TracingMiddleware, tracer
+from app.negotiation import NegotiatedRoute, msgpack_wanted, to_msgpack
+from app.models.user import User
+from app.pages import PrerenderedPage
+from app.schemas.base import UserCreate, UserLogin
+from app.schemas.user import Token, UserResponse
 from app.operations import add, subtract, multiply, divide  # Ensure correct import path
 import uvicorn
 import logging
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
+# Setup logging: queue-based, structured and sampled (see app/monitoring/log_pipeline.py)
+setup_logging()
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background services and the warm-up on startup and stop them on shutdown."""
+    if settings.BCRYPT_TARGET_MS:
+        await run_in_threadpool(password_service.calibrate, settings.BCRYPT_TARGET_MS)
+    if settings.LAST_LOGIN_FLUSH_SECONDS > 0:
+        last_login_recorder.start(SessionLocal, settings.LAST_LOGIN_FLUSH_SECONDS)
+    # /ready reports false until the warm-up has run
+    health.reset()
+    warm_up = asyncio.create_task(health.warm_up(app, engine))
+    yield
+    warm_up.cancel()
+    await run_in_threadpool(last_login_recorder.stop)
+    password_service.shutdown()
+    slow_query_log.shutdown()
+    tracer.shutdown()
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+
+class AppRoute(TracedRoute, TimedRoute, QueryBudgetRoute, NegotiatedRoute):
+    """Routes with tracing, timing breakdowns, query budgets and MessagePack negotiation."""
+
+app.router.route_class = AppRoute
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfileRequestMiddleware, authorize=is_admin_token)
+app.include_router(admin_router)
 
-# Setup templates directory
-templates = Jinja2Templates(directory="templates")
+# Setup templates directory, relative to this file so importing main works from any directory
+templates = Jinja2Templates(directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates"))
+# The index page is static: render, minify and compress it once
+index_page = PrerenderedPage(templates.env, "index.html")
 
 # Pydantic model for request data
 class OperationRequest(BaseModel):
@@ -37,11 +94,23 @@ class OperationResponse(BaseModel):
 class ErrorResponse(BaseModel):
     error: str = Field(..., description="Error message")
 
+# Precompiled serializer for the hot path: routes return a ready Response, so
+# FastAPI skips re-validating and re-serializing through response_model, which
+# stays declared only for the OpenAPI schema.
+operation_response_json = TypeAdapter(OperationResponse).dump_json
+
+def operation_response(result: float) -> Response:
+    """Serialize an operation result once, without re-validation, as JSON or MessagePack."""
+    response = OperationResponse.model_construct(result=result)
+    if msgpack_wanted():
+        return to_msgpack(response)
+    return Response(content=operation_response_json(response), media_type="application/json")
+
 # Custom Exception Handlers
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
-    logger.error(f"HTTPException on {request.url.path}: {exc.detail}")
-    return JSONResponse(
+    logger.error("HTTPException on %s: %s", request.url.path, exc.detail)
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={"error": exc.detail},
     )
@@ -50,18 +119,83 @@ async def http_exception_handler(request: Request, exc: HTTPException):
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     # Extracting error messages
     error_messages = "; ".join([f"{err['loc'][-1]}: {err['msg']}" for err in exc.errors()])
-    logger.error(f"ValidationError on {request.url.path}: {error_messages}")
-    return JSONResponse(
+    logger.error("ValidationError on %s: %s", request.url.path, error_messages)
+    return ORJSONResponse(
         status_code=400,
         content={"error": error_messages},
     )
 
+@app.exception_handler(PasswordServiceBusy)
+async def password_service_busy_handler(request: Request, exc: PasswordServiceBusy):
+    logger.error("PasswordServiceBusy on %s: %s", request.url.path, exc)
+    return ORJSONResponse(
+        status_code=503,
+        content={"error": str(exc)},
+        headers={"Retry-After": "1"},
+    )
+
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
+    logger.error("RateLimitExceeded on %s: %s", request.url.path, exc.key)
+    return ORJSONResponse(
+        status_code=429,
+        content={"error": str(exc)},
+        headers={"Retry-After": str(int(exc.retry_after) + 1)},
+    )
+
 @app.get("/")
 async def read_root(request: Request):
     """
-    Serve the index.html template.
+    Serve the prerendered index.html template.
+    """
+    return index_page.response(request)
+
+@app.get("/health", include_in_schema=False)
+async def health_check():
+    """
+    Liveness: the process is up and serving requests.
+    """
+    return {"status": "ok"}
+
+@app.get("/ready", include_in_schema=False)
+async def readiness_check():
+    """
+    Readiness: warm-up finished and the database is reachable through the pool.
     """
-    return templates.TemplateResponse("index.html", {"request": request})
+    ready, report = await health.readiness(engine)
+    return ORJSONResponse(report, status_code=200 if ready else 503)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Expose metrics in the Prometheus text format.
+    """
+    return Response(content=metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.post("/register", response_model=UserResponse, status_code=201, responses={400: {"model": ErrorResponse}})
+async def register_route(user_data: UserCreate, db=Depends(get_db)):
+    """
+    Register a new user.
+    """
+    try:
+        user = await User.register_async(db, user_data.model_dump())
+        await run_in_threadpool(db.commit)
+    except ValueError as e:
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(status_code=400, detail=str(e))
+    # Reading the committed (expired) user reloads it, so that too stays off the loop
+    return await run_in_threadpool(UserResponse.model_validate, user)
+
+@app.post("/login", response_model=Token, responses={401: {"model": ErrorResponse}})
+async def login_route(credentials: UserLogin, request: Request, db=Depends(get_db)):
+    """
+    Log in with a username (or email) and password.
+    """
+    client_ip = request.client.host if request.client else None
+    token = await User.authenticate_async(db, credentials.username, credentials.password, client_ip=client_ip)
+    if token is None:
+        raise HTTPException(status_code=401, detail="Invalid username or password")
+    return token
 
 @app.post("/add", response_model=OperationResponse, responses={400: {"model": ErrorResponse}})
 async def add_route(operation: OperationRequest):
@@ -69,10 +203,11 @@ async def add_route(operation: OperationRequest):
     Add two numbers.
     """
     try:
+        record_operation("add", 2)
         result = add(operation.a, operation.b)
-        return OperationResponse(result=result)
+        return operation_response(result)
     except Exception as e:
-        logger.error(f"Add Operation Error: {str(e)}")
+        logger.error("Add Operation Error: %s", e)
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.post("/subtract", response_model=OperationResponse, responses={400: {"model": ErrorResponse}})
@@ -81,10 +216,11 @@ async def subtract_route(operation: OperationRequest):
     Subtract two numbers.
     """
     try:
+        record_operation("subtract", 2)
         result = subtract(operation.a, operation.b)
-        return OperationResponse(result=result)
+        return operation_response(result)
     except Exception as e:
-        logger.error(f"Subtract Operation Error: {str(e)}")
+        logger.error("Subtract Operation Error: %s", e)
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.post("/multiply", response_model=OperationResponse, responses={400: {"model": ErrorResponse}})
@@ -93,10 +229,11 @@ async def multiply_route(operation: OperationRequest):
     Multiply two numbers.
     """
     try:
+        record_operation("multiply", 2)
         result = multiply(operation.a, operation.b)
-        return OperationResponse(result=result)
+        return operation_response(result)
     except Exception as e:
-        logger.error(f"Multiply Operation Error: {str(e)}")
+        logger.error("Multiply Operation Error: %s", e)
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.post("/divide", response_model=OperationResponse, responses={400: {"model": ErrorResponse}})
@@ -105,14 +242,28 @@ async def divide_route(operation: OperationRequest):
     Divide two numbers.
     """
     try:
+        record_operation("divide", 2)
         result = divide(operation.a, operation.b)
-        return OperationResponse(result=result)
+        return operation_response(result)
     except ValueError as e:
-        logger.error(f"Divide Operation Error: {str(e)}")
+        record_operation_error("divide", e)
+        logger.error("Divide Operation Error: %s", e)
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Divide Operation Internal Error: {str(e)}")
+        logger.error("Divide Operation Internal Error: %s", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
+# Pipelined operations over one connection, validated and computed like the routes above
+calculate_socket = CalculateSocket(
+    OperationRequest, {"add": add, "subtract": subtract, "multiply": multiply, "divide": divide},
+)
+
+@app.websocket("/ws/calculate")
+async def calculate_websocket(websocket: WebSocket):
+    """
+    Answer operation messages tagged with request IDs.
+    """
+    await calculate_socket.serve(websocket)
+
 if __name__ == "__main__":
     uvicorn.run(app, host="127.0.0.1", port=8000)
@@ -14,11 +14,15 @@ from sqlalchemy import create_engine, text, event
 from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 
+from app.auth.rate_limit import login_limiter
+from app.auth.revocation import revocation_list
+from app.auth.user_cache import user_cache, user_versions
 from app.database import Base, get_engine, get_sessionmaker
-from app.models.user import User
+from app.models.user import User, token_cache
 from app.models.calculation import Calculation, Addition, Subtraction, Multiplication, Division
 from app.config import settings
 from app.database_init import init_db, drop_db
+from app.monitoring.queries import QueryCounter, assert_queries, inspect_queries
 
 # ======================================================================================
 # Logging Configuration
@@ -191,6 +195,51 @@ def db_session_real_commits(request) -> Generator[Session, None, None]:
         session.close()
         logger.info("db_session_real_commits teardown: done.")
         
+# ======================================================================================
+# In-Process Cache Fixtures
+# ======================================================================================
+@pytest.fixture(autouse=True)
+def clear_auth_caches():
+    """
+    Start every test with empty token, user and revocation caches and login
+    limits, so state from one test (e.g. a mocked user) cannot leak into another.
+    """
+    token_cache.clear()
+    user_cache.clear()
+    user_versions.clear()
+    revocation_list.reset()
+    login_limiter.reset()
+    yield
+    token_cache.clear()
+    user_cache.clear()
+    user_versions.clear()
+    revocation_list.reset()
+    login_limiter.reset()
+
+# ======================================================================================
+# Query Budget Fixtures
+# ======================================================================================
+@pytest.fixture
+def query_counter() -> Generator[QueryCounter, None, None]:
+    """
+    Count the SQL statements run during the test, including those run by the
+    app behind a TestClient.
+    """
+    with inspect_queries(all_threads=True) as counter:
+        yield counter
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    """
+    Enforce @pytest.mark.query_budget(max_queries, max_repeats=...) on the test
+    body only, so fixture setup queries do not count against the budget.
+    """
+    marker = item.get_closest_marker("query_budget")
+    if marker is None:
+        return (yield)
+    with assert_queries(*marker.args, all_threads=True, **marker.kwargs):
+        return (yield)
+
 # ======================================================================================
 # Test Data Fixtures
 # ======================================================================================
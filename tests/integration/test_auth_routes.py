@@ -0,0 +1,76 @@
+# tests/integration/test_auth_routes.py
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.auth.passwords import password_service
+from main import app
+
+
+@pytest.fixture
+def client(db_session_real_commits):
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def registered(client, fake_user_data):
+    fake_user_data['password'] = "TestPass123"
+    response = client.post("/register", json=fake_user_data)
+    assert response.status_code == 201
+    return fake_user_data
+
+
+def test_register_returns_the_user(registered, client):
+    response = client.post("/register", json=registered)
+    assert response.status_code == 400
+    assert response.json() == {"error": "Username or email already exists"}
+
+
+def test_login_issues_a_token(registered, client):
+    response = client.post("/login", json={"username": registered['username'], "password": "TestPass123"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["token_type"] == "bearer"
+    assert body["user"]["username"] == registered['username']
+
+
+def test_login_rejects_wrong_password(registered, client):
+    response = client.post("/login", json={"username": registered['username'], "password": "WrongPass123"})
+    assert response.status_code == 401
+
+
+def test_login_goes_through_the_password_service(registered, client):
+    with patch.object(password_service, "verify_and_update", wraps=password_service.verify_and_update) as verify:
+        client.post("/login", json={"username": registered['username'], "password": "TestPass123"})
+    verify.assert_called_once()
+
+
+def test_busy_password_service_sheds_logins(registered, client):
+    with patch.object(password_service, "max_pending", 0):
+        response = client.post("/login", json={"username": registered['username'], "password": "TestPass123"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+def test_register_and_login_query_off_the_event_loop(client, fake_user_data):
+    on_loop = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        on_loop.append(asyncio._get_running_loop() is not None)
+
+    fake_user_data['password'] = "TestPass123"
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        assert client.post("/register", json=fake_user_data).status_code == 201
+        assert client.post(
+            "/login", json={"username": fake_user_data['username'], "password": "TestPass123"}
+        ).status_code == 200
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+    assert on_loop and not any(on_loop)
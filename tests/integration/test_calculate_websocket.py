@@ -0,0 +1,106 @@
+# tests/integration/test_calculate_websocket.py
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.calculate_socket import CalculateSocket
+from app.negotiation import packb, unpackb
+from app.operations import add, divide
+from main import OperationRequest, app
+
+
+@pytest.fixture
+def ws():
+    with TestClient(app) as client:
+        with client.websocket_connect("/ws/calculate") as websocket:
+            yield websocket
+
+
+def test_pipelined_messages_are_answered_by_id(ws):
+    for i in range(50):
+        ws.send_json({"id": i, "operation": "multiply", "a": i, "b": 2})
+    replies = [ws.receive_json() for _ in range(50)]
+    assert replies == [{"id": i, "result": i * 2.0} for i in range(50)]
+
+
+@pytest.mark.parametrize("message, error", [
+    ({"id": "d", "operation": "divide", "a": 1, "b": 0}, "Cannot divide by zero!"),
+    ({"id": "v", "operation": "add", "a": "x", "b": 1}, "a: Input should be a valid number, unable to parse string as a number"),
+    ({"id": "o", "operation": "power", "a": 1, "b": 1}, "Unknown operation: power"),
+])
+def test_errors_are_reported_per_message(ws, message, error):
+    ws.send_json(message)
+    assert ws.receive_json() == {"id": message["id"], "error": error}
+
+
+def test_invalid_frames(ws):
+    ws.send_text("not json")
+    assert ws.receive_json() == {"id": None, "error": "Invalid JSON"}
+    ws.send_json([1])
+    assert ws.receive_json() == [{"id": None, "error": "Message must be an object"}]
+
+
+def test_batch_frame(ws):
+    ws.send_json([
+        {"id": 1, "operation": "add", "a": 1, "b": 2},
+        {"id": 2, "operation": "subtract", "a": 1, "b": 2},
+    ])
+    assert ws.receive_json() == [{"id": 1, "result": 3.0}, {"id": 2, "result": -1.0}]
+
+
+def test_msgpack_frames(ws):
+    ws.send_bytes(packb({"id": "m", "operation": "divide", "a": 9, "b": 3}))
+    assert unpackb(ws.receive_bytes()) == {"id": "m", "result": 3.0}
+    ws.send_bytes(b"\xc1")
+    assert unpackb(ws.receive_bytes()) == {"id": None, "error": "Invalid MessagePack"}
+
+
+def test_oversized_batch_is_rejected():
+    socket = CalculateSocket(OperationRequest, {"add": add}, max_batch=2)
+    binary, reply = socket.reply({"type": "websocket.receive", "text": "[{}, {}, {}]"})
+    assert reply == {"id": None, "error": "Batch larger than 2 messages"}
+
+
+class SlowClientSocket:
+    """A WebSocket whose client never reads until released."""
+
+    def __init__(self, messages):
+        self.incoming = list(messages)
+        self.received = 0
+        self.sent = []
+        self.release = asyncio.Event()
+
+    async def accept(self):
+        pass
+
+    async def receive(self):
+        if not self.incoming:
+            await self.release.wait()
+            await asyncio.sleep(0.01)
+            return {"type": "websocket.disconnect", "code": 1000}
+        self.received += 1
+        return {"type": "websocket.receive", "text": self.incoming.pop(0)}
+
+    async def send(self, message):
+        await self.release.wait()
+        self.sent.append(message)
+
+
+def test_full_send_queue_stops_reading():
+    messages = ['{"id": %d, "operation": "divide", "a": 1, "b": 1}' % i for i in range(10)]
+    websocket = SlowClientSocket(messages)
+    socket = CalculateSocket(OperationRequest, {"divide": divide}, send_queue_size=2)
+
+    async def run():
+        serving = asyncio.create_task(socket.serve(websocket))
+        await asyncio.sleep(0.05)
+        # One reply is stuck in send and two fill the queue; the fourth message waits to be queued.
+        assert websocket.received == 4
+        websocket.release.set()
+        await asyncio.wait_for(serving, 1)
+
+    asyncio.run(run())
+    assert websocket.received == 10
+    assert len(websocket.sent) == 10
@@ -0,0 +1,135 @@
+# tests/integration/test_calculation_chunk.py
+
+import math
+import uuid
+
+import pytest
+from sqlalchemy import inspect, text
+
+from app.database import SessionLocal
+from app.database_init import upgrade_db
+from app.models.calculation import Calculation, Addition, Division
+from app.models.calculation_chunk import (
+    CalculationChunk,
+    iter_chunk_values,
+    recompute_partials,
+    replace_chunk,
+)
+from app.models.user import User
+
+
+@pytest.mark.parametrize(
+    "calculation_type, inputs",
+    [
+        ("addition", [float(i) for i in range(1, 26)]),
+        ("subtraction", [1000.0] + [float(i) for i in range(1, 26)]),
+        ("multiplication", [1.5, 2.0, -1.0, 4.0, 0.5, 3.0, 2.0]),
+        ("division", [1e6, 2.0, 5.0, 4.0, 10.0, 2.5, 8.0]),
+    ],
+)
+def test_chunked_result_matches_inline(db_session, test_user, calculation_type, inputs):
+    """A chunked calculation produces the same result as the JSON-backed one."""
+    inline = Calculation.create(calculation_type, test_user.id, inputs)
+    chunked = Calculation.create_chunked(db_session, calculation_type, test_user.id, iter(inputs), chunk_size=4)
+    db_session.commit()
+
+    assert chunked.is_chunked
+    assert chunked.inputs == []
+    assert chunked.input_data['chunked']['count'] == len(inputs)
+    assert chunked.chunks.count() == -(-len(inputs) // 4)
+    assert chunked.get_result() == pytest.approx(inline.get_result())
+
+
+def test_chunk_values_stream_in_order(db_session, test_user):
+    inputs = [float(i) for i in range(10)]
+    calc = Calculation.create_chunked(db_session, 'addition', test_user.id, inputs, chunk_size=3)
+    chunks = [list(values) for values in iter_chunk_values(db_session, calc.id)]
+    assert chunks == [[0.0, 1.0, 2.0], [3.0, 4.0, 5.0], [6.0, 7.0, 8.0], [9.0]]
+
+
+def test_chunked_division_by_zero(db_session, test_user):
+    calc = Calculation.create_chunked(db_session, 'division', test_user.id, [0.0, 1.0, 2.0, 0.0], chunk_size=2)
+    assert isinstance(calc, Division)
+    with pytest.raises(ValueError, match="Division by zero is not allowed"):
+        calc.get_result()
+
+
+def test_chunked_division_head_may_be_zero(db_session, test_user):
+    """The first input is the dividend, not a divisor."""
+    calc = Calculation.create_chunked(db_session, 'division', test_user.id, [0.0, 1.0, 2.0], chunk_size=2)
+    assert calc.get_result() == 0.0
+
+
+def test_chunked_subtraction_requires_two_inputs(db_session, test_user):
+    calc = Calculation.create_chunked(db_session, 'subtraction', test_user.id, [5.0])
+    with pytest.raises(ValueError, match="at least two numbers"):
+        calc.get_result()
+
+
+def test_replace_chunk_recomputes_only_that_chunk(db_session, test_user):
+    calc = Calculation.create_chunked(db_session, 'addition', test_user.id, [1.0] * 9, chunk_size=3)
+    replace_chunk(db_session, calc, 1, [10.0, 10.0])
+    assert calc.input_data['chunked']['count'] == 8
+    assert calc.get_result() == 26.0
+    assert calc.result == 26.0
+    [(_, result)] = Calculation.query_results(db_session, Calculation.id == calc.id)
+    assert result == 26.0
+
+    with pytest.raises(ValueError, match="Chunk 7 does not exist"):
+        replace_chunk(db_session, calc, 7, [1.0])
+
+
+def test_recompute_partials_in_parallel(db_session_real_commits):
+    db = db_session_real_commits
+    user = User(
+        first_name="Test",
+        last_name="User",
+        email=f"test_{uuid.uuid4()}@gmail.com",
+        username=f"testuser_{uuid.uuid4()}",
+        password=User.hash_password("TestPass123")
+    )
+    db.add(user)
+    db.commit()
+
+    calc = Calculation.create_chunked(db, 'addition', user.id, [2.0] * 20, chunk_size=3)
+    db.query(CalculationChunk).filter(CalculationChunk.calculation_id == calc.id).update({'partial': 0.0})
+    db.commit()
+    assert calc.get_result() == 0.0
+
+    assert recompute_partials(SessionLocal, calc, max_workers=3) == 7
+    assert calc.result == 40.0
+    db.expire_all()
+    assert isinstance(calc, Addition)
+    assert calc.get_result() == 40.0
+    [(_, result)] = Calculation.query_results(db, Calculation.id == calc.id)
+    assert result == 40.0
+
+
+@pytest.mark.parametrize(
+    "calculation_type, inputs, expected",
+    [
+        ("division", [1.0] + [1e-200] * 4, math.inf),  # the inline calculation also gives inf
+        ("division", [-1.0] + [1e200] * 4, -0.0),
+        ("multiplication", [1e200] * 4, math.inf),
+        ("multiplication", [1e-200] * 4 + [1e200] * 4, 1.0),  # inline would underflow to 0 halfway
+        ("division", [1e-300] + [1e-200, 1e200] * 3, 1e-300),
+    ],
+)
+def test_chunked_products_do_not_underflow(db_session, test_user, calculation_type, inputs, expected):
+    """Partials are kept as mantissa and exponent, so intermediate products never underflow to 0."""
+    calc = Calculation.create_chunked(db_session, calculation_type, test_user.id, inputs, chunk_size=2)
+    assert calc.get_result() == pytest.approx(expected)
+    assert calc.result == calc.get_result()
+
+
+def test_chunk_pack_round_trip():
+    values = [1.5, -2.25, 1e300]
+    assert list(CalculationChunk.unpack(CalculationChunk.pack(values))) == values
+
+
+def test_upgrade_adds_partial_exponent(db_session):
+    connection = db_session.connection()
+    connection.execute(text("ALTER TABLE calculation_chunks DROP COLUMN partial_exp"))
+    upgrade_db(connection)
+    columns = {column["name"]: column for column in inspect(connection).get_columns("calculation_chunks")}
+    assert columns["partial_exp"]["nullable"] is False
@@ -0,0 +1,102 @@
+# tests/integration/test_calculation_sql.py
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models.calculation import Calculation
+
+
+@pytest.mark.parametrize(
+    "calculation_type, inputs",
+    [
+        ("addition", [1.0, 2.0, 3.5]),
+        ("addition", []),
+        ("subtraction", [10.0, 4.0, 1.5]),
+        ("multiplication", [2.0, -3.0, 0.5]),
+        ("multiplication", []),
+        ("division", [100.0, 4.0, 5.0]),
+    ],
+)
+def test_sql_result_matches_python(db_session, test_user, calculation_type, inputs):
+    """The SQL function returns the same value as get_result()."""
+    calc = Calculation.create(calculation_type, test_user.id, inputs)
+    db_session.add(calc)
+    db_session.commit()
+
+    [(calc_id, result)] = Calculation.query_results(db_session, Calculation.id == calc.id)
+    assert calc_id == calc.id
+    assert result == pytest.approx(calc.get_result())
+
+
+@pytest.mark.parametrize(
+    "calculation_type, input_data",
+    [
+        ("division", {'inputs': [1.0, 0.0]}),
+        ("division", {'inputs': [1.0]}),
+        ("subtraction", {'inputs': [1.0]}),
+        ("addition", {'inputs': 'not-a-list'}),
+        ("addition", {'inputs': None}),
+    ],
+)
+def test_sql_result_is_null_when_python_raises(db_session, test_user, calculation_type, input_data):
+    """Invalid calculations evaluate to NULL instead of failing the statement."""
+    calc = Calculation.create(calculation_type, test_user.id, [])
+    calc.input_data = input_data
+    db_session.add(calc)
+    db_session.commit()
+
+    [(_, result)] = Calculation.query_results(db_session, Calculation.id == calc.id)
+    assert result is None
+
+
+@pytest.mark.parametrize(
+    "calculation_type, input_data",
+    [("addition", {}), ("multiplication", {}), ("addition", None), ("multiplication", None)],
+)
+def test_sql_result_treats_missing_inputs_as_empty(db_session, test_user, calculation_type, input_data):
+    """Without an inputs list, as in Calculation.inputs, the sum is 0 and the product 1."""
+    calc = Calculation.create(calculation_type, test_user.id, [])
+    calc.input_data = input_data
+    db_session.add(calc)
+    db_session.commit()
+
+    [(_, result)] = Calculation.query_results(db_session, Calculation.id == calc.id)
+    assert result == calc.get_result()
+
+
+def test_chunked_rows_use_the_stored_result(db_session, test_user):
+    """calculation_result() excludes chunked rows; query_results falls back to the stored result."""
+    calc = Calculation.create_chunked(db_session, "multiplication", test_user.id, [2.0, 3.0, 4.0], chunk_size=2)
+    db_session.commit()
+
+    assert db_session.scalar(select(func.calculation_result(Calculation.calculation_type, Calculation.input_data))
+                             .where(Calculation.id == calc.id)) is None
+    [(_, result)] = Calculation.query_results(db_session, Calculation.id == calc.id)
+    assert result == 24.0
+
+
+def test_daily_result_totals(db_session, test_user):
+    """Results are summed per user per day inside the database."""
+    rows = [
+        ("addition", [1.0, 2.0], datetime(2024, 1, 1, 9)),
+        ("multiplication", [3.0, 4.0], datetime(2024, 1, 1, 17)),
+        ("division", [1.0, 0.0], datetime(2024, 1, 1, 18)),
+        ("subtraction", [10.0, 3.0], datetime(2024, 1, 2, 8)),
+    ]
+    for calculation_type, inputs, created_at in rows:
+        calc = Calculation.create(calculation_type, test_user.id, inputs)
+        calc.created_at = created_at
+        db_session.add(calc)
+    db_session.commit()
+
+    chunked = Calculation.create_chunked(db_session, "addition", test_user.id, [5.0, 6.0], chunk_size=1)
+    chunked.created_at = datetime(2024, 1, 1, 20)
+    db_session.commit()
+
+    totals = Calculation.daily_result_totals(db_session, Calculation.user_id == test_user.id)
+    assert totals == [
+        (test_user.id, datetime(2024, 1, 1), 26.0),
+        (test_user.id, datetime(2024, 1, 2), 7.0),
+    ]
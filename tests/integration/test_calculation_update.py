@@ -0,0 +1,126 @@
+# tests/integration/test_calculation_update.py
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import text
+
+from app.database_init import upgrade_db
+from app.models.calculation import Calculation
+from app.monitoring.metrics import operation_errors, operations
+from app.schemas.calculation import CalculationUpdate
+
+
+@pytest.mark.parametrize(
+    "calculation_type, inputs, appended",
+    [
+        ("addition", [1.0, 2.0], [3.5, 4.0]),
+        ("subtraction", [100.0, 1.0], [2.0, 3.0]),
+        ("multiplication", [2.0, 3.0], [0.5, -4.0]),
+        ("division", [1000.0, 2.0], [5.0, 4.0]),
+    ],
+)
+def test_append_updates_stored_result(db_session, test_user, calculation_type, inputs, appended):
+    """Appending folds the new values into the stored result, matching a full recompute."""
+    calc = Calculation.create(calculation_type, test_user.id, inputs)
+    calc.refresh_result()
+    db_session.add(calc)
+    db_session.commit()
+
+    result = calc.apply_update(CalculationUpdate(append=appended))
+    db_session.commit()
+    db_session.refresh(calc)
+
+    assert calc.inputs == inputs + appended
+    assert result == calc.result
+    assert calc.result == calc.get_result()
+
+
+def test_append_does_not_recompute(db_session, test_user, monkeypatch):
+    calc = Calculation.create('addition', test_user.id, [1.0, 2.0])
+    calc.refresh_result()
+    monkeypatch.setattr(type(calc), 'get_result', lambda self: pytest.fail("full recompute"))
+    assert calc.apply_update(CalculationUpdate(append=[3.0])) == 6.0
+
+
+def test_append_without_stored_result_recomputes(db_session, test_user):
+    calc = Calculation.create('subtraction', test_user.id, [10.0])
+    assert calc.result is None
+    assert calc.apply_update(CalculationUpdate(append=[4.0])) == 6.0
+
+
+def test_append_division_by_zero_clears_result(db_session, test_user):
+    calc = Calculation.create('division', test_user.id, [10.0, 2.0])
+    calc.refresh_result()
+    assert calc.apply_update(CalculationUpdate(append=[0.0])) is None
+    assert calc.result is None
+
+
+def test_append_records_operation_metrics(db_session, test_user):
+    """The incremental path counts the operation and its errors like a full recompute."""
+    calc = Calculation.create('division', test_user.id, [10.0, 2.0])
+    calc.refresh_result()
+    before = operations.value("divide")
+    before_zero = operation_errors.value("divide", "division_by_zero")
+
+    assert calc.apply_update(CalculationUpdate(append=[5.0])) == 1.0
+    assert operations.value("divide") == before + 1
+    assert operation_errors.value("divide", "division_by_zero") == before_zero
+
+    assert calc.apply_update(CalculationUpdate(append=[0.0])) is None
+    assert operations.value("divide") == before + 2
+    assert operation_errors.value("divide", "division_by_zero") == before_zero + 1
+
+
+def test_patch_and_replace_recompute(db_session, test_user):
+    calc = Calculation.create('multiplication', test_user.id, [2.0, 3.0, 4.0])
+    calc.refresh_result()
+    assert calc.apply_update(CalculationUpdate(patch={1: 5.0})) == 40.0
+    assert calc.apply_update(CalculationUpdate(inputs=[7.0])) == 7.0
+    assert calc.inputs == [7.0]
+
+    with pytest.raises(ValueError, match="Patch index 3 is out of range"):
+        calc.apply_update(CalculationUpdate(patch={3: 1.0}))
+
+
+def test_chunked_calculation_rejects_update(db_session, test_user):
+    calc = Calculation.create_chunked(db_session, 'addition', test_user.id, [1.0, 2.0])
+    with pytest.raises(ValueError, match="replace_chunk"):
+        calc.apply_update(CalculationUpdate(append=[3.0]))
+
+
+def test_update_schema_allows_one_mode():
+    assert CalculationUpdate(append=[1.0]).append == [1.0]
+    assert CalculationUpdate(patch={"0": 2.0}).patch == {0: 2.0}
+    with pytest.raises(ValidationError, match="Only one of inputs, append or patch"):
+        CalculationUpdate(inputs=[1.0], append=[2.0])
+
+
+def test_create_stores_the_result(db_session, test_user):
+    assert Calculation.create('addition', test_user.id, [1.0, 2.0]).result == 3.0
+    assert Calculation.create('division', test_user.id, [1.0, 0.0]).result is None
+    assert Calculation.create_chunked(db_session, 'multiplication', test_user.id, [2.0, 5.0]).result == 10.0
+
+
+def test_append_extends_inputs_in_place(db_session, test_user):
+    inputs = [1.0, 2.0]
+    calc = Calculation.create('addition', test_user.id, inputs)
+    stored = calc.input_data['inputs']
+    calc.apply_update(CalculationUpdate(append=[3.0]))
+    assert calc.input_data['inputs'] is stored
+    assert inputs == [1.0, 2.0]
+
+
+def test_accumulate_is_abstract():
+    assert {'get_result', 'accumulate'} <= Calculation.__abstractmethods__
+
+
+def test_upgrade_adds_and_backfills_result(db_session, test_user):
+    calc = Calculation.create('subtraction', test_user.id, [10.0, 4.0])
+    db_session.add(calc)
+    db_session.flush()
+    connection = db_session.connection()
+    connection.execute(text("ALTER TABLE calculations DROP COLUMN result"))
+
+    upgrade_db(connection)
+    stored = connection.execute(text("SELECT result FROM calculations WHERE id = :id"), {"id": calc.id}).scalar()
+    assert stored == 6.0
@@ -0,0 +1,100 @@
+# tests/integration/test_claims_tokens.py
+
+from datetime import datetime
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import inspect, text
+
+from app.auth.dependencies import get_current_user, user_from_claims
+from app.auth.revocation import revocation_list
+from app.config import settings
+from app.database import SessionLocal
+from app.database_init import upgrade_db
+from app.models.user import User
+from app.schemas.user import UserResponse
+
+
+def test_claims_token_needs_no_database(db_session, test_user):
+    token = User.create_access_token({"sub": str(test_user.id)}, embed_user=test_user)
+    revocation_list.refresh(db_session)  # periodic, not per request
+    mock_db = MagicMock()
+
+    user = get_current_user(db=mock_db, token=token)
+
+    assert user == UserResponse.model_validate(test_user)
+    mock_db.query.assert_not_called()
+
+
+def test_plain_token_has_no_embedded_user(test_user):
+    claims = User.decode_token(User.create_access_token({"sub": str(test_user.id)}))
+    assert "usr" not in claims
+    assert user_from_claims(claims) is None
+
+
+def test_old_claims_are_revalidated(test_user):
+    token = User.create_access_token({"sub": str(test_user.id)}, embed_user=test_user)
+    claims = User.decode_token(token)
+    later = claims["iat"] + settings.CLAIMS_REVALIDATE_SECONDS + 1
+    with patch("app.auth.dependencies.time.time", return_value=later):
+        assert user_from_claims(claims) is None
+
+
+def test_update_in_process_invalidates_claims(db_session, test_user):
+    token = User.create_access_token({"sub": str(test_user.id)}, embed_user=test_user)
+    assert User.decode_token(token)["ver"] == 1
+
+    test_user.is_active = False
+    db_session.commit()
+    assert test_user.version == 2
+
+    user = get_current_user(db=db_session, token=token)
+    assert user.is_active is False
+
+
+def test_updates_outside_claim_fields_keep_the_version(db_session, test_user):
+    test_user.last_login = datetime.utcnow()
+    db_session.commit()
+    assert test_user.version == 1
+
+
+def test_concurrent_updates_do_not_conflict(db_session_real_commits, fake_user_data):
+    """Rows are not optimistically locked: overlapping writers do not raise StaleDataError."""
+    fake_user_data['password'] = "TestPass123"
+    user_id = User.register(db_session_real_commits, fake_user_data).id
+    db_session_real_commits.commit()
+
+    first, second = SessionLocal(), SessionLocal()
+    try:
+        a = first.get(User, user_id)
+        b = second.get(User, user_id)
+        a.last_login = datetime.utcnow()
+        first.commit()
+        b.first_name = "Renamed"
+        second.commit()
+        second.refresh(b)
+        assert b.version == 2
+    finally:
+        first.close()
+        second.close()
+
+
+def test_upgrade_adds_version_to_existing_users_table(db_session):
+    connection = db_session.connection()
+    connection.execute(text("ALTER TABLE users DROP COLUMN version"))
+    upgrade_db(connection)
+    columns = {column["name"]: column for column in inspect(connection).get_columns("users")}
+    assert columns["version"]["nullable"] is False
+
+
+def test_authenticate_issues_claims_tokens_when_enabled(db_session, fake_user_data):
+    fake_user_data['password'] = "TestPass123"
+    User.register(db_session, fake_user_data)
+    db_session.commit()
+
+    with patch.object(settings, "CLAIMS_TOKENS", True):
+        result = User.authenticate(db_session, fake_user_data['username'], "TestPass123")
+    claims = User.decode_token(result["access_token"])
+    assert claims["usr"]["username"] == fake_user_data['username']
+    assert claims["iat"] <= time.time()
@@ -0,0 +1,116 @@
+# tests/integration/test_columnar.py
+
+from datetime import datetime, timedelta
+
+import pyarrow.parquet as pq
+import pytest
+
+from app.columnar import (
+    export_calculations,
+    export_calculations_parallel,
+    import_calculations,
+    split_time_range,
+)
+from app.database import SessionLocal
+from app.models.calculation import Calculation
+from app.models.user import User
+
+
+@pytest.mark.parametrize("format", ["parquet", "arrow"])
+def test_export_and_import_round_trip(db_session, test_user, tmp_path, format):
+    """Exported rows can be imported back with identical inputs."""
+    user = test_user
+    calcs = [
+        Calculation.create('addition', user.id, [1.0, 2.0, 3.0]),
+        Calculation.create('division', user.id, [10.0, 0.0]),
+        Calculation.create('multiplication', user.id, [2.0, 4.0]),
+    ]
+    db_session.add_all(calcs)
+    db_session.commit()
+
+    path = str(tmp_path / f"calcs.{format}")
+    assert export_calculations(db_session, path, format=format, batch_size=2) == 3
+
+    if format == "parquet":
+        parquet_file = pq.ParquetFile(path)
+        assert parquet_file.metadata.num_row_groups == 2
+        table = parquet_file.read()
+        results = dict(zip(table.column("type").to_pylist(), table.column("result").to_pylist()))
+        assert results == {'addition': 6.0, 'division': None, 'multiplication': 8.0}
+
+    db_session.query(Calculation).delete()
+    db_session.commit()
+
+    assert import_calculations(db_session, path, format=format) == 3
+    db_session.commit()
+    imported = {c.id: c for c in db_session.query(Calculation).all()}
+    for calc in calcs:
+        assert imported[calc.id].inputs == calc.inputs
+        assert imported[calc.id].calculation_type == calc.calculation_type
+        assert imported[calc.id].result == calc.result
+
+
+@pytest.mark.parametrize("format", ["parquet", "arrow"])
+def test_chunked_calculations_round_trip(db_session, test_user, tmp_path, format):
+    """Chunked inputs are exported in full and stored as chunks again on import."""
+    user = test_user
+    inputs = [1000.0] + [float(i) for i in range(1, 11)]
+    calc = Calculation.create_chunked(db_session, 'subtraction', user.id, inputs, chunk_size=4)
+    db_session.commit()
+
+    path = str(tmp_path / f"calcs.{format}")
+    export_calculations(db_session, path, format=format)
+    table = pq.read_table(path) if format == "parquet" else None
+    if table is not None:
+        assert table.column("inputs").to_pylist() == [inputs]
+        assert table.column("chunk_size").to_pylist() == [4]
+
+    db_session.query(Calculation).delete()
+    db_session.commit()
+
+    assert import_calculations(db_session, path, format=format) == 1
+    db_session.commit()
+    imported = db_session.get(Calculation, calc.id)
+    assert imported.is_chunked
+    assert imported.input_data['chunked']['chunks'] == 3
+    assert imported.result == imported.get_result() == 945.0
+    assert imported.updated_at == calc.updated_at
+
+
+def test_export_rejects_unknown_format(db_session, tmp_path):
+    with pytest.raises(ValueError, match="Unsupported export format"):
+        export_calculations(db_session, str(tmp_path / "calcs.csv"), format="csv")
+
+
+def test_split_time_range():
+    start = datetime(2024, 1, 1)
+    ranges = split_time_range(start, start + timedelta(days=4), 4)
+    assert len(ranges) == 4
+    assert ranges[0] == (start, start + timedelta(days=1))
+    assert ranges[-1][1] == start + timedelta(days=4)
+    with pytest.raises(ValueError):
+        split_time_range(start, start, 2)
+
+
+def test_export_parallel_by_time_range(db_session_real_commits, fake_user_data, tmp_path):
+    """Each time range is exported to its own file and no row is lost."""
+    # The parallel export reads through its own sessions, so the user must really be committed.
+    user = User(**{**fake_user_data, 'password': User.hash_password(fake_user_data['password'])})
+    db_session_real_commits.add(user)
+    db_session_real_commits.commit()
+    base = datetime(2024, 1, 1)
+    for day in range(4):
+        calc = Calculation.create('addition', user.id, [float(day)])
+        calc.created_at = base + timedelta(days=day, hours=1)
+        db_session_real_commits.add(calc)
+    db_session_real_commits.commit()
+
+    parts = export_calculations_parallel(
+        SessionLocal,
+        str(tmp_path / "calcs-{part}.parquet"),
+        start=base,
+        end=base + timedelta(days=4),
+        parts=2,
+    )
+    assert [rows for _, rows in parts] == [2, 2]
+    assert pq.read_table(parts[1][0]).column("inputs").to_pylist() == [[2.0], [3.0]]
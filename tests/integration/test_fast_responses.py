@@ -0,0 +1,33 @@
+# tests/integration/test_fast_responses.py
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app, operation_response
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def test_operation_response_is_preserialized():
+    response = operation_response(2.5)
+    assert response.body == b'{"result":2.5}'
+    assert response.media_type == "application/json"
+
+
+def test_routes_keep_response_model_in_openapi(client):
+    schema = client.get("/openapi.json").json()
+    add_responses = schema["paths"]["/add"]["post"]["responses"]
+    assert add_responses["200"]["content"]["application/json"]["schema"] == {
+        "$ref": "#/components/schemas/OperationResponse"
+    }
+
+
+def test_errors_use_orjson_responses(client):
+    response = client.post('/divide', json={'a': 1, 'b': 0})
+    assert response.status_code == 400
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == {'error': 'Cannot divide by zero!'}
@@ -0,0 +1,118 @@
+# tests/integration/test_index_page.py
+
+import gzip
+import os
+import subprocess
+import sys
+
+import brotli
+from fastapi.testclient import TestClient
+from jinja2 import Environment, FileSystemLoader
+from starlette.requests import Request
+
+from app.pages import PrerenderedPage, minify_html
+from main import app
+
+client = TestClient(app)
+
+
+def make_request(**headers):
+    raw = [(name.replace("_", "-").lower().encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def test_minify_html_strips_comments_and_indentation():
+    html = """
+        <!-- a comment -->
+        <style>
+            /* css comment */
+            body { margin: 0; }
+        </style>
+        <pre>  keep   this  </pre>
+        <script>
+            // whole-line comment
+            fetch('http://example.com/' + x); /* inline */
+        </script>
+    """
+    assert minify_html(html) == (
+        "<style>body { margin: 0; }</style>\n"
+        "<pre>  keep   this  </pre>\n"
+        "<script>fetch('http://example.com/' + x);</script>"
+    )
+
+
+def test_index_is_served_minified_with_validators():
+    response = client.get("/", headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/html")
+    assert "Calculator" in response.text
+    assert "<!--" not in response.text
+    assert response.headers["etag"].startswith('"')
+    assert response.headers["cache-control"] == "public, no-cache"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert "content-encoding" not in response.headers
+
+
+def test_compressed_variants_decode_to_the_same_page():
+    identity = client.get("/", headers={"Accept-Encoding": "identity"})
+    raw_gzip = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert raw_gzip.headers["content-encoding"] == "gzip"
+    assert raw_gzip.content == identity.content  # httpx decodes gzip
+    assert raw_gzip.headers["etag"] != identity.headers["etag"]
+
+    page = PrerenderedPage(Environment(loader=FileSystemLoader("templates")), "index.html")
+    response = page.response(make_request(accept_encoding="gzip;q=0.5, br"))
+    assert response.headers["content-encoding"] == "br"
+    assert brotli.decompress(response.body) == identity.content
+    assert gzip.decompress(page.bodies["gzip"]) == identity.content
+
+
+def test_accept_encoding_q_values():
+    page = PrerenderedPage(Environment(loader=FileSystemLoader("templates")), "index.html")
+    assert page._choose_encoding("") == "identity"
+    assert page._choose_encoding("br;q=0, gzip") == "gzip"
+    assert page._choose_encoding("*") == "br"
+    assert page._choose_encoding("*, br;q=0") == "gzip"
+
+
+def test_if_none_match_returns_304():
+    etag = client.get("/", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+    response = client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": f'"other", {etag}'})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    assert client.get("/", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_if_none_match_for_another_encoding_gets_the_full_page():
+    gzip_etag = client.get("/", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+    response = client.get("/", headers={"Accept-Encoding": "br", "If-None-Match": gzip_etag})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "br"
+    assert response.headers["etag"] != gzip_etag
+
+
+def test_reload_rerenders_changed_template(tmp_path):
+    template = tmp_path / "page.html"
+    template.write_text("<p>one</p>")
+    env = Environment(loader=FileSystemLoader(str(tmp_path)))
+
+    static = PrerenderedPage(env, "page.html", reload=False)
+    live = PrerenderedPage(env, "page.html", reload=True)
+    template.write_text("<p>two</p>")
+    stat = os.stat(template)
+    os.utime(template, (stat.st_atime, stat.st_mtime + 5))
+
+    assert static.response(make_request()).body == b"<p>one</p>"
+    assert live.response(make_request()).body == b"<p>two</p>"
+
+
+def test_main_imports_from_another_working_directory(tmp_path):
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    result = subprocess.run(
+        [sys.executable, "-c", "import main; print(main.index_page.template_name)"],
+        cwd=tmp_path, env={**os.environ, "PYTHONPATH": root}, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "index.html"
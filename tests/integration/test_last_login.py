@@ -0,0 +1,81 @@
+# tests/integration/test_last_login.py
+
+from datetime import datetime, timedelta
+from unittest.mock import PropertyMock, patch
+
+import pytest
+
+from app.auth.last_login import LastLoginRecorder, last_login_recorder
+from app.database import SessionLocal
+from app.models.user import User
+
+
+def _register(db, fake_user_data):
+    fake_user_data['password'] = "TestPass123"
+    user = User.register(db, fake_user_data)
+    db.commit()
+    return user
+
+
+def test_record_keeps_latest_timestamp():
+    recorder = LastLoginRecorder()
+    user_id = object()
+    early, late = datetime(2024, 1, 1), datetime(2024, 1, 2)
+    recorder.record(user_id, late)
+    recorder.record(user_id, early)
+    assert recorder.pending == 1
+    assert recorder._pending[user_id] == late
+
+
+def test_flush_writes_batch_in_one_statement(db_session, seed_users):
+    recorder = LastLoginRecorder()
+    now = datetime.utcnow().replace(microsecond=0)
+    for offset, user in enumerate(seed_users):
+        recorder.record(user.id, now + timedelta(seconds=offset))
+
+    assert recorder.flush(db_session) == len(seed_users)
+    assert recorder.pending == 0
+    for offset, user in enumerate(seed_users):
+        db_session.refresh(user)
+        assert user.last_login == now + timedelta(seconds=offset)
+
+
+def test_flush_never_moves_last_login_backwards(db_session, test_user):
+    recorder = LastLoginRecorder()
+    now = datetime.utcnow().replace(microsecond=0)
+    recorder.record(test_user.id, now)
+    recorder.flush(db_session)
+    recorder.record(test_user.id, now - timedelta(hours=1))
+    recorder.flush(db_session)
+
+    db_session.refresh(test_user)
+    assert test_user.last_login == now
+
+
+def test_authenticate_defers_write_when_recorder_runs(db_session, fake_user_data):
+    user = _register(db_session, fake_user_data)
+
+    with patch.object(LastLoginRecorder, "running", new_callable=PropertyMock, return_value=True), \
+            patch.object(db_session, "commit", wraps=db_session.commit) as commit:
+        assert User.authenticate(db_session, fake_user_data['username'], "TestPass123") is not None
+    commit.assert_not_called()
+    assert user.last_login is not None
+    assert user not in db_session.dirty
+
+    last_login_recorder.flush(db_session)
+    db_session.refresh(user)
+    assert user.last_login is not None
+
+
+def test_background_flush_on_stop(db_session_real_commits, fake_user_data):
+    user = _register(db_session_real_commits, fake_user_data)
+    recorder = LastLoginRecorder()
+    recorder.start(SessionLocal, interval=60)
+    assert recorder.running
+    login_at = datetime.utcnow().replace(microsecond=0)
+    recorder.record(user.id, login_at)
+    recorder.stop()
+
+    assert not recorder.running
+    db_session_real_commits.refresh(user)
+    assert user.last_login == login_at
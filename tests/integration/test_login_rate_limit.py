@@ -0,0 +1,24 @@
+# tests/integration/test_login_rate_limit.py
+
+from unittest.mock import patch
+
+import pytest
+
+from app.auth.passwords import pwd_context
+from app.auth.rate_limit import RateLimitExceeded
+from app.config import settings
+from app.models.user import User
+
+
+def test_over_limit_attempts_skip_hashing(db_session, fake_user_data):
+    fake_user_data['password'] = "TestPass123"
+    User.register(db_session, fake_user_data)
+    db_session.commit()
+
+    limit = settings.LOGIN_ATTEMPTS_PER_MINUTE_PER_USERNAME
+    with patch.object(pwd_context, "verify_and_update", return_value=(False, None)) as verify:
+        for _ in range(limit):
+            assert User.authenticate(db_session, fake_user_data['username'], "WrongPass123") is None
+        with pytest.raises(RateLimitExceeded):
+            User.authenticate(db_session, fake_user_data['username'], "WrongPass123", client_ip="10.0.0.1")
+    assert verify.call_count == limit
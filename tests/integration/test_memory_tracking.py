@@ -0,0 +1,119 @@
+# tests/integration/test_memory_tracking.py
+
+import pytest
+from fastapi.testclient import TestClient
+from jinja2 import DictLoader, Environment
+
+from app.config import settings
+from app.models.calculation_chunk import CalculationChunk
+from app.monitoring.memory import MemoryTracker, memory_tracker
+from app import pages as app_pages
+from app.pages import PrerenderedPage
+from main import app
+
+
+@pytest.fixture
+def tracker():
+    tracker = MemoryTracker(max_snapshots=2)
+    tracker.start()
+    yield tracker
+    tracker.stop()
+
+
+def test_snapshot_requires_tracing():
+    tracker = MemoryTracker()
+    tracker.stop()
+    with pytest.raises(ValueError, match="not started"):
+        tracker.take_snapshot()
+
+
+def test_diff_reports_app_allocation_sites(tracker):
+    base = tracker.take_snapshot()
+    packed = CalculationChunk.pack(float(i) for i in range(200_000))
+    current = tracker.take_snapshot()
+
+    sites = tracker.diff(base, current)
+    assert sites
+    assert all(site["file"].startswith("app/") for site in sites)
+    top = sites[0]
+    assert top["file"] == "app/models/calculation_chunk.py"
+    assert top["size_diff_kb"] >= len(packed) / 1024 * 0.9
+
+    assert tracker.top(current, limit=3)[0]["file"].startswith("app/")
+    assert any(not site["file"].startswith("app/") for site in tracker.top(current, app_only=False))
+
+
+def test_site_is_the_frame_that_allocated(tracker):
+    assert tracker.status()["traceback_limit"] == settings.MEMORY_TRACE_FRAMES
+    base = tracker.take_snapshot()
+    packed = CalculationChunk.pack(float(i) for i in range(200_000))
+    current = tracker.take_snapshot()
+
+    top = tracker.diff(base, current, group_by="traceback")[0]
+    assert top["file"] == "app/models/calculation_chunk.py"
+    assert top["size_diff_kb"] >= len(packed) / 1024 * 0.9
+
+
+def test_library_allocations_are_attributed_to_the_calling_app_line(tracker):
+    html = "\n".join(f"<p>{i:x}{i * 7919 % 100003}</p>" for i in range(50_000))
+    env = Environment(loader=DictLoader({"big.html": html}))
+    base = tracker.take_snapshot()
+    page = PrerenderedPage(env, "big.html")
+    current = tracker.take_snapshot()
+
+    sites = tracker.diff(base, current, limit=50)
+    assert all(site["file"].startswith("app/") for site in sites)
+    # gzip.compress allocates inside gzip.py; it is reported at the render line that called it.
+    gzip_line = next(number for number, line in enumerate(open(app_pages.__file__), 1) if "gzip.compress" in line)
+    gzip_site = next(site for site in sites if site["file"] == "app/pages.py" and site["line"] == gzip_line)
+    assert gzip_site["size_diff_kb"] >= len(page.bodies["gzip"]) / 1024 * 0.9
+
+    by_file = tracker.diff(base, current, group_by="filename")
+    assert by_file[0]["file"] == "app/pages.py"
+    assert by_file[0]["line"] == 0
+
+
+def test_snapshots_are_bounded_and_validated(tracker):
+    first = tracker.take_snapshot()
+    tracker.take_snapshot()
+    tracker.take_snapshot()
+    assert first not in tracker.status()["snapshots"]
+    with pytest.raises(KeyError):
+        tracker.top(first)
+    with pytest.raises(ValueError):
+        tracker.top(tracker.status()["snapshots"][0], group_by="module")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "s3cret")
+    with TestClient(app, headers={"X-Admin-Token": "s3cret"}) as client:
+        yield client
+    memory_tracker.stop()
+
+
+def test_memory_endpoints(client):
+    assert client.post("/admin/memory/snapshots").status_code == 409
+
+    status = client.post("/admin/memory/start", params={"frames": 2}).json()
+    assert status["tracing"] is True
+    assert status["traceback_limit"] == 2
+
+    base = client.post("/admin/memory/snapshots").json()["id"]
+    current = client.post("/admin/memory/snapshots").json()["id"]
+    assert client.get("/admin/memory").json()["snapshots"] == [base, current]
+
+    top = client.get(f"/admin/memory/snapshots/{current}", params={"app_only": False, "limit": 5})
+    assert top.status_code == 200
+    assert len(top.json()["sites"]) == 5
+
+    diff = client.get("/admin/memory/diff", params={"base": base, "current": current})
+    assert diff.status_code == 200
+    assert diff.json()["base"] == base
+
+    assert client.get("/admin/memory/snapshots/999").status_code == 404
+    assert client.get(f"/admin/memory/snapshots/{current}", params={"group_by": "bogus"}).status_code == 400
+
+    assert client.post("/admin/memory/stop").json() == {
+        "tracing": False, "traceback_limit": 2, "traced_kb": 0.0, "peak_kb": 0.0, "snapshots": [],
+    }
@@ -0,0 +1,96 @@
+# tests/integration/test_metrics_endpoint.py
+
+import time
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.models.calculation import Calculation
+from app.models.user import User, token_cache
+from app.monitoring.health import health
+from app.monitoring.metrics import (
+    CONTENT_TYPE, http_request_duration, http_requests, http_requests_in_flight, operation_errors,
+    operation_inputs, operations,
+)
+from main import app
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def test_requests_are_counted_by_route_template(client):
+    before = http_requests.value("POST", "/add", "200")
+    count_before = http_request_duration.collect().get(("POST", "/add"), ([], 0.0, 0))[2]
+
+    assert client.post('/add', json={'a': 1, 'b': 2}).status_code == 200
+    assert client.post('/add', json={'a': 'x', 'b': 2}).status_code == 400
+
+    assert http_requests.value("POST", "/add", "200") == before + 1
+    assert http_requests.value("POST", "/add", "400") >= 1
+    assert http_request_duration.collect()[("POST", "/add")][2] == count_before + 2
+    assert http_requests_in_flight.value() == 0
+
+
+def test_unmatched_paths_share_one_label(client):
+    before = http_requests.value("GET", "<unmatched>", "404")
+    client.get(f'/no-such-page/{uuid.uuid4()}')
+    assert http_requests.value("GET", "<unmatched>", "404") == before + 1
+
+
+def test_operation_counters(client):
+    before = operations.value("divide")
+    errors_before = operation_errors.value("divide", "division_by_zero")
+
+    client.post('/divide', json={'a': 1, 'b': 2})
+    client.post('/divide', json={'a': 1, 'b': 0})
+
+    assert operations.value("divide") == before + 2
+    assert operation_errors.value("divide", "division_by_zero") == errors_before + 1
+
+
+def test_refresh_result_records_input_size():
+    before = operation_inputs.collect().get(("add",), ([], 0.0, 0))[2]
+    calc = Calculation.create('addition', uuid.uuid4(), [1, 2, 3, 4, 5])
+    calc.refresh_result()
+    _, _, count = operation_inputs.collect()[("add",)]
+    assert count == before + 1
+    assert calc.input_count == 5
+
+
+def test_metrics_endpoint(client):
+    client.post('/multiply', json={'a': 2, 'b': 3})
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['content-type'] == CONTENT_TYPE
+    assert '# TYPE http_request_duration_seconds histogram' in response.text
+    assert 'calculator_operations_total{operation="multiply"}' in response.text
+    assert 'http_requests_total{method="POST",route="/multiply",status="200"}' in response.text
+
+
+def _scraped(text, name):
+    """The value of one sample line in a /metrics body."""
+    prefix = name + " "
+    return float(next(line[len(prefix):] for line in text.splitlines() if line.startswith(prefix)))
+
+
+def test_token_cache_metrics_are_scraped(client):
+    # The startup warm-up decodes its own token through token_cache; let it finish first.
+    deadline = time.monotonic() + 10
+    while not health.warmed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    before = token_cache.stats()
+
+    token = User.create_access_token({"sub": str(uuid.uuid4())})
+    User.decode_token(token)
+    User.decode_token(token)
+    User.decode_token(token)
+
+    text = client.get('/metrics').text
+    assert '# TYPE cache_hits_total counter' in text
+    assert _scraped(text, 'cache_hits_total{cache="token"}') == before["hits"] + 2
+    assert _scraped(text, 'cache_misses_total{cache="token"}') == before["misses"] + 1
+    assert _scraped(text, 'cache_entries{cache="token"}') == before["size"] + 1
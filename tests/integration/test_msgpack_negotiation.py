@@ -0,0 +1,130 @@
+# tests/integration/test_msgpack_negotiation.py
+
+from datetime import datetime
+
+import msgpack
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from app.negotiation import MSGPACK, NegotiatedRoute, accepts_msgpack, is_msgpack
+from main import app
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def test_is_msgpack_matches_known_media_types():
+    assert is_msgpack("application/msgpack")
+    assert is_msgpack("application/x-msgpack; charset=binary")
+    assert not is_msgpack("application/json")
+    assert not is_msgpack("application/msgpack-extra")
+
+
+@pytest.mark.parametrize("accept, expected", [
+    ("application/msgpack", True),
+    ("application/vnd.msgpack, application/json;q=0.5", True),
+    ("application/json, application/msgpack", True),
+    ("application/json, application/msgpack;q=0.9", False),
+    ("application/msgpack;q=0, application/json", False),
+    ("application/msgpack;q=0", False),
+    ("application/msgpack;q=0.8, */*;q=0.1", True),
+    ("*/*", False),
+    ("application/json", False),
+    ("", False),
+])
+def test_accepts_msgpack_honours_q_values(accept, expected):
+    assert accepts_msgpack(accept) is expected
+
+
+def test_msgpack_opt_out_gets_json(client):
+    response = client.post('/add', json={'a': 1, 'b': 2}, headers={'Accept': 'application/msgpack;q=0, application/json'})
+    assert response.headers['content-type'] == 'application/json'
+    assert response.headers['vary'] == 'Accept'
+    assert response.json() == {'result': 3}
+
+
+@pytest.mark.parametrize("headers", [{}, {'Accept': 'application/json'}, {'Accept': MSGPACK}])
+def test_every_negotiated_response_varies_on_accept(client, headers):
+    response = client.post('/add', json={'a': 1, 'b': 2}, headers=headers)
+    assert response.headers['vary'] == 'Accept'
+
+
+class Item(BaseModel):
+    name: str
+    created_at: datetime
+
+
+def test_model_responses_are_packed_without_json():
+    router = APIRouter(route_class=NegotiatedRoute)
+
+    @router.get("/item", response_model=Item)
+    async def item():
+        return Item(name="x", created_at=datetime(2024, 1, 2, 3, 4, 5))
+
+    items = FastAPI()
+    items.include_router(router)
+    with TestClient(items) as client:
+        packed = client.get("/item", headers={'Accept': MSGPACK})
+        plain = client.get("/item")
+    assert packed.headers['content-type'] == MSGPACK
+    assert packed.headers['vary'] == 'Accept'
+    assert msgpack.unpackb(packed.content) == plain.json() == {'name': 'x', 'created_at': '2024-01-02T03:04:05'}
+
+
+def test_msgpack_request_and_response(client):
+    response = client.post(
+        '/add',
+        content=msgpack.packb({'a': 10, 'b': 5}),
+        headers={'Content-Type': MSGPACK, 'Accept': MSGPACK},
+    )
+    assert response.status_code == 200
+    assert response.headers['content-type'] == MSGPACK
+    assert response.headers['vary'] == 'Accept'
+    assert msgpack.unpackb(response.content) == {'result': 15}
+
+
+def test_msgpack_request_with_json_response(client):
+    response = client.post(
+        '/multiply',
+        content=msgpack.packb({'a': 2.5, 'b': 4}),
+        headers={'Content-Type': MSGPACK},
+    )
+    assert response.status_code == 200
+    assert response.json() == {'result': 10}
+
+
+def test_json_request_with_msgpack_response(client):
+    response = client.post('/subtract', json={'a': 10, 'b': 4}, headers={'Accept': MSGPACK})
+    assert response.status_code == 200
+    assert msgpack.unpackb(response.content) == {'result': 6}
+
+
+def test_msgpack_body_is_validated_by_schema(client):
+    response = client.post(
+        '/add',
+        content=msgpack.packb({'a': 'ten', 'b': 5}),
+        headers={'Content-Type': MSGPACK},
+    )
+    assert response.status_code == 400
+    assert 'error' in response.json()
+
+
+def test_invalid_msgpack_body_is_rejected(client):
+    response = client.post('/add', content=b'\xc1', headers={'Content-Type': MSGPACK})
+    assert response.status_code == 400
+    assert response.json() == {'error': 'Invalid MessagePack body'}
+
+
+def test_errors_stay_json(client):
+    response = client.post(
+        '/divide',
+        content=msgpack.packb({'a': 1, 'b': 0}),
+        headers={'Content-Type': MSGPACK, 'Accept': MSGPACK},
+    )
+    assert response.status_code == 400
+    assert response.json() == {'error': 'Cannot divide by zero!'}
@@ -0,0 +1,109 @@
+# tests/integration/test_password_service.py
+
+import asyncio
+import threading
+
+import pytest
+from passlib.context import CryptContext
+
+from app.auth.passwords import PasswordService, PasswordServiceBusy
+from app.models.user import User
+
+
+@pytest.fixture
+def context():
+    """A private CryptContext using a cheap bcrypt cost."""
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=4)
+
+
+@pytest.fixture
+def service(context):
+    service = PasswordService(context=context, max_workers=2, max_pending=2)
+    yield service
+    service.shutdown()
+
+
+def test_hash_and_verify_off_loop(service):
+    async def run():
+        hashed = await service.hash("TestPass123")
+        return hashed, await service.verify("TestPass123", hashed), await service.verify("WrongPass123", hashed)
+
+    hashed, ok, bad = asyncio.run(run())
+    assert hashed.startswith("$2b$04$")
+    assert ok is True
+    assert bad is False
+    assert service.pending == 0
+
+
+def test_admission_queue_sheds_load(service, monkeypatch):
+    """Requests beyond max_pending are rejected instead of queued."""
+    release = threading.Event()
+    monkeypatch.setattr(service.context, "hash", lambda password: release.wait(5) and "hashed")
+
+    async def run():
+        first = asyncio.ensure_future(service.hash("a"))
+        second = asyncio.ensure_future(service.hash("b"))
+        await asyncio.sleep(0.05)
+        with pytest.raises(PasswordServiceBusy):
+            await service.hash("c")
+        release.set()
+        return await first, await second
+
+    assert asyncio.run(run()) == ("hashed", "hashed")
+    assert service.pending == 0
+
+
+def test_hash_many(service, context):
+    hashes = service.hash_many(["One1Pass", "Two2Pass"])
+    assert context.verify("One1Pass", hashes[0])
+    assert context.verify("Two2Pass", hashes[1])
+
+
+def test_calibrate_pins_cost_and_flags_old_hashes(service, context):
+    old_hash = context.hash("TestPass123")
+    rounds = service.calibrate(target_ms=0.001, min_rounds=5, max_rounds=6)
+    assert rounds == 5
+    assert context.hash("TestPass123").startswith("$2b$05$")
+    assert context.needs_update(old_hash) is True
+
+    assert service.calibrate(target_ms=10_000, min_rounds=4, max_rounds=6) == 6
+
+
+def test_authenticate_rehashes_outdated_cost(db_session, fake_user_data):
+    """A login with a hash at an outdated cost stores a fresh hash."""
+    fake_user_data['password'] = "TestPass123"
+    user = User.register(db_session, fake_user_data)
+    user.password = CryptContext(schemes=["bcrypt"]).handler("bcrypt").using(rounds=4).hash("TestPass123")
+    db_session.commit()
+
+    assert User.authenticate(db_session, fake_user_data['username'], "TestPass123") is not None
+    db_session.refresh(user)
+    assert not user.password.startswith("$2b$04$")
+    assert user.verify_password("TestPass123")
+
+
+def test_hash_many_leaves_the_login_pool_free(service, context, monkeypatch):
+    """A bulk job runs on its own pool, so logins are not queued behind it."""
+    release = threading.Event()
+    bulk_threads = set()
+    slow_hash = context.hash
+
+    def hash_and_wait(password):
+        bulk_threads.add(threading.current_thread().name)
+        release.wait(5)
+        return slow_hash(password)
+
+    hashed = context.hash("TestPass123")
+    monkeypatch.setattr(service.context, "hash", hash_and_wait)
+    bulk = threading.Thread(target=service.hash_many, args=(["a"] * 20,))
+    bulk.start()
+    try:
+        async def login():
+            return await asyncio.wait_for(service.verify("TestPass123", hashed), timeout=2)
+
+        assert asyncio.run(login()) is True
+        assert service.pending == 0
+    finally:
+        release.set()
+        bulk.join()
+    assert bulk_threads and all(name.startswith("password-bulk-hash") for name in bulk_threads)
@@ -0,0 +1,101 @@
+# tests/integration/test_profiler.py
+
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.monitoring.profiler import ProfilerBusy, StackSampler, recent_profiles
+from main import app
+
+
+def spin(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+@pytest.fixture
+def busy_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=spin, args=(stop,), name="busy-worker")
+    thread.start()
+    yield thread
+    stop.set()
+    thread.join()
+
+
+def test_sampler_collects_collapsed_stacks(busy_thread):
+    sampler = StackSampler(interval=0.001).start()
+    time.sleep(0.1)
+    stacks = sampler.stop()
+
+    assert sampler.samples > 0
+    busy = [stack for stack in stacks if stack.startswith("busy-worker;")]
+    assert busy
+    assert any(stack.endswith("test_profiler:spin") for stack in busy)
+    assert not any("stack-sampler" in stack for stack in stacks)
+
+    line = sampler.collapsed().splitlines()[0]
+    stack, count = line.rsplit(" ", 1)
+    assert int(count) == stacks.most_common(1)[0][1]
+
+
+def test_only_one_sampler_runs_at_a_time():
+    first = StackSampler().start()
+    try:
+        with pytest.raises(ProfilerBusy):
+            StackSampler().start()
+    finally:
+        first.stop()
+    StackSampler().start().stop()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "s3cret")
+    with TestClient(app) as client:
+        yield client
+
+
+def test_profile_endpoint_returns_folded_file(client, busy_thread):
+    response = client.get("/admin/profile", params={"seconds": 0.1, "interval_ms": 1},
+                          headers={"X-Admin-Token": "s3cret"})
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == 'attachment; filename="profile.folded"'
+    assert "busy-worker;" in response.text
+
+
+def test_profile_endpoint_rejects_long_profiles(client):
+    response = client.get("/admin/profile", params={"seconds": settings.PROFILE_MAX_SECONDS + 1},
+                          headers={"X-Admin-Token": "s3cret"})
+    assert response.status_code == 400
+
+
+def test_profile_endpoint_reports_busy(client):
+    sampler = StackSampler().start()
+    try:
+        response = client.get("/admin/profile", params={"seconds": 0.01}, headers={"X-Admin-Token": "s3cret"})
+    finally:
+        sampler.stop()
+    assert response.status_code == 409
+
+
+def test_request_profile_header(client):
+    response = client.post("/add", json={"a": 1, "b": 2},
+                           headers={"X-Profile": "1", "X-Admin-Token": "s3cret"})
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+    assert recent_profiles.get(profile_id) is not None
+
+    profile = client.get(f"/admin/profiles/{profile_id}", headers={"X-Admin-Token": "s3cret"})
+    assert profile.status_code == 200
+    assert profile.headers["content-disposition"] == f'attachment; filename="{profile_id}.folded"'
+
+
+def test_request_profile_requires_admin(client):
+    response = client.post("/add", json={"a": 1, "b": 2}, headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+    assert client.get("/admin/profiles/missing", headers={"X-Admin-Token": "s3cret"}).status_code == 404
@@ -0,0 +1,102 @@
+# tests/integration/test_query_budgets.py
+
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.config import settings
+from app.models.calculation import Calculation
+from app.monitoring.queries import (
+    QueryBudget, QueryBudgetExceeded, QueryBudgetRoute, QueryCounter, assert_queries, inspect_queries,
+    query_budget, statement_shape,
+)
+from tests.conftest import test_engine
+
+
+def test_statement_shape_collapses_literals():
+    assert statement_shape("SELECT *\n  FROM users WHERE id = 42 AND name = 'x''y'") == \
+        "SELECT * FROM users WHERE id = ? AND name = ?"
+    assert statement_shape("SELECT * FROM t WHERE id IN (%(id_1_1)s, %(id_1_2)s)") == \
+        statement_shape("SELECT * FROM t WHERE id IN (%(id_1_1)s)")
+
+
+def test_inspect_queries_counts_statements(db_session):
+    with inspect_queries() as outer:
+        db_session.execute(text("SELECT 1"))
+        with inspect_queries() as inner:
+            db_session.execute(text("SELECT 2"))
+    assert outer.count == 2
+    assert inner.count == 1
+    assert outer.elapsed > 0
+
+
+def test_dynamic_relationship_loop_is_flagged_as_n_plus_one(db_session, seed_users):
+    for user in seed_users:
+        db_session.add(Calculation.create('addition', user.id, [1, 2]))
+    db_session.flush()
+
+    with pytest.raises(QueryBudgetExceeded, match="possible N\\+1"):
+        with assert_queries(max_repeats=len(seed_users) - 1):
+            for user in seed_users:
+                user.calculations.all()
+
+
+def test_budget_violations_are_described():
+    counter = QueryCounter()
+    for _ in range(3):
+        counter.record("SELECT * FROM users WHERE id = 1", 0.001)
+    budget = QueryBudget(max_queries=2, max_repeats=2)
+    problems = budget.violations(counter)
+    assert problems[0] == "3 queries executed, budget is 2"
+    assert problems[1] == "possible N+1: 3 executions of SELECT * FROM users WHERE id = ?"
+    assert QueryBudget().violations(counter) == []
+
+
+@pytest.mark.query_budget(2)
+def test_marker_allows_queries_within_budget(db_session):
+    db_session.execute(text("SELECT 1"))
+    db_session.execute(text("SELECT 2"))
+
+
+def test_query_counter_fixture(query_counter, db_session):
+    db_session.execute(text("SELECT 1"))
+    assert query_counter.count == 1
+
+
+@pytest.fixture
+def budget_client():
+    api = FastAPI()
+    api.router.route_class = QueryBudgetRoute
+
+    @api.get("/two-queries")
+    @query_budget(1)
+    def two_queries():
+        with test_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        return {"ok": True}
+
+    @api.get("/no-budget")
+    def no_budget():
+        return {"ok": True}
+
+    with TestClient(api) as client:
+        yield client
+
+
+def test_route_budget_logs_when_not_enforced(budget_client, caplog, monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_BUDGET_ENFORCE", False)
+    with caplog.at_level(logging.WARNING, logger="app.monitoring.queries"):
+        response = budget_client.get("/two-queries")
+    assert response.status_code == 200
+    assert "Query budget exceeded in GET /two-queries: 2 queries executed, budget is 1" in caplog.text
+
+
+def test_route_budget_raises_when_enforced(budget_client, monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_BUDGET_ENFORCE", True)
+    with pytest.raises(QueryBudgetExceeded):
+        budget_client.get("/two-queries")
+    assert budget_client.get("/no-budget").status_code == 200
@@ -0,0 +1,77 @@
+# tests/integration/test_server_timing.py
+
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.monitoring.timing import RequestTimings, current_timings, request_timings
+from main import app
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def test_queries_are_attributed_to_current_request(db_session):
+    with request_timings() as timings:
+        db_session.execute(text("SELECT 1"))
+        db_session.execute(text("SELECT 2"))
+    seconds, count = timings.phases["db"]
+    assert count == 2
+    assert seconds > 0
+    assert current_timings() is None
+
+
+def test_queries_outside_a_request_are_ignored(db_session):
+    db_session.execute(text("SELECT 1"))
+    assert current_timings() is None
+
+
+def test_login_response_times_password_hashing(db_session_real_commits, fake_user_data):
+    fake_user_data['password'] = "TestPass123"
+    with TestClient(app) as client:
+        register = client.post('/register', json=fake_user_data)
+        login = client.post('/login', json={'username': fake_user_data['username'], 'password': "TestPass123"})
+    assert register.status_code == 201
+    assert 'hash;dur=' in register.headers['server-timing']
+    assert login.status_code == 200
+    header = login.headers['server-timing']
+    assert 'hash;dur=' in header
+    assert 'db;dur=' in header
+
+
+def test_header_format():
+    timings = RequestTimings()
+    timings.add("db", 0.002)
+    header = timings.header()
+    assert header.startswith('db;dur=2.000;desc="1 query", ')
+    assert "total;dur=" in header
+    assert timings.as_dict()["db"] == {"ms": 2.0, "count": 1}
+
+
+def test_response_has_server_timing_header(client):
+    response = client.post('/add', json={'a': 1, 'b': 2})
+    assert response.status_code == 200
+    header = response.headers['server-timing']
+    assert 'validation;dur=' in header
+    assert 'compute;dur=' in header
+    assert 'total;dur=' in header
+
+
+def test_error_responses_are_timed(client):
+    response = client.post('/divide', json={'a': 1, 'b': 0})
+    assert response.status_code == 400
+    assert 'total;dur=' in response.headers['server-timing']
+
+
+def test_timing_is_logged_as_structured_record(client, caplog):
+    with caplog.at_level(logging.INFO, logger="app.monitoring.timing"):
+        client.post('/multiply', json={'a': 2, 'b': 3})
+    record = next(r for r in caplog.records if r.name == "app.monitoring.timing")
+    assert record.path == "/multiply"
+    assert record.status == 200
+    assert set(record.timing) >= {"validation", "compute", "total"}
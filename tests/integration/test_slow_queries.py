@@ -0,0 +1,115 @@
+# tests/integration/test_slow_queries.py
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.config import settings
+from app.monitoring.slow_queries import SlowQueryLog, is_read_only_select, parameter_shape, slow_query_log
+from app.monitoring.sql import add_observer, remove_observer
+from main import app
+
+
+@pytest.fixture
+def recorder():
+    log = SlowQueryLog(threshold_ms=0, max_records=3, explain=True, explains_per_minute=2)
+    add_observer(log.observe)
+    yield log
+    remove_observer(log.observe)
+    log.shutdown()
+
+
+def test_parameter_shape_hides_values():
+    assert parameter_shape({"username": "alice", "id": 3}) == {"username": "str", "id": "int"}
+    assert parameter_shape((1.5, None)) == ["float", "NoneType"]
+    assert parameter_shape([{"a": 1}, {"a": 2}]) == {"rows": 2, "row": {"a": "int"}}
+    assert parameter_shape(None) is None
+
+
+def test_slow_select_is_recorded_with_analyze_plan(recorder, db_session):
+    db_session.execute(text("SELECT :value AS answer"), {"value": 42})
+    recorder.wait()
+
+    record = recorder.snapshot()[0]
+    assert record["statement"] == "SELECT %(value)s AS answer"
+    assert record["parameters"] == {"value": "int"}
+    plan = record["plan"][0]
+    assert "Execution Time" in plan  # ANALYZE ran
+    assert plan["Plan"]["Node Type"] == "Result"
+
+
+@pytest.mark.parametrize("statement, expected", [
+    ("SELECT 1", True),
+    ("  select id from users where id = %(id)s", True),
+    ("WITH moved AS (DELETE FROM users RETURNING id) SELECT count(*) FROM moved", False),
+    ("WITH recent AS (SELECT 1) SELECT * FROM recent", False),
+    ("SELECT id FROM users FOR UPDATE", False),
+    ("SELECT id FROM users FOR NO KEY UPDATE SKIP LOCKED", False),
+    ("SELECT * INTO backup FROM users", False),
+    ("UPDATE users SET version = 1", False),
+])
+def test_only_plain_selects_are_analyzed(statement, expected):
+    assert is_read_only_select(statement) is expected
+
+
+def test_data_modifying_cte_is_not_executed_again(recorder, db_session):
+    db_session.execute(text("WITH gone AS (DELETE FROM revoked_tokens WHERE false RETURNING jti) SELECT count(*) FROM gone"))
+    recorder.wait()
+
+    plan = recorder.snapshot()[0]["plan"][0]
+    assert plan["Plan"]["Node Type"] == "Aggregate"
+    assert "Execution Time" not in plan  # explained, not run
+
+
+def test_plan_capture_is_rate_limited(recorder, db_session):
+    for value in range(3):
+        db_session.execute(text("SELECT :value"), {"value": value})
+    recorder.wait()
+    plans = [record["plan"] for record in recorder.snapshot()]
+    assert sum(plan is not None for plan in plans) == 2
+
+
+def test_ring_buffer_is_bounded(recorder, db_session):
+    for value in range(5):
+        db_session.execute(text(f"SELECT {value}"))
+    recorder.wait()
+    assert [record["statement"] for record in recorder.snapshot()] == ["SELECT 4", "SELECT 3", "SELECT 2"]
+
+
+def test_fast_queries_are_ignored(db_session):
+    log = SlowQueryLog(threshold_ms=60_000)
+    log.observe(None, "SELECT 1", None, 0.001)
+    assert log.snapshot() == []
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def test_admin_endpoint_is_hidden_without_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", None)
+    assert client.get("/admin/slow-queries").status_code == 404
+
+
+def test_admin_endpoint_requires_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "s3cret")
+    assert client.get("/admin/slow-queries").status_code == 403
+    assert client.get("/admin/slow-queries", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+
+def test_admin_endpoint_lists_slow_queries(client, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "s3cret")
+    slow_query_log.records.append({"statement": "SELECT pg_sleep(1)", "duration_ms": 1000.0, "plan": None})
+    try:
+        response = client.get("/admin/slow-queries", headers={"X-Admin-Token": "s3cret"})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["threshold_ms"] == slow_query_log.threshold_ms
+        assert body["queries"][0]["statement"] == "SELECT pg_sleep(1)"
+
+        assert client.delete("/admin/slow-queries", headers={"X-Admin-Token": "s3cret"}).status_code == 204
+        assert slow_query_log.snapshot() == []
+    finally:
+        slow_query_log.clear()
@@ -0,0 +1,59 @@
+# tests/integration/test_token_cache.py
+
+import hashlib
+import uuid
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+
+from app.models import user as user_module
+from app.models.user import User, token_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+def test_repeated_verification_hits_cache():
+    user_id = uuid.uuid4()
+    token = User.create_access_token({"sub": str(user_id)})
+
+    with patch.object(user_module.jwt, "decode", wraps=user_module.jwt.decode) as decode:
+        assert User.verify_token(token) == user_id
+        assert User.verify_token(token) == user_id
+        assert User.verify_token(token) == user_id
+    assert decode.call_count == 1
+    assert token_cache.stats()["hits"] == 2
+    assert token_cache.stats()["misses"] == 1
+
+
+def test_cache_is_keyed_by_token_hash():
+    token = User.create_access_token({"sub": str(uuid.uuid4())})
+    User.verify_token(token)
+    key = hashlib.sha256(token.encode()).digest()
+    assert token_cache.get(key)["sub"] is not None
+    assert token_cache.get(token) is None
+
+
+def test_entry_expires_with_token():
+    token = User.create_access_token({"sub": str(uuid.uuid4())}, expires_delta=timedelta(minutes=5))
+    claims = User.decode_token(token)
+    key = hashlib.sha256(token.encode()).digest()
+
+    with patch.object(token_cache, "clock", return_value=claims["exp"] + 1):
+        assert token_cache.get(key) is None
+
+
+def test_invalid_tokens_are_not_cached():
+    assert User.verify_token("invalid.token.string") is None
+    assert len(token_cache) == 0
+
+
+def test_token_without_subject():
+    token = User.create_access_token({"role": "none"})
+    assert User.verify_token(token) is None
+    assert User.decode_token(token)["role"] == "none"
@@ -0,0 +1,123 @@
+# tests/integration/test_token_revocation.py
+
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app.auth.dependencies import get_current_user
+from app.auth.revocation import RevocationList, revocation_list, revoke_token
+from app.models.revoked_token import RevokedToken
+from app.models.user import User
+from tests.conftest import test_engine
+
+
+@pytest.fixture
+def count_queries():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(test_engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(test_engine, "before_cursor_execute", record)
+
+
+def test_tokens_carry_a_jti():
+    claims = User.decode_token(User.create_access_token({"sub": str(uuid.uuid4())}))
+    assert len(claims["jti"]) == 32
+
+
+def test_revoked_token_is_rejected(db_session, test_user):
+    token = User.create_access_token({"sub": str(test_user.id)})
+    assert get_current_user(db=db_session, token=token).id == test_user.id
+
+    assert revoke_token(db_session, token) is True
+    db_session.commit()
+
+    with pytest.raises(HTTPException) as exc_info:
+        get_current_user(db=db_session, token=token)
+    assert exc_info.value.status_code == 401
+
+
+def test_unrevoked_token_needs_no_revocation_query(db_session, test_user, count_queries):
+    token = User.create_access_token({"sub": str(test_user.id)})
+    revocation_list.refresh(db_session)
+    get_current_user(db=db_session, token=token)
+    count_queries.clear()
+
+    get_current_user(db=db_session, token=token)
+    assert not [s for s in count_queries if "revoked_tokens" in s]
+
+
+def test_other_workers_converge_through_refresh(db_session, test_user):
+    other_worker = RevocationList(refresh_interval=0)
+    other_worker.refresh(db_session)
+    jti = uuid.uuid4().hex
+    assert other_worker.is_revoked(db_session, jti) is False
+
+    revocation_list.revoke(db_session, jti, datetime.utcnow() + timedelta(minutes=5))
+    assert other_worker.is_revoked(db_session, jti) is True
+    assert other_worker.watermark is not None
+
+
+def _insert_revocation(db, row_id, jti, revoked_at):
+    db.add(RevokedToken(id=row_id, jti=jti, revoked_at=revoked_at,
+                        expires_at=datetime.utcnow() + timedelta(minutes=5)))
+    db.flush()
+
+
+def test_late_commit_with_lower_id_is_not_missed(db_session):
+    """A revocation committed after a newer-stamped one is still picked up."""
+    worker = RevocationList(refresh_interval=0, overlap=60, resync_interval=3600)
+    now = datetime.utcnow()
+    _insert_revocation(db_session, 1_000_002, "committed-first", now)
+    assert worker.refresh(db_session) == 1
+
+    # Allocated an earlier id and timestamp, but its transaction commits only now
+    _insert_revocation(db_session, 1_000_001, "committed-late", now - timedelta(seconds=1))
+    assert worker.refresh(db_session) == 1
+    assert worker.is_revoked(db_session, "committed-late") is True
+    assert worker.refresh(db_session) == 0
+    assert worker.bloom.count == 2
+
+
+def test_periodic_resync_catches_what_the_overlap_missed(db_session):
+    worker = RevocationList(refresh_interval=0, overlap=1, resync_interval=3600)
+    now = datetime.utcnow()
+    _insert_revocation(db_session, 1_000_002, "recent", now)
+    worker.refresh(db_session)
+    _insert_revocation(db_session, 1_000_001, "very-late", now - timedelta(minutes=10))
+    worker.refresh(db_session)
+    assert "very-late" not in worker.bloom
+
+    worker.resync_interval = 0
+    worker.refresh(db_session)
+    assert "very-late" in worker.bloom
+
+
+def test_false_positive_falls_back_to_table(db_session):
+    revocations = RevocationList(refresh_interval=3600)
+    revocations.refresh(db_session)
+    with patch("app.auth.revocation.BloomFilter.__contains__", return_value=True):
+        assert revocations.is_revoked(db_session, "never-revoked") is False
+
+
+def test_rebuild_drops_expired_and_purge(db_session):
+    revocations = RevocationList(capacity=10, refresh_interval=3600)
+    revocations.revoke(db_session, "expired", datetime.utcnow() - timedelta(minutes=1))
+    revocations.revoke(db_session, "live", datetime.utcnow() + timedelta(minutes=5))
+    revocations.rebuild(db_session)
+    assert "live" in revocations.bloom
+    assert revocations.bloom.count == 1
+
+    assert revocations.purge_expired(db_session) == 1
+    assert db_session.query(RevokedToken).count() == 1
+
+
+def test_revoke_invalid_token(db_session):
+    assert revoke_token(db_session, "invalid.token.string") is False
@@ -0,0 +1,152 @@
+# tests/integration/test_tracing.py
+
+import json
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.models.calculation import Calculation
+from app.monitoring.tracing import InMemoryExporter, JsonLinesExporter, Tracer, parse_traceparent, tracer
+from main import app
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture
+def exporter():
+    exporter = InMemoryExporter()
+    tracer.add_exporter(exporter)
+    yield exporter
+    tracer.remove_exporter(exporter)
+
+
+def test_parse_traceparent():
+    context = parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01")
+    assert context == (TRACE_ID, PARENT_ID, True)
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-00").sampled is False
+    assert parse_traceparent("garbage") is None
+    assert parse_traceparent(f"00-{'0' * 32}-{PARENT_ID}-01") is None
+    assert parse_traceparent(None) is None
+
+
+def test_tracing_is_a_no_op_without_exporters():
+    with Tracer().start_span("work") as span:
+        assert span is None
+
+
+def test_nested_spans_share_a_trace(exporter):
+    with tracer.start_span("outer") as outer:
+        with tracer.start_span("inner", {"k": "v"}) as inner:
+            pass
+    assert inner.trace_id == outer.trace_id
+    assert inner.parent_id == outer.span_id
+    assert outer.parent_id is None
+    assert [span.name for span in exporter.spans] == ["inner", "outer"]
+    assert inner.attributes == {"k": "v"}
+    assert inner.duration_ms >= 0
+
+
+def test_errors_mark_the_span(exporter):
+    with pytest.raises(ValueError):
+        with tracer.start_span("failing"):
+            raise ValueError("boom")
+    span = exporter.find("failing")[0]
+    assert span.status == "error"
+    assert span.attributes["error"] == "ValueError('boom')"
+
+
+def test_sql_and_get_result_spans(exporter, db_session):
+    with tracer.start_span("job") as job:
+        db_session.execute(text("SELECT 1"))
+        Calculation.create("addition", uuid.uuid4(), [1, 2]).get_result()
+
+    query = exporter.find("db.query")[0]
+    assert query.parent_id == job.span_id
+    assert query.attributes == {"db.system": "postgresql", "db.statement": "SELECT ?"}
+    assert exporter.find("Addition.get_result")[0].parent_id == job.span_id
+
+
+def test_sql_outside_a_trace_is_not_recorded(exporter, db_session):
+    db_session.execute(text("SELECT 1"))
+    assert exporter.spans == []
+
+
+def test_register_and_login_traces_include_password_spans(exporter, db_session_real_commits, fake_user_data):
+    fake_user_data['password'] = "TestPass123"
+    with TestClient(app) as client:
+        client.post("/register", json=fake_user_data)
+        client.post("/login", json={"username": fake_user_data['username'], "password": "TestPass123"})
+
+    register = exporter.find("POST /register")[0]
+    hashing = exporter.find("password.hash")[0]
+    assert hashing.trace_id == register.trace_id
+    assert hashing.parent_id == exporter.find("route register_route")[0].span_id
+
+    login = exporter.find("POST /login")[0]
+    verify = exporter.find("password.verify_and_update")[0]
+    assert verify.trace_id == login.trace_id
+    assert verify.parent_id == exporter.find("route login_route")[0].span_id
+
+
+def test_sampling(exporter):
+    tracer.sample_ratio = 0.0
+    try:
+        with tracer.start_span("dropped") as span:
+            with tracer.start_span("child") as child:
+                pass
+    finally:
+        tracer.sample_ratio = 1.0
+    assert span is None and child is None
+    assert exporter.spans == []
+
+
+def test_request_continues_incoming_trace(exporter):
+    with TestClient(app) as client:
+        response = client.post("/add", json={"a": 1, "b": 2},
+                               headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+    assert response.status_code == 200
+
+    server = exporter.find("POST /add")[0]
+    assert server.trace_id == TRACE_ID
+    assert server.parent_id == PARENT_ID
+    assert server.attributes["http.status_code"] == 200
+    assert server.attributes["http.route"] == "/add"
+    assert response.headers["traceresponse"] == server.traceparent()
+
+    validation = exporter.find("validate request")[0]
+    route = exporter.find("route add_route")[0]
+    assert validation.parent_id == server.span_id
+    assert route.parent_id == server.span_id
+
+
+def test_unsampled_incoming_trace_is_not_recorded(exporter):
+    with TestClient(app) as client:
+        response = client.post("/add", json={"a": 1, "b": 2},
+                               headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-00"})
+    assert response.status_code == 200
+    assert "traceresponse" not in response.headers
+    assert [span for span in exporter.spans if span.trace_id == TRACE_ID] == []
+    assert exporter.find("POST /add") == []
+
+
+def test_json_lines_exporter(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    file_exporter = JsonLinesExporter(str(path), batch_size=2)
+    local = Tracer()
+    local.add_exporter(file_exporter)
+
+    with local.start_span("a"):
+        pass
+    assert not path.exists()
+    with local.start_span("b"):
+        pass
+    with local.start_span("c"):
+        pass
+    local.shutdown()
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [record["name"] for record in records] == ["a", "b", "c"]
+    assert set(records[0]) >= {"trace_id", "span_id", "parent_id", "start_ns", "end_ns", "duration_ms"}
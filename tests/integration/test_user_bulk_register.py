@@ -0,0 +1,73 @@
+# tests/integration/test_user_bulk_register.py
+
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import event
+
+from app.auth.passwords import password_service
+from app.models.user import User
+from tests.conftest import create_fake_user, test_engine
+
+
+def _user_data(**overrides):
+    data = create_fake_user()
+    data["password"] = "TestPass123"
+    data.update(overrides)
+    return data
+
+
+def test_register_is_a_single_statement(db_session):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(test_engine, "before_cursor_execute", count)
+    try:
+        User.register(db_session, _user_data())
+    finally:
+        event.remove(test_engine, "before_cursor_execute", count)
+
+    inserts = [s for s in statements if s.lstrip().upper().startswith("INSERT")]
+    assert len(inserts) == 1
+    assert "ON CONFLICT DO NOTHING" in inserts[0]
+    assert not [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+
+
+def test_register_conflict_on_username(db_session):
+    first = _user_data()
+    User.register(db_session, first)
+    with pytest.raises(ValueError, match="Username or email already exists"):
+        User.register(db_session, _user_data(username=first["username"]))
+
+
+def test_bulk_register_creates_users(db_session):
+    users_data = [_user_data() for _ in range(5)]
+    with patch.object(password_service, "hash_many", wraps=password_service.hash_many) as hash_many:
+        created = User.bulk_register(db_session, users_data)
+    db_session.commit()
+
+    hash_many.assert_called_once()
+    assert sorted(u.username for u in created) == sorted(d["username"] for d in users_data)
+    assert all(u.id is not None and u.is_active for u in created)
+    assert created[0].verify_password("TestPass123")
+
+
+def test_bulk_register_skips_existing_and_duplicate_records(db_session):
+    existing = _user_data()
+    User.register(db_session, existing)
+    fresh = _user_data()
+
+    created = User.bulk_register(db_session, [
+        _user_data(email=existing["email"]),
+        fresh,
+        _user_data(username=fresh["username"]),
+    ])
+    assert [u.username for u in created] == [fresh["username"]]
+
+
+def test_bulk_register_validates_every_record(db_session):
+    with pytest.raises(ValueError, match="Invalid user at index 1"):
+        User.bulk_register(db_session, [_user_data(), _user_data(password="weak")])
+    assert User.bulk_register(db_session, []) == []
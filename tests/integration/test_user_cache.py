@@ -0,0 +1,53 @@
+# tests/integration/test_user_cache.py
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.auth.dependencies import get_current_user
+from app.auth.user_cache import user_cache
+from app.models.user import User
+
+
+@pytest.fixture
+def token(test_user):
+    return User.create_access_token({"sub": str(test_user.id)})
+
+
+def test_second_request_skips_database(db_session, test_user, token):
+    first = get_current_user(db=db_session, token=token)
+
+    mock_db = MagicMock()
+    second = get_current_user(db=mock_db, token=token)
+
+    assert second == first
+    mock_db.query.assert_not_called()
+    assert user_cache.stats()["hits"] == 1
+
+
+def test_update_invalidates_cached_user(db_session, test_user, token):
+    assert get_current_user(db=db_session, token=token).is_active is True
+
+    test_user.is_active = False
+    db_session.commit()
+
+    assert user_cache.get(test_user.id) is None
+    assert get_current_user(db=db_session, token=token).is_active is False
+
+
+def test_delete_invalidates_cached_user(db_session, test_user, token):
+    get_current_user(db=db_session, token=token)
+
+    db_session.delete(test_user)
+    db_session.commit()
+
+    with pytest.raises(HTTPException) as exc_info:
+        get_current_user(db=db_session, token=token)
+    assert exc_info.value.status_code == 401
+
+
+def test_entry_expires_after_ttl(db_session, test_user, token):
+    get_current_user(db=db_session, token=token)
+    with patch.object(user_cache, "clock", return_value=user_cache.clock() + user_cache.ttl + 1):
+        assert user_cache.get(test_user.id) is None
@@ -0,0 +1,36 @@
+# tests/unit/test_bloom_filter.py
+
+import uuid
+
+import pytest
+
+from app.auth.revocation import BloomFilter
+
+
+def test_added_items_are_always_found():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [uuid.uuid4().hex for _ in range(1000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+    assert bloom.count == 1000
+
+
+def test_false_positive_rate_is_near_target():
+    bloom = BloomFilter(capacity=2000, error_rate=0.01)
+    for _ in range(2000):
+        bloom.add(uuid.uuid4().hex)
+    false_positives = sum(uuid.uuid4().hex in bloom for _ in range(10_000))
+    assert false_positives < 300  # 1% target, generous margin
+
+
+def test_sizing():
+    bloom = BloomFilter(capacity=100_000, error_rate=0.001)
+    assert bloom.hash_count == 10
+    assert len(bloom.bits) < 200_000  # ~1.44M bits
+
+
+@pytest.mark.parametrize("capacity, error_rate", [(0, 0.01), (10, 0), (10, 1)])
+def test_invalid_parameters(capacity, error_rate):
+    with pytest.raises(ValueError):
+        BloomFilter(capacity, error_rate)
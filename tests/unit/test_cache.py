@@ -0,0 +1,76 @@
+# tests/unit/test_cache.py
+
+import pytest
+
+from app.cache import TTLCache
+
+
+class FakeClock:
+    """Manually advanced time source."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_and_set():
+    cache = TTLCache(max_size=2)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("missing") is None
+    assert cache.get("missing", "default") == "default"
+    assert cache.stats() == {"hits": 1, "misses": 2, "evictions": 0, "size": 1, "max_size": 2}
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_default_ttl_and_explicit_deadline():
+    clock = FakeClock()
+    cache = TTLCache(max_size=10, ttl=5, clock=clock)
+    cache.set("ttl", "x")
+    cache.set("deadline", "y", expires_at=clock.now + 60)
+
+    clock.now += 10
+    assert cache.get("ttl") is None
+    assert cache.get("deadline") == "y"
+
+    clock.now += 100
+    assert cache.get("deadline") is None
+    assert len(cache) == 0
+
+
+def test_entries_without_ttl_never_expire():
+    clock = FakeClock()
+    cache = TTLCache(clock=clock)
+    cache.set("forever", "z")
+    clock.now += 10 ** 9
+    assert cache.get("forever") == "z"
+
+
+def test_invalidate_and_clear():
+    cache = TTLCache()
+    cache.set("a", 1)
+    assert cache.invalidate("a") is True
+    assert cache.invalidate("a") is False
+    cache.set("b", 2)
+    cache.get("b")
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats()["hits"] == 0
+
+
+def test_max_size_must_be_positive():
+    with pytest.raises(ValueError):
+        TTLCache(max_size=0)
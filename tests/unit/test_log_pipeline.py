@@ -0,0 +1,168 @@
+# tests/unit/test_log_pipeline.py
+
+import json
+import logging
+import queue
+import sys
+import threading
+
+import pytest
+
+from app.monitoring.log_pipeline import JsonFormatter, LogPipeline, NonBlockingQueueHandler, SamplingFilter
+
+
+class FakeClock:
+    """Manually advanced time source."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class ListHandler(logging.Handler):
+    """Collects formatted records."""
+
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+
+def make_record(msg="Failure on %s", args=("/add",), level=logging.ERROR, name="main", **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extra_fields_and_exceptions():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.LogRecord("main", logging.ERROR, __file__, 1, "Failed %s", ("x",), sys.exc_info())
+    record.timing = {"db": {"ms": 1.5, "count": 2}}
+
+    payload = json.loads(JsonFormatter().format(record))
+    assert payload["level"] == "ERROR"
+    assert payload["logger"] == "main"
+    assert payload["message"] == "Failed x"
+    assert payload["timing"] == {"db": {"ms": 1.5, "count": 2}}
+    assert "ValueError: boom" in payload["exception"]
+    assert payload["timestamp"].endswith("+00:00")
+
+
+def test_sampling_filter_caps_each_call_site_per_window():
+    clock = FakeClock()
+    sampler = SamplingFilter(burst=2, window=10, clock=clock)
+
+    assert [sampler.filter(make_record()) for _ in range(5)] == [True, True, False, False, False]
+    assert sampler.filter(make_record(msg="Other failure")) is True
+    assert sampler.filter(make_record(level=logging.INFO)) is True
+    assert sampler.suppressed == 3
+
+    clock.now += 10
+    record = make_record()
+    assert sampler.filter(record) is True
+    assert record.suppressed == 3
+
+
+def test_sampling_can_be_disabled():
+    sampler = SamplingFilter(burst=0)
+    assert all(sampler.filter(make_record()) for _ in range(100))
+
+
+def test_queue_handler_drops_when_full_and_defers_formatting():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    record = make_record()
+    handler.handle(record)
+    handler.handle(make_record())
+    assert handler.dropped == 1
+    queued = handler.queue.get_nowait()
+    assert queued is record
+    assert queued.args == ("/add",)
+
+
+def test_pipeline_formats_on_listener_thread():
+    formatted_on = []
+
+    class Probe:
+        def __str__(self):
+            formatted_on.append(threading.current_thread())
+            return "probe"
+
+    sink = ListHandler()
+    pipeline = LogPipeline()
+    pipeline.start(level="INFO", handlers=[sink], sampler=SamplingFilter(burst=1))
+    try:
+        logger = logging.getLogger("tests.pipeline")
+        logger.info("value=%s", Probe(), extra={"request_id": "r1"})
+        logger.error("storm %s", 1)
+        logger.error("storm %s", 2)
+        assert pipeline.stats()["suppressed"] == 1
+        handler = pipeline.handler
+    finally:
+        pipeline.stop()
+
+    records = [json.loads(line) for line in sink.lines if '"tests.pipeline"' in line]
+    assert [record["message"] for record in records] == ["value=probe", "storm 1"]
+    assert records[0]["request_id"] == "r1"
+    assert any(thread is not threading.current_thread() for thread in formatted_on)
+    assert handler not in logging.getLogger().handlers
+    assert pipeline.handler is None
+    assert pipeline.stats() == {"queued": 0, "dropped": 0, "suppressed": 0}
+
+
+def test_pipeline_replaces_and_restores_root_handlers():
+    root = logging.getLogger()
+    previous = ListHandler()
+    root.addHandler(previous)
+    sink = ListHandler()
+    pipeline = LogPipeline()
+    try:
+        pipeline.start(json_format=False, handlers=[sink])
+        assert previous not in root.handlers
+        logging.getLogger("tests.pipeline").warning("once")
+        pipeline.stop()
+        pipeline.stop()  # a second stop is a no-op
+        assert previous in root.handlers
+    finally:
+        root.removeHandler(previous)
+    assert previous.lines == []
+    assert [line for line in sink.lines if line.endswith("once")] == [sink.lines[-1]]
+
+
+def test_sampling_filter_is_thread_safe():
+    sampler = SamplingFilter(burst=100, window=3600)
+    passed = []
+
+    def log_many():
+        passed.append(sum(sampler.filter(make_record()) for _ in range(1000)))
+
+    threads = [threading.Thread(target=log_many) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(passed) == 100
+    assert sampler.suppressed == 7900
+
+
+def test_pipeline_text_format():
+    sink = ListHandler()
+    pipeline = LogPipeline()
+    pipeline.start(json_format=False, handlers=[sink])
+    try:
+        logging.getLogger("tests.pipeline").warning("plain %s", "text")
+    finally:
+        pipeline.stop()
+    assert any(line.endswith("tests.pipeline - WARNING - plain text") for line in sink.lines)
+
+
+@pytest.fixture(autouse=True)
+def restore_root_level():
+    level = logging.getLogger().level
+    yield
+    logging.getLogger().setLevel(level)
@@ -0,0 +1,107 @@
+# tests/unit/test_metrics.py
+
+import threading
+
+import pytest
+
+from app.monitoring.metrics import (
+    CallbackMetric, Counter, Gauge, Histogram, MetricsRegistry, operation_errors, operations, record_operation, record_operation_error,
+)
+from app.operations import DivisionByZeroError
+
+
+def test_counter_sums_across_threads():
+    counter = Counter("jobs_total", "Jobs.", ("kind",))
+
+    def work():
+        for _ in range(1000):
+            counter.inc("a")
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counter.inc("b", amount=2.5)
+
+    assert counter.value("a") == 4000
+    assert counter.value("b") == 2.5
+    assert counter.value("missing") == 0
+
+
+def test_gauge_inc_and_dec_on_different_threads():
+    gauge = Gauge("in_flight", "In flight.")
+    gauge.inc()
+    gauge.inc()
+    thread = threading.Thread(target=gauge.dec)
+    thread.start()
+    thread.join()
+    assert gauge.value() == 1
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "/add")
+
+    cumulative, total, count = histogram.collect()[("/add",)]
+    assert cumulative == [2, 3, 4]
+    assert total == pytest.approx(3.65)
+    assert count == 4
+
+
+def test_registry_renders_text_format():
+    registry = MetricsRegistry()
+    counter = Counter("requests_total", 'Requests "served".', ("route",), registry=registry)
+    histogram = Histogram("size", "Size.", buckets=(10,), registry=registry)
+    counter.inc('/a"b')
+    histogram.observe(3)
+
+    text = registry.render()
+    assert '# HELP requests_total Requests \\"served\\".' in text
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{route="/a\\"b"} 1.0' in text
+    assert 'size_bucket{le="10.0"} 1' in text
+    assert 'size_bucket{le="+Inf"} 1' in text
+    assert "size_sum 3.0" in text
+    assert "size_count 1" in text
+    assert text.endswith("\n")
+
+
+def test_registry_rejects_duplicate_names_and_resets():
+    registry = MetricsRegistry()
+    counter = Counter("dupe_total", "Dupe.", registry=registry)
+    with pytest.raises(ValueError):
+        Counter("dupe_total", "Dupe.", registry=registry)
+    counter.inc()
+    registry.reset()
+    assert counter.value() == 0
+
+
+def test_operation_errors_are_classified_by_type():
+    before_zero = operation_errors.value("divide", "division_by_zero")
+    before_invalid = operation_errors.value("divide", "invalid_input")
+    record_operation_error("division", DivisionByZeroError("Division by zero is not allowed."))
+    record_operation_error("divide", ZeroDivisionError("float division by zero"))
+    record_operation_error("division", ValueError("Inputs must not be zero-length."))
+    assert operation_errors.value("divide", "division_by_zero") == before_zero + 2
+    assert operation_errors.value("divide", "invalid_input") == before_invalid + 1
+
+
+def test_calculation_types_share_the_route_labels():
+    before = operations.value("multiply")
+    record_operation("multiplication", 3)
+    record_operation("multiply", 2)
+    assert operations.value("multiply") == before + 2
+    assert operations.value("multiplication") == 0
+
+
+def test_callback_metric_reads_values_at_render_time():
+    registry = MetricsRegistry()
+    values = {("a",): 1.0}
+    CallbackMetric("seen_total", "Seen.", lambda: dict(values), ("name",), kind="counter", registry=registry)
+    assert 'seen_total{name="a"} 1.0' in registry.render()
+    values[("a",)] = 3.0
+    rendered = registry.render()
+    assert "# TYPE seen_total counter" in rendered
+    assert 'seen_total{name="a"} 3.0' in rendered
@@ -0,0 +1,132 @@
+# tests/unit/test_rate_limit.py
+
+import pytest
+
+from app.auth.rate_limit import (
+    InMemoryBackend,
+    LocalCounterStore,
+    LoginRateLimiter,
+    RateLimitExceeded,
+    RedisCounterStore,
+    SharedCounterBackend,
+)
+
+
+class FakeClock:
+    """Manually advanced time source."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_in_memory_bucket_allows_burst_then_refills():
+    clock = FakeClock()
+    backend = InMemoryBackend(clock=clock)
+    assert [backend.acquire("k", rate=1.0, burst=3) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert backend.acquire("k", rate=1.0, burst=3) == pytest.approx(1.0)
+
+    clock.now += 1.0
+    assert backend.acquire("k", rate=1.0, burst=3) == 0.0
+    assert backend.acquire("k", rate=1.0, burst=3) > 0
+
+
+def test_in_memory_bucket_evicts_least_recently_used_keys():
+    backend = InMemoryBackend(max_keys=2, clock=FakeClock())
+    backend.acquire("a", 1.0, 1)
+    backend.acquire("b", 1.0, 1)
+    backend.acquire("c", 1.0, 1)
+    assert len(backend) == 2
+    assert backend.acquire("a", 1.0, 1) == 0.0  # evicted, so it starts full again
+
+
+def test_login_limiter_limits_username_and_ip():
+    limiter = LoginRateLimiter(backend=InMemoryBackend(clock=FakeClock()), username_per_minute=2, ip_per_minute=3)
+    limiter.check("alice", "10.0.0.1")
+    limiter.check("ALICE", "10.0.0.1")
+    with pytest.raises(RateLimitExceeded) as exc_info:
+        limiter.check("alice", "10.0.0.2")
+    assert exc_info.value.key == "user:alice"
+    assert exc_info.value.retry_after > 0
+
+    limiter.check("bob", "10.0.0.1")
+    with pytest.raises(RateLimitExceeded, match="Too many login attempts") as exc_info:
+        limiter.check("carol", "10.0.0.1")
+    assert exc_info.value.key == "ip:10.0.0.1"
+
+
+@pytest.mark.parametrize("backend", [
+    lambda clock: InMemoryBackend(clock=clock),
+    lambda clock: SharedCounterBackend(LocalCounterStore(clock=clock), clock=clock),
+])
+def test_rejected_attempt_does_not_charge_the_other_bucket(backend):
+    limiter = LoginRateLimiter(backend=backend(FakeClock(now=60.0)), username_per_minute=2, ip_per_minute=1)
+    limiter.check("alice", "10.0.0.1")
+    for _ in range(5):
+        with pytest.raises(RateLimitExceeded) as exc_info:
+            limiter.check("alice", "10.0.0.1")
+        assert exc_info.value.key == "ip:10.0.0.1"
+
+    # The IP rejections left alice's second attempt in place.
+    limiter.check("alice", "10.0.0.2")
+    with pytest.raises(RateLimitExceeded) as exc_info:
+        limiter.check("alice", "10.0.0.3")
+    assert exc_info.value.key == "user:alice"
+
+
+def test_peek_does_not_take_a_token():
+    backend = InMemoryBackend(clock=FakeClock())
+    assert backend.peek("k", rate=1.0, burst=1) == 0.0
+    assert backend.acquire("k", rate=1.0, burst=1) == 0.0
+    assert backend.peek("k", rate=1.0, burst=1) == pytest.approx(1.0)
+    assert backend.peek("k", rate=1.0, burst=1) == pytest.approx(1.0)
+
+
+def test_zero_disables_a_limit():
+    limiter = LoginRateLimiter(backend=InMemoryBackend(clock=FakeClock()), username_per_minute=0, ip_per_minute=0)
+    for _ in range(100):
+        limiter.check("alice", "10.0.0.1")
+
+
+def test_shared_backend_is_consistent_across_workers():
+    """Two limiters (two 'workers') sharing one store see each other's attempts."""
+    clock = FakeClock(now=60.0)
+    store = LocalCounterStore(clock=clock)
+    worker_a = LoginRateLimiter(backend=SharedCounterBackend(store, clock=clock), username_per_minute=3)
+    worker_b = LoginRateLimiter(backend=SharedCounterBackend(store, clock=clock), username_per_minute=3)
+
+    worker_a.check("alice")
+    worker_b.check("alice")
+    worker_a.check("alice")
+    with pytest.raises(RateLimitExceeded) as exc_info:
+        worker_b.check("alice")
+    assert exc_info.value.retry_after == pytest.approx(60.0)
+
+    clock.now += 60.0
+    worker_b.check("alice")
+
+
+def test_redis_counter_store_sets_expiry_once():
+    class FakeRedis:
+        def __init__(self):
+            self.values, self.expiries = {}, {}
+
+        def incr(self, key):
+            self.values[key] = self.values.get(key, 0) + 1
+            return self.values[key]
+
+        def expire(self, key, seconds):
+            self.expiries[key] = seconds
+
+        def get(self, key):
+            return self.values.get(key)
+
+    client = FakeRedis()
+    store = RedisCounterStore(client)
+    assert store.incr("user:alice:0", 59.5) == 1
+    assert store.incr("user:alice:0", 59.5) == 2
+    assert client.expiries == {"login-limit:user:alice:0": 60}
+    assert store.get("user:alice:0") == 2
+    assert store.get("user:bob:0") == 0